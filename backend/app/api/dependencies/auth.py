@@ -1,6 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from ...services.auth import verify_token
 from ...models.common import ServiceResponse
+from ...core.profiling import record_user
 
 
 async def get_current_user(
@@ -16,4 +17,5 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    record_user(user_response.data)
     return user_response.data
@@ -0,0 +1,30 @@
+import math
+from fastapi import Depends, HTTPException, status
+from ...core.config import get_settings
+from ...core.metrics import REJECTED_REQUESTS
+from ...core.rate_limit import LocalRateLimitStore, RateLimitStore
+from .auth import get_current_user
+
+settings = get_settings()
+
+# Swap for a shared store to enforce limits across workers
+rate_limit_store: RateLimitStore = LocalRateLimitStore(settings.rate_limit_max_users)
+
+
+async def enforce_rate_limit(current_user: dict = Depends(get_current_user)):
+    """
+    Charge the request to the user's token bucket, answering 429 when empty
+    """
+    if not settings.rate_limit_enabled:
+        return
+
+    retry_after = await rate_limit_store.acquire(
+        current_user["uid"], settings.rate_limit_per_second, settings.rate_limit_burst
+    )
+    if retry_after > 0:
+        REJECTED_REQUESTS.inc(reason="user")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded, please slow down",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
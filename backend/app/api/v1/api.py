@@ -1,6 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from ..dependencies.rate_limit import enforce_rate_limit
 from .notes import router as notes_router
 
 api_router = APIRouter()
 
-api_router.include_router(notes_router, tags=["notes"])
+api_router.include_router(
+    notes_router, tags=["notes"], dependencies=[Depends(enforce_rate_limit)]
+)
@@ -1,38 +1,202 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional, Union
 from ...models.common import ServiceResponse
 from ...models import (
     NoteCreate,
     NoteUpdate,
     NoteResponse,
+    NoteListResponse,
+    NoteSummaryListResponse,
+    NoteSearchResponse,
+    NoteChangesResponse,
+    NoteBatchRequest,
+    NoteBatchResponse,
+    NoteImportResponse,
     MessageResponse,
 )
 from ...api.dependencies.auth import get_current_user
-from ...services.notes import notes_service
+from ...core.etag import list_etag, none_match, note_etag
+from ...core.profiling import TimedRoute
+from ...core.responses import ModelJSONResponse, model_response
+from ...services.notes import notes_service, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(route_class=TimedRoute)
 
-router = APIRouter()
+# Export lines are sent in chunks of roughly this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
 
 
 @router.get(
     "/notes",
-    response_model=ServiceResponse[list[NoteResponse]],
+    response_model=ServiceResponse[Union[NoteListResponse, NoteSummaryListResponse]],
     summary="List user's notes",
-    description="Retrieve all notes belonging to the authenticated user",
+    description="Retrieve a page of notes belonging to the authenticated user",
+)
+async def get_notes(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = Query(None),
+    view: Literal["full", "summary"] = Query("full"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get a page of notes for the authenticated user, newest first.
+
+    - **limit**: Maximum number of notes to return
+    - **page_token**: `next_page_token` from the previous page
+    - **view**: `summary` returns a content snippet and length instead of
+      the full content
+
+    Responds 304 when `If-None-Match` matches the page's ETag.
+    """
+
+    result = await notes_service.get_user_notes(
+        user_id=current_user["uid"], limit=limit, page_token=page_token, view=view
+    )
+
+    if result.type == False:  # Error case
+        if "invalid page token" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result.message,
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=result.message,
+        )
+
+    etag = list_etag(
+        [(note.id, note.updated_at) for note in result.data.notes],
+        view,
+        result.data.next_page_token or "",
+    )
+    if not none_match(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+    return model_response(result, response=response)
+
+
+@router.get(
+    "/notes/changes",
+    response_model=ServiceResponse[NoteChangesResponse],
+    summary="Sync note changes",
+    description="Retrieve notes changed or deleted since a sync cursor",
+)
+async def get_note_changes(
+    since: Optional[str] = Query(None),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get changes since the last sync, oldest first.
+
+    - **since**: `next_cursor` from the previous sync or an ISO 8601 timestamp;
+      omit for a full sync
+    - **limit**: Maximum number of changes to return; fetch again while
+      `has_more` is true
+    """
+    result = await notes_service.get_note_changes(
+        user_id=current_user["uid"], since=since, limit=limit
+    )
+
+    if result.type == False:  # Error case
+        if "invalid sync cursor" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result.message,
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=result.message,
+        )
+
+    return model_response(result)
+
+
+@router.get(
+    "/notes/stream",
+    response_class=StreamingResponse,
+    summary="Stream note changes",
+    description="Server-sent events for notes created, updated or deleted",
+    responses={200: {"content": {"text/event-stream": {}}}},
 )
-async def get_notes(current_user: dict = Depends(get_current_user)):
+async def stream_note_changes(current_user: dict = Depends(get_current_user)):
     """
-    Get all notes for the authenticated user.
+    Push changes to the user's notes as server-sent events.
+
+    A `ready` event confirms the subscription; fetch `GET /notes/changes`
+    after it to catch up without gaps. Then `created`, `updated` and
+    `deleted` events follow, each with the change's sync cursor as its ID.
+    A client that falls behind gets a `resync` event and the stream ends.
     """
+    events = notes_service.open_change_stream(current_user["uid"])
+    if events is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open change streams for this user",
+        )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keeps the gzip middleware and proxies from buffering events
+            "Content-Encoding": "identity",
+            "X-Accel-Buffering": "no",
+        },
+    )
 
-    result = await notes_service.get_user_notes(user_id=current_user["uid"])
+
+@router.get(
+    "/notes/search",
+    response_model=ServiceResponse[NoteSearchResponse],
+    summary="Search user's notes",
+    description="Full-text search over the titles and content of the user's notes",
+)
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Search notes, best matches first.
+
+    - **q**: Search terms, matched against title and content
+    - **limit**: Maximum number of results to return
+    - **page_token**: `next_page_token` from the previous page
+    """
+    result = await notes_service.search_notes(
+        user_id=current_user["uid"], query=q, limit=limit, page_token=page_token
+    )
 
     if result.type == False:  # Error case
+        if "invalid page token" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=result.message,
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=result.message,
         )
 
-    return result
+    return model_response(result)
 
 
 @router.post(
@@ -49,19 +213,123 @@ async def create_note(
     Create a new note.
 
     - **title**: Note title (required, 1-200 characters)
-    - **content**: Note content (required)
+    - **content**: Note content (required, at most NOTE_CONTENT_MAX_BYTES as UTF-8)
     """
     result = await notes_service.create_note(
         note_data=note_data, user_id=current_user["uid"]
     )
 
+    if result.type == False:  # Error case
+        if "exceeds the maximum size" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=result.message,
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=result.message,
+        )
+
+    return model_response(result, status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/notes:batch",
+    response_model=ServiceResponse[NoteBatchResponse],
+    summary="Apply a batch of note operations",
+    description="Create, update and delete several notes in a single request",
+)
+async def batch_notes(
+    batch: NoteBatchRequest, current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply a list of operations in order and report a result for each.
+
+    - **op**: `create`, `update` or `delete`
+    - **note_id**: Target note (update and delete)
+    - **title** / **content**: Note fields (create and update)
+    """
+    result = await notes_service.batch_notes(
+        operations=batch.operations, user_id=current_user["uid"]
+    )
+
+    if result.type == False and result.data is not None:
+        # Storage failed partway; the results tell which operations were stored
+        return ModelJSONResponse(
+            result, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    if result.type == False:  # Error case
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=result.message,
+        )
+
+    return model_response(result)
+
+
+@router.get(
+    "/notes/export",
+    response_class=StreamingResponse,
+    summary="Export all notes",
+    description="Stream every note of the authenticated user as NDJSON",
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_notes(current_user: dict = Depends(get_current_user)):
+    """
+    Download every note as newline-delimited JSON, newest first.
+
+    Notes are streamed from storage as they are read, so the export does
+    not have to fit in memory.
+    """
+
+    async def ndjson():
+        chunk, size = [], 0
+        async for note in notes_service.export_notes(current_user["uid"]):
+            line = note.model_dump_json().encode() + b"\n"
+            chunk.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield b"".join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield b"".join(chunk)
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="notes.ndjson"'},
+    )
+
+
+@router.post(
+    "/notes/import",
+    response_model=ServiceResponse[NoteImportResponse],
+    summary="Import notes",
+    description="Create notes from an NDJSON upload, such as an export",
+)
+async def import_notes(
+    request: Request, current_user: dict = Depends(get_current_user)
+):
+    """
+    Create one note per line of a newline-delimited JSON body.
+
+    - **title** / **content**: Note fields (required on every line)
+    - **created_at**: Original creation time (optional)
+
+    The body is read as it arrives and notes are written in batches.
+    Invalid lines are skipped and reported.
+    """
+    result = await notes_service.import_notes(
+        chunks=request.stream(), user_id=current_user["uid"]
+    )
+
     if result.type == False:  # Error case
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=result.message,
         )
 
-    return result
+    return model_response(result)
 
 
 @router.get(
@@ -70,11 +338,18 @@ async def create_note(
     summary="Get a specific note",
     description="Retrieve a specific note by ID for the authenticated user",
 )
-async def get_note(note_id: str, current_user: dict = Depends(get_current_user)):
+async def get_note(
+    note_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
     """
     Get a specific note by ID.
 
     - **note_id**: The ID of the note to retrieve
+
+    Responds 304 when `If-None-Match` matches the note's ETag.
     """
     result = await notes_service.get_note_by_id(
         note_id=note_id, user_id=current_user["uid"]
@@ -86,7 +361,14 @@ async def get_note(note_id: str, current_user: dict = Depends(get_current_user))
             detail=result.message,
         )
 
-    return result
+    etag = note_etag(result.data.id, result.data.updated_at)
+    if not none_match(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+    return model_response(result, response=response)
 
 
 @router.put(
@@ -96,7 +378,11 @@ async def get_note(note_id: str, current_user: dict = Depends(get_current_user))
     description="Update an existing note for the authenticated user",
 )
 async def update_note(
-    note_id: str, note_data: NoteUpdate, current_user: dict = Depends(get_current_user)
+    note_id: str,
+    note_data: NoteUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
 ):
     """
     Update an existing note.
@@ -104,6 +390,9 @@ async def update_note(
     - **note_id**: The ID of the note to update
     - **title**: Updated note title (optional, 1-200 characters)
     - **content**: Updated note content (optional)
+
+    With `If-Match`, the update only applies if the note still has that
+    ETag, and responds 412 otherwise.
     """
     # Validate that at least one field is being updated
     if not any(
@@ -118,10 +407,23 @@ async def update_note(
         )
 
     result = await notes_service.update_note(
-        note_id=note_id, note_data=note_data, user_id=current_user["uid"]
+        note_id=note_id,
+        note_data=note_data,
+        user_id=current_user["uid"],
+        if_match=if_match,
     )
 
     if result.type == False:  # Error case
+        if "precondition failed" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=result.message,
+            )
+        if "exceeds the maximum size" in result.message.lower():
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=result.message,
+            )
         if (
             "not found" in result.message.lower()
             or "permission" in result.message.lower()
@@ -136,7 +438,8 @@ async def update_note(
                 detail=result.message,
             )
 
-    return result
+    response.headers["ETag"] = note_etag(result.data.id, result.data.updated_at)
+    return model_response(result, response=response)
 
 
 @router.delete(
@@ -170,8 +473,10 @@ async def delete_note(note_id: str, current_user: dict = Depends(get_current_use
                 detail=result.message,
             )
 
-    return MessageResponse(
-        type=True,
-        message=result.message,
-        detail=f"Note with ID {note_id} has been permanently deleted",
+    return model_response(
+        MessageResponse(
+            type=True,
+            message=result.message,
+            detail=f"Note with ID {note_id} has been permanently deleted",
+        )
     )
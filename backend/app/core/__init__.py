@@ -1,4 +1,13 @@
 from .config import get_settings, Settings
+from .cache import TTLCache, CacheBackend, LocalCacheBackend, create_cache_backend
+from .rate_limit import (
+    RateLimitStore,
+    LocalRateLimitStore,
+    AdmissionController,
+    AdmissionMiddleware,
+)
+from .concurrency import run_blocking, get_executor, shutdown_executor
+from .responses import ModelJSONResponse, model_response
 from .exceptions import (
     http_exception_handler,
     validation_exception_handler,
@@ -8,6 +17,13 @@ from .exceptions import (
 __all__ = [
     "get_settings",
     "Settings",
+    "TTLCache",
+    "CacheBackend",
+    "LocalCacheBackend",
+    "create_cache_backend",
+    "run_blocking",
+    "get_executor",
+    "shutdown_executor",
     "http_exception_handler",
     "validation_exception_handler",
     "general_exception_handler",
@@ -0,0 +1,139 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Protocol, Tuple
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire at an absolute timestamp
+
+    Entries are evicted least-recently-used first once ``max_size`` is
+    reached. Expiry times are wall-clock epoch seconds so they can be
+    taken directly from token ``exp`` claims.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        default_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: Optional[float] = None,
+    ):
+        if expires_at is None:
+            if self.default_ttl is None:
+                raise ValueError("expires_at is required without a default TTL")
+            expires_at = self._clock() + self.default_ttl
+
+        if self.max_size <= 0 or expires_at <= self._clock():
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheBackend(Protocol):
+    """Byte-string key/value store used for shared response caching"""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+class LocalCacheBackend:
+    """In-process CacheBackend backed by a TTLCache"""
+
+    def __init__(self, max_size: int):
+        self.cache = TTLCache(max_size=max_size, clock=time.monotonic)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set(key, value, expires_at=time.monotonic() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+
+def create_cache_backend(settings) -> Optional[CacheBackend]:
+    """Build the note cache backend selected by ``settings.note_cache_backend``
+
+    ``local`` caches in this process, which is only safe with one worker:
+    other workers never see its invalidations. ``auto`` picks ``local``
+    for a single worker and no cache otherwise. A ``module:factory`` path
+    names a callable taking the settings and returning a shared backend.
+    """
+    kind = settings.note_cache_backend
+    if kind.lower() == "auto":
+        kind = "local" if settings.workers <= 1 else "none"
+
+    if kind.lower() == "none":
+        return None
+    if kind.lower() == "local":
+        return LocalCacheBackend(settings.note_cache_max_entries)
+
+    module_name, _, factory_name = kind.partition(":")
+    if not module_name or not factory_name:
+        raise ValueError(f"Unknown note cache backend: {settings.note_cache_backend}")
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return factory(settings)
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, TypeVar
+
+from .config import get_settings
+from .profiling import timed_phase
+
+T = TypeVar("T")
+
+
+@lru_cache()
+def get_executor() -> ThreadPoolExecutor:
+    """Bounded thread pool for blocking storage calls"""
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.storage_max_workers,
+        thread_name_prefix="storage",
+    )
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call in the storage thread pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    with timed_phase("storage"):
+        return await loop.run_in_executor(
+            get_executor(), partial(func, *args, **kwargs)
+        )
+
+
+def shutdown_executor():
+    """Wait for in-flight storage calls and release the thread pool"""
+    if get_executor.cache_info().currsize:
+        get_executor().shutdown(wait=True)
+        get_executor.cache_clear()
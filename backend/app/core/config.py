@@ -18,10 +18,91 @@ class Settings(BaseSettings):
     )
     firebase_client_x509_cert_url: str = ""
 
+    # Auth Configuration
+    token_cache_max_size: int = 10000
+    # Verify ID tokens against cached Firebase public keys instead of
+    # through firebase_admin, refreshing the keys ahead of their expiry
+    auth_local_verification: bool = True
+    auth_keys_url: str = (
+        "https://www.googleapis.com/service_accounts/v1/jwk/"
+        "securetoken@system.gserviceaccount.com"
+    )
+    auth_keys_refresh_margin_seconds: int = 300
+
     # API Configuration
     api_host: str = "127.0.0.1"
     api_port: int = 8000
     debug: bool = True
+    # Serialize route results straight from their models, skipping
+    # FastAPI's response_model validation and jsonable_encoder pass
+    fast_json_responses: bool = False
+    # Responses smaller than this many bytes are sent uncompressed
+    gzip_minimum_size: int = 1000
+
+    # Production Server Configuration (python -m app.server)
+    workers: int = 0  # 0 derives the worker count from the available CPUs
+    keep_alive_timeout: int = 5
+    backlog: int = 2048
+    graceful_shutdown_timeout: int = 30
+    forwarded_allow_ips: str = "127.0.0.1"
+
+    # Rate Limiting and Admission Control
+    # Each user gets a token bucket refilled at rate_limit_per_second
+    rate_limit_enabled: bool = True
+    rate_limit_per_second: float = 20
+    rate_limit_burst: int = 100
+    rate_limit_max_users: int = 100000
+    # Per worker: concurrent API requests, plus a short queue before 503s
+    admission_max_concurrent: int = 200  # 0 disables admission control
+    admission_max_queue: int = 100
+    admission_queue_timeout_seconds: float = 1.0
+    admission_retry_after_seconds: int = 1
+
+    # Note content: hard size limit, and out-of-line storage of large bodies
+    note_content_max_bytes: int = 1_000_000
+    content_store: str = "none"  # none, local or firestore
+    content_store_path: str = "note_contents"
+    content_inline_max_bytes: int = 64 * 1024
+
+    # Storage Configuration
+    storage_backend: str = "auto"  # auto, firestore, memory or sqlite
+    storage_max_workers: int = 16
+    sqlite_path: str = "notes.db"
+    sqlite_pool_size: int = 4
+
+    # Cache Configuration
+    note_cache_enabled: bool = True
+    # auto, local, none, or module:factory returning a shared CacheBackend;
+    # auto caches locally with one worker and not at all with several
+    note_cache_backend: str = "auto"
+    note_cache_max_entries: int = 10000
+    note_cache_ttl_seconds: int = 30
+
+    # Search Configuration
+    search_index_max_users: int = 1000
+    # Other workers' writes reach an index at most this long after them
+    search_index_refresh_seconds: float = 30
+
+    # Write-behind: acknowledge updates at once, store them merged per note
+    write_behind_enabled: bool = False
+    write_behind_window_seconds: float = 2.0
+    write_behind_max_pending: int = 10000
+
+    # Change streams: where events come from, and per-stream bounds
+    change_feed_source: str = "service"  # service, or storage (Firestore listeners)
+    change_feed_max_queue: int = 100
+    change_feed_max_streams_per_user: int = 5
+    change_feed_heartbeat_seconds: float = 15.0
+
+    # Logging and Profiling
+    log_level: str = "INFO"
+    # Requests slower than this are logged with per-phase timings; 0 disables
+    slow_request_threshold_ms: float = 1000
+    # Profile requests carrying profiling_header; only admins get the report
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Debug-Profile"
+    profiling_admin_uids: str = ""  # comma-separated, besides the admin claim
+    profiling_output_dir: str = "profiles"
 
     # CORS Configuration
     allowed_origins: str = (
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _micros(value: datetime) -> int:
+    """Microseconds since the epoch, treating naive timestamps as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _id_hash(note_id: str) -> str:
+    return hashlib.sha256(note_id.encode()).hexdigest()[:8]
+
+
+def note_etag(note_id: str, updated_at: datetime) -> str:
+    """Strong ETag for one note version
+
+    The update timestamp is kept readable so an If-Match precondition can
+    be handed to storage as a conditional write without another read.
+    """
+    return f'"{_micros(updated_at):x}-{_id_hash(note_id)}"'
+
+
+def parse_note_etag(note_id: str, etag: str) -> Optional[datetime]:
+    """The naive UTC update timestamp a note ETag stands for, if it is one"""
+    if etag.startswith("W/") or len(etag) < 2 or etag[0] != '"' or etag[-1] != '"':
+        return None
+    micros, _, id_hash = etag[1:-1].partition("-")
+    if id_hash != _id_hash(note_id):
+        return None
+    try:
+        return _EPOCH + timedelta(microseconds=int(micros, 16))
+    except ValueError:
+        return None
+
+
+def list_etag(versions: Iterable[Tuple[str, datetime]], *extra: str) -> str:
+    """Strong ETag for a page of notes, from each note's id and version"""
+    digest = hashlib.sha256()
+    for note_id, updated_at in versions:
+        digest.update(f"{note_id}:{_micros(updated_at)};".encode())
+    for part in extra:
+        digest.update(f"{part};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def split_etags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """Whether If-None-Match lets the request through (weak comparison)"""
+    if not header:
+        return True
+    if header.strip() == "*":
+        return False
+    return all(tag.removeprefix("W/") != etag for tag in split_etags(header))
@@ -4,8 +4,10 @@ from fastapi.exceptions import RequestValidationError
 import logging
 from typing import Union
 
+from .config import get_settings
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=get_settings().log_level.upper())
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +20,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "message": exc.detail,
             "data": None,
         },
+        headers=exc.headers,
     )
 
 
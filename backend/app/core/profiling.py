@@ -0,0 +1,271 @@
+import asyncio
+import cProfile
+import functools
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Reported in this order; storage and models are spent within the handler
+PHASES = ("auth", "handler", "storage", "models", "serialization")
+
+
+class RequestTimings:
+    """Seconds spent in each phase of one request, and who made it"""
+
+    __slots__ = ("phases", "user", "handler_finished", "profile_requested", "profiler")
+
+    def __init__(self, profile_requested: bool = False):
+        self.phases: Dict[str, float] = {}
+        self.user: Optional[Dict[str, Any]] = None
+        self.handler_finished: Optional[float] = None
+        # Asked for by the request; started once the user is known
+        self.profile_requested = profile_requested
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def summary(self) -> str:
+        return " ".join(
+            f"{phase}={self.phases[phase] * 1000:.1f}ms"
+            for phase in PHASES
+            if phase in self.phases
+        )
+
+
+_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's ``phase``"""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def record_user(user: Dict[str, Any]):
+    """Remember the authenticated user, profiling the rest for admins
+
+    The profiler only starts here, after authentication, so clients that
+    are not profiling admins cannot slow the worker down with it.
+    """
+    timings = _timings.get()
+    if timings is None:
+        return
+    timings.user = user
+    if timings.profile_requested and is_profiling_admin(user):
+        timings.profile_requested = False
+        _start_profiler(timings)
+
+
+def is_profiling_admin(user: Optional[Dict[str, Any]]) -> bool:
+    """Whether ``user`` is listed in profiling_admin_uids or has the admin claim"""
+    if not user:
+        return False
+    admins = {
+        uid.strip()
+        for uid in get_settings().profiling_admin_uids.split(",")
+        if uid.strip()
+    }
+    claims = user.get("firebase") or {}
+    return user.get("uid") in admins or claims.get("admin") is True
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records when its endpoint returns
+
+    The time from there to the response start is what FastAPI spends
+    validating and serializing the result.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        # include_router() builds routes again from already wrapped endpoints
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(
+            endpoint, "_timed", False
+        ):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # Signature introspection follows __wrapped__ to the real endpoint
+    @functools.wraps(endpoint)
+    async def timed_endpoint(*args: Any, **values: Any) -> Any:
+        with timed_phase("handler"):
+            result = await endpoint(*args, **values)
+        timings = _timings.get()
+        if timings is not None:
+            timings.handler_finished = time.perf_counter()
+        return result
+
+    timed_endpoint._timed = True
+    return timed_endpoint
+
+
+# cProfile can only run one profiler per process
+_profiler_active = False
+
+
+def _start_profiler(timings: RequestTimings):
+    global _profiler_active
+    if _profiler_active:
+        return
+    _profiler_active = True
+    timings.profiler = cProfile.Profile()
+    timings.profiler.enable()
+
+
+def _stop_profiler(timings: RequestTimings) -> Optional[cProfile.Profile]:
+    global _profiler_active
+    profiler, timings.profiler = timings.profiler, None
+    if profiler is not None:
+        profiler.disable()
+        _profiler_active = False
+    return profiler
+
+
+class ProfilingMiddleware:
+    """ASGI middleware timing request phases and profiling on demand
+
+    Requests slower than ``slow_request_seconds`` are logged with their
+    phase timings. With ``profiling_enabled``, a request carrying the
+    ``profile_header`` made by a profiling admin is run under cProfile
+    from authentication to the response start. The profile is written
+    to ``output_dir`` and named in the X-Profile-Report response header;
+    other users' requests are not profiled. The profiler sees everything
+    the event loop runs meanwhile, so profile a quiet worker.
+    """
+
+    def __init__(
+        self,
+        app,
+        slow_request_seconds: float,
+        profiling_enabled: bool = False,
+        profile_header: str = "X-Debug-Profile",
+        output_dir: str = "profiles",
+        exempt_paths: Tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+        self.profiling_enabled = profiling_enabled
+        self.profile_header = profile_header.lower().encode("latin-1")
+        self.output_dir = Path(output_dir)
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(
+            profile_requested=self.profiling_enabled
+            and any(name == self.profile_header for name, _ in scope["headers"])
+        )
+        token = _timings.set(timings)
+
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_timed(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timings.handler_finished is not None:
+                    timings.add(
+                        "serialization", time.perf_counter() - timings.handler_finished
+                    )
+                if timings.profiler is not None:
+                    message = await self._finish_profile(timings, scope, message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _stop_profiler(timings)
+            _timings.reset(token)
+            self._log_if_slow(scope, status_code, time.perf_counter() - start, timings)
+
+    async def _finish_profile(
+        self, timings: RequestTimings, scope, message: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Stop profiling at the response start and write the profile out"""
+        profiler = _stop_profiler(timings)
+
+        method = scope["method"]
+        path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")
+        name = f"{int(time.time() * 1000)}-{method}-{path}.prof"
+
+        def dump():
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(self.output_dir / name))
+
+        try:
+            # Not the storage pool, so the write is not counted as storage time
+            await asyncio.get_running_loop().run_in_executor(None, dump)
+        except OSError as e:
+            logger.warning("Writing profile %s failed: %s", name, e)
+            return message
+
+        logger.info(
+            "Profiled %s %s to %s",
+            method,
+            scope["path"],
+            name,
+            extra={"profile_report": name, "user_id": timings.user.get("uid")},
+        )
+        return {
+            **message,
+            "headers": [
+                *message.get("headers", []),
+                (b"x-profile-report", name.encode()),
+            ],
+        }
+
+    def _log_if_slow(
+        self,
+        scope,
+        status_code: Optional[int],
+        seconds: float,
+        timings: RequestTimings,
+    ):
+        if self.slow_request_seconds <= 0 or seconds < self.slow_request_seconds:
+            return
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        logger.warning(
+            "Slow request %s %s %s took %.1fms: %s",
+            scope["method"],
+            path,
+            status_code,
+            seconds * 1000,
+            timings.summary() or "no phases recorded",
+            extra={
+                "method": scope["method"],
+                "path": path,
+                "status_code": status_code,
+                "duration_ms": round(seconds * 1000, 1),
+                "phases_ms": {
+                    phase: round(value * 1000, 1)
+                    for phase, value in timings.phases.items()
+                },
+            },
+        )
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Protocol, Tuple
+
+from .metrics import REJECTED_REQUESTS
+
+
+class RateLimitStore(Protocol):
+    """Token bucket state, shareable between workers by a custom backend"""
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from ``key``'s bucket
+
+        Returns 0 when the token was granted, otherwise the number of
+        seconds until one becomes available.
+        """
+        ...
+
+
+class LocalRateLimitStore:
+    """In-process RateLimitStore keeping the buckets of the most recent keys"""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # A forgotten key starts again from a full bucket
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class AdmissionController:
+    """Caps concurrent requests, with a short bounded queue for bursts
+
+    Requests beyond ``max_concurrent`` wait in FIFO order for at most
+    ``queue_timeout`` seconds, and only while fewer than ``max_queue`` are
+    already waiting; the rest are turned away at once.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        """Take a slot, returning False if the request should be rejected"""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the first live waiter
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 503 with Retry-After once the worker is full
+
+    Only paths under ``prefix`` are limited, so health checks and metrics
+    keep answering while the API sheds load. Long-lived streams listed in
+    ``exempt_paths`` would hold a slot for their whole life and are let
+    through.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+        prefix: str = "/api",
+        exempt_paths: Tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.controller = AdmissionController(max_concurrent, max_queue, queue_timeout)
+        self.retry_after = retry_after
+        self.prefix = prefix
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.prefix)
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            REJECTED_REQUESTS.inc(reason="overload")
+            await self._reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send):
+        body = json.dumps(
+            {
+                "type": False,
+                "message": "Server is overloaded, please retry later",
+                "data": None,
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
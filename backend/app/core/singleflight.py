@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs one call per key at a time, sharing its result with concurrent callers
+
+    Keys are grouped (by user, by note) so that a write can forget every
+    in-flight read it makes stale. Callers arriving after forget() start a
+    fresh call; those already waiting still get the older result, which
+    is what they would have got without coalescing.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Dict[Hashable, asyncio.Task]] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(
+        self, group: Hashable, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> T:
+        calls = self._calls.setdefault(group, {})
+        task = calls.get(key)
+        if task is None:
+            self.calls += 1
+            # Its own task, so a caller that goes away cancels only its wait
+            task = asyncio.ensure_future(func())
+            calls[key] = task
+            task.add_done_callback(lambda done: self._finished(group, key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, group: Hashable, key: Hashable, task: asyncio.Task):
+        calls = self._calls.get(group)
+        if calls is not None and calls.get(key) is task:
+            del calls[key]
+            if not calls:
+                del self._calls[group]
+        if not task.cancelled():
+            # Retrieved here in case every waiter has gone
+            task.exception()
+
+    def forget(self, group: Hashable):
+        """Make later callers in ``group`` start new calls"""
+        self._calls.pop(group, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "shared": self.shared}
@@ -1,10 +1,28 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+# Import time of the application module, reported with the startup timings
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
 import os
 from dotenv import load_dotenv
 
 from .core.config import get_settings
+from .core.concurrency import shutdown_executor
+from .core.metrics import STARTUP_DURATION, MetricsMiddleware, registry
+from .core.profiling import ProfilingMiddleware
+from .core.rate_limit import AdmissionMiddleware
+from .services.auth import get_token_verifier
+from .services.firebase import initialize_firebase
+from .services.notes import notes_service
 from .api.v1.api import api_router
 from .core.exceptions import (
     http_exception_handler,
@@ -12,9 +30,71 @@ from .core.exceptions import (
     general_exception_handler,
 )
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
+# Get settings
+settings = get_settings()
+
+
+async def _timed(timings: Dict[str, float], phase: str, step):
+    start = time.perf_counter()
+    try:
+        await step()
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize and warm every dependency before the worker takes traffic
+
+    Runs in each worker process once it has started, so Firebase and
+    storage clients are never shared across processes. Phase durations
+    are kept on ``app.state.startup_timings`` and exported as metrics.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {"import": _import_ready - _import_started}
+    firebase_app = None
+
+    async def init_firebase():
+        nonlocal firebase_app
+        firebase_app = initialize_firebase()
+
+    async def warm_storage():
+        # A misconfigured backend fails startup; a failed probe only costs
+        # the first request its connection setup
+        repository = notes_service.repository
+        try:
+            await repository.ping()
+        except Exception as e:
+            logger.warning("Storage warm-up probe failed: %s", e)
+
+    async def warm_auth_keys():
+        if firebase_app is not None and settings.auth_local_verification:
+            await get_token_verifier().start()
+
+    await _timed(timings, "firebase", init_firebase)
+    # Storage and signing keys are independent network round trips
+    await asyncio.gather(
+        _timed(timings, "storage", warm_storage),
+        _timed(timings, "auth_keys", warm_auth_keys),
+    )
+    timings["total"] = time.perf_counter() - started
+
+    app.state.startup_timings = timings
+    for phase, seconds in timings.items():
+        STARTUP_DURATION.set(seconds, phase=phase)
+
+    yield
+
+    await get_token_verifier().stop()
+    await notes_service.close()
+    shutdown_executor()
+
+
 # Create FastAPI instance
 app = FastAPI(
     title="Notes API",
@@ -22,6 +102,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Add exception handlers
@@ -29,8 +110,16 @@ app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
-# Get settings
-settings = get_settings()
+# Turn away API requests beyond the worker's capacity instead of queuing them
+if settings.admission_max_concurrent > 0:
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrent=settings.admission_max_concurrent,
+        max_queue=settings.admission_max_queue,
+        queue_timeout=settings.admission_queue_timeout_seconds,
+        retry_after=settings.admission_retry_after_seconds,
+        exempt_paths=("/api/notes/stream",),
+    )
 
 # Configure CORS
 app.add_middleware(
@@ -39,12 +128,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+
+# Compress responses above the size threshold for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
+# Record per-route request counts and latencies
+app.add_middleware(MetricsMiddleware)
+
+# Log slow requests by phase, and profile admin requests that ask for it
+app.add_middleware(
+    ProfilingMiddleware,
+    slow_request_seconds=settings.slow_request_threshold_ms / 1000,
+    profiling_enabled=settings.profiling_enabled,
+    profile_header=settings.profiling_header,
+    output_dir=settings.profiling_output_dir,
+    exempt_paths=("/api/notes/stream",),
 )
 
 # Include routers
 app.include_router(api_router, prefix="/api")
 
 
+_import_ready = time.perf_counter()
+
+
 @app.get("/")
 async def root():
     return {"message": "Notes API is running!", "version": "1.0.0"}
@@ -55,6 +164,11 @@ async def health_check():
     return {"status": "healthy", "service": "notes-api"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type=registry.content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
 
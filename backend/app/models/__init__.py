@@ -3,6 +3,20 @@ from .notes import (
     NoteCreate,
     NoteUpdate,
     NoteResponse,
+    NoteListResponse,
+    NoteSummary,
+    NoteSummaryListResponse,
+    NoteTombstone,
+    NoteChangesResponse,
+    NoteSearchResult,
+    NoteSearchResponse,
+    NoteBatchOperation,
+    NoteBatchRequest,
+    NoteBatchResult,
+    NoteBatchResponse,
+    NoteImport,
+    NoteImportError,
+    NoteImportResponse,
 )
 from .common import MessageResponse, ServiceResponse
 
@@ -11,6 +25,20 @@ __all__ = [
     "NoteCreate",
     "NoteUpdate",
     "NoteResponse",
+    "NoteListResponse",
+    "NoteSummary",
+    "NoteSummaryListResponse",
+    "NoteTombstone",
+    "NoteChangesResponse",
+    "NoteSearchResult",
+    "NoteSearchResponse",
+    "NoteBatchOperation",
+    "NoteBatchRequest",
+    "NoteBatchResult",
+    "NoteBatchResponse",
+    "NoteImport",
+    "NoteImportError",
+    "NoteImportResponse",
     "MessageResponse",
     "ServiceResponse",
 ]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -24,6 +24,116 @@ class NoteResponse(NoteBase):
     user_id: str = Field(..., description="User ID who owns the note")
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
+    content_truncated: bool = Field(
+        False,
+        description="True if content is only the start of a large note; "
+        "fetch the note by ID for all of it",
+    )
 
     class Config:
         from_attributes = True
+
+
+class NoteListResponse(BaseModel):
+    notes: List[NoteResponse] = Field(..., description="Notes in this page")
+    next_page_token: Optional[str] = Field(
+        None, description="Opaque token for the next page, absent on the last page"
+    )
+
+
+class NoteSummary(BaseModel):
+    id: str = Field(..., description="Note ID")
+    title: str = Field(..., description="Note title")
+    snippet: Optional[str] = Field(
+        None, description="Beginning of the note content, truncated"
+    )
+    content_length: Optional[int] = Field(
+        None, description="Length of the full note content in characters"
+    )
+    created_at: datetime = Field(..., description="Creation timestamp")
+    updated_at: datetime = Field(..., description="Last update timestamp")
+
+
+class NoteSummaryListResponse(BaseModel):
+    notes: List[NoteSummary] = Field(..., description="Note summaries in this page")
+    next_page_token: Optional[str] = Field(
+        None, description="Opaque token for the next page, absent on the last page"
+    )
+
+
+class NoteTombstone(BaseModel):
+    id: str = Field(..., description="ID of the deleted note")
+    deleted_at: datetime = Field(..., description="Deletion timestamp")
+
+
+class NoteChangesResponse(BaseModel):
+    notes: List[NoteResponse] = Field(
+        ..., description="Notes created or updated since the cursor"
+    )
+    deleted: List[NoteTombstone] = Field(
+        ..., description="Notes deleted since the cursor"
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor to pass as `since` on the next sync"
+    )
+    has_more: bool = Field(..., description="True if more changes are pending")
+
+
+class NoteSearchResult(NoteResponse):
+    score: float = Field(..., description="Relevance score, higher is better")
+
+
+class NoteSearchResponse(BaseModel):
+    results: List[NoteSearchResult] = Field(..., description="Ranked matches")
+    next_page_token: Optional[str] = Field(
+        None, description="Opaque token for the next page, absent on the last page"
+    )
+
+
+class NoteBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"] = Field(..., description="Operation")
+    note_id: Optional[str] = Field(
+        None, description="Target note ID (required for update and delete)"
+    )
+    title: Optional[str] = Field(
+        None, min_length=1, max_length=200, description="Note title"
+    )
+    content: Optional[str] = Field(None, description="Note content")
+
+
+class NoteBatchRequest(BaseModel):
+    operations: List[NoteBatchOperation] = Field(
+        ..., min_length=1, max_length=1000, description="Operations, applied in order"
+    )
+
+
+class NoteBatchResult(BaseModel):
+    index: int = Field(..., description="Position of the operation in the request")
+    op: str = Field(..., description="Operation")
+    type: bool = Field(..., description="True if the operation succeeded")
+    message: str
+    note_id: Optional[str] = Field(None, description="ID of the affected note")
+    data: Optional[NoteResponse] = None
+
+
+class NoteBatchResponse(BaseModel):
+    results: List[NoteBatchResult] = Field(..., description="One result per operation")
+
+
+class NoteImport(NoteCreate):
+    created_at: Optional[datetime] = Field(
+        None, description="Original creation timestamp, kept when given"
+    )
+
+
+class NoteImportError(BaseModel):
+    line: int = Field(..., description="1-based line number in the upload")
+    message: str = Field(..., description="Why the line was skipped")
+
+
+class NoteImportResponse(BaseModel):
+    imported: int = Field(..., description="Number of notes created")
+    failed: int = Field(..., description="Number of lines that were skipped")
+    errors: List[NoteImportError] = Field(
+        ..., description="Details of the first skipped lines"
+    )
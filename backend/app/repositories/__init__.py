@@ -0,0 +1,99 @@
+import logging
+
+from .base import (
+    NotesRepository,
+    NoteWrite,
+    PageCursor,
+    ChangeCursor,
+    NoteNotFoundError,
+    NoteAccessDeniedError,
+    NoteConflictError,
+    PartialWriteError,
+    iter_pages,
+    merge_changes,
+    summarize_note,
+    content_exceeds,
+    SNIPPET_LENGTH,
+    STREAM_BATCH_SIZE,
+)
+from .content import ContentStore, LocalContentStore, OffloadingNotesRepository
+from .memory import InMemoryNotesRepository
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "NotesRepository",
+    "NoteWrite",
+    "PageCursor",
+    "ChangeCursor",
+    "SNIPPET_LENGTH",
+    "STREAM_BATCH_SIZE",
+    "NoteNotFoundError",
+    "NoteAccessDeniedError",
+    "NoteConflictError",
+    "PartialWriteError",
+    "InMemoryNotesRepository",
+    "ContentStore",
+    "LocalContentStore",
+    "OffloadingNotesRepository",
+    "create_notes_repository",
+]
+
+
+def create_notes_repository(settings) -> NotesRepository:
+    """Build the storage backend selected by ``settings.storage_backend``
+
+    ``auto`` keeps the historical behaviour: Firestore when Firebase is
+    configured, in-memory storage otherwise. With ``settings.content_store``
+    set, large note bodies are kept out of the note documents.
+    """
+    backend = settings.storage_backend.lower()
+
+    if backend == "sqlite":
+        from .sqlite import SQLiteNotesRepository
+
+        if settings.content_store.lower() != "none":
+            # Rows have no room for the offloading fields, and SQLite
+            # already reads only the columns listings need
+            raise ValueError("The SQLite backend keeps note content inline")
+        return SQLiteNotesRepository(settings.sqlite_path, settings.sqlite_pool_size)
+
+    if backend == "memory":
+        return _with_content_store(InMemoryNotesRepository(), settings)
+
+    if backend not in ("auto", "firestore"):
+        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+    from ..services.firebase import initialize_firebase
+
+    firebase_app = initialize_firebase()
+    if firebase_app is None:
+        if backend == "firestore":
+            raise RuntimeError("Firestore backend requires Firebase to be configured")
+        # Development mode - use mock database
+        logger.warning("Running in development mode with mock database")
+        return _with_content_store(InMemoryNotesRepository(), settings)
+
+    from firebase_admin import firestore
+    from .firestore import FirestoreNotesRepository
+
+    return _with_content_store(FirestoreNotesRepository(firestore.client()), settings)
+
+
+def _with_content_store(repository, settings) -> NotesRepository:
+    """Wrap a document backend so that large bodies go to the content store"""
+    kind = settings.content_store.lower()
+    if kind == "none":
+        return repository
+    if kind == "local":
+        store = LocalContentStore(settings.content_store_path)
+    elif kind == "firestore":
+        from firebase_admin import firestore
+        from .firestore import FirestoreContentStore
+
+        store = FirestoreContentStore(firestore.client())
+    else:
+        raise ValueError(f"Unknown content store: {settings.content_store}")
+    return OffloadingNotesRepository(
+        repository, store, settings.content_inline_max_bytes
+    )
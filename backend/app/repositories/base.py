@@ -0,0 +1,193 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol, Tuple
+
+# Position of the last note of a page: (created_at, note_id)
+PageCursor = Tuple[datetime, str]
+
+# Characters of content returned as a note summary's snippet
+SNIPPET_LENGTH = 200
+
+# Notes held in memory at once while streaming a user's whole collection
+STREAM_BATCH_SIZE = 500
+
+# Position of the last change returned by a sync: (updated_at, note_id)
+ChangeCursor = Tuple[datetime, str]
+
+# A pending write: ("create" | "update" | "delete", note_id, payload). Deletes
+# carry {"user_id": ..., "deleted_at": ...} to record the tombstone.
+NoteWrite = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def content_exceeds(content: Optional[str], max_bytes: int) -> bool:
+    """Whether content takes more than ``max_bytes`` bytes as UTF-8"""
+    if content is None or len(content) * 4 <= max_bytes:
+        return False
+    return (
+        len(content) > max_bytes
+        or len(content.encode("utf-8", "surrogatepass")) > max_bytes
+    )
+
+
+def summarize_note(note: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace a note document's content with its snippet and length"""
+    summary = {key: value for key, value in note.items() if key != "content"}
+    summary["snippet"] = note["content"][:SNIPPET_LENGTH]
+    # Content stored out of line leaves only a preview in the document
+    if not note.get("content_offloaded"):
+        summary["content_length"] = len(note["content"])
+    return summary
+
+
+async def iter_pages(
+    repository: "NotesRepository", user_id: str, batch_size: int
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every note of a user by walking list_by_user page by page"""
+    cursor = None
+    while True:
+        notes, has_more = await repository.list_by_user(user_id, batch_size, cursor)
+        for note in notes:
+            yield note
+        if not has_more or not notes:
+            return
+        cursor = (notes[-1]["created_at"], notes[-1]["id"])
+
+
+def merge_changes(
+    notes: List[Dict[str, Any]], tombstones: List[Dict[str, Any]], limit: int
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Merge note and tombstone changes, each fetched with ``limit + 1`` rows"""
+    changes = sorted(notes + tombstones, key=lambda c: (c["updated_at"], c["id"]))
+    return changes[:limit], len(changes) > limit
+
+
+class NoteNotFoundError(Exception):
+    """The note does not exist"""
+
+
+class NoteAccessDeniedError(Exception):
+    """The note exists but belongs to another user"""
+
+
+class NoteConflictError(Exception):
+    """The note changed since the version a conditional write expected"""
+
+
+class PartialWriteError(Exception):
+    """apply_writes() failed after storing the first ``applied`` writes"""
+
+    def __init__(self, applied: int, error: Exception):
+        super().__init__(str(error))
+        self.applied = applied
+        self.error = error
+
+
+class NotesRepository(Protocol):
+    """Storage backend for note documents
+
+    Note documents are plain dicts with the keys ``id``, ``user_id``,
+    ``title``, ``content``, ``created_at`` and ``updated_at``. Deleting a
+    note leaves a tombstone ``{"id", "user_id", "updated_at", "deleted"}``
+    behind so that syncing clients learn about the deletion.
+    """
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        """Store a new note document"""
+        ...
+
+    async def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """Return the note document with the given ID, or None"""
+        ...
+
+    async def get_many(self, note_ids: List[str]) -> List[Dict[str, Any]]:
+        """Return the note documents that exist among the given IDs"""
+        ...
+
+    async def update(self, note_id: str, fields: Dict[str, Any]) -> None:
+        """Overwrite the given fields of an existing note document"""
+        ...
+
+    async def delete(self, note_id: str, user_id: str, deleted_at: datetime) -> None:
+        """Remove the note document with the given ID and record a tombstone"""
+        ...
+
+    async def update_owned(
+        self,
+        note_id: str,
+        user_id: str,
+        fields: Dict[str, Any],
+        expected_updated_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Update a note owned by ``user_id`` and return the merged document
+
+        Raises NoteNotFoundError or NoteAccessDeniedError instead of writing
+        when the note is missing or owned by someone else, and
+        NoteConflictError when ``expected_updated_at`` (naive UTC) is given
+        and no longer matches the stored note.
+        """
+        ...
+
+    async def delete_owned(
+        self, note_id: str, user_id: str, deleted_at: datetime
+    ) -> Dict[str, Any]:
+        """Delete a note owned by ``user_id`` and return the removed document
+
+        Raises like update_owned.
+        """
+        ...
+
+    async def apply_writes(self, writes: List[NoteWrite]) -> None:
+        """Apply creates, updates and deletes in order, batching round trips
+
+        Raises PartialWriteError if it fails after some writes were stored.
+        """
+        ...
+
+    async def list_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return up to ``limit`` of a user's notes, newest first
+
+        Listing resumes strictly after ``cursor`` when given. The second
+        element of the result tells whether more notes follow.
+        """
+        ...
+
+    async def list_summaries_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Like list_by_user, but without loading full note content
+
+        Documents carry ``snippet`` (the first SNIPPET_LENGTH characters of
+        the content) and ``content_length`` in place of ``content``.
+        """
+        ...
+
+    def iter_by_user(
+        self, user_id: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every note of a user, newest first
+
+        At most ``batch_size`` documents are held in memory at a time, so a
+        full export does not grow with the collection.
+        """
+        ...
+
+    async def list_changes(
+        self, user_id: str, limit: int, since: Optional[ChangeCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return up to ``limit`` notes and tombstones changed after ``since``
+
+        Changes are ordered by ``(updated_at, id)``, oldest first. Tombstones
+        are only included when ``since`` is given, since a client syncing from
+        scratch has nothing to delete. The second element of the result tells
+        whether more changes follow.
+        """
+        ...
+
+    async def ping(self) -> None:
+        """Make a cheap round trip to storage, opening its connections"""
+        ...
+
+    async def close(self) -> None:
+        """Release any resources held by the backend"""
+        ...
@@ -0,0 +1,354 @@
+import logging
+import os
+import shutil
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from ..core.concurrency import run_blocking
+from ..core.metrics import observe_storage
+from .base import (
+    ChangeCursor,
+    NotesRepository,
+    NoteWrite,
+    PageCursor,
+    PartialWriteError,
+    SNIPPET_LENGTH,
+    STREAM_BATCH_SIZE,
+    content_exceeds,
+)
+
+logger = logging.getLogger(__name__)
+
+# zlib level for stored bodies; text gains little from higher levels
+COMPRESSION_LEVEL = 6
+
+
+class ContentStore(Protocol):
+    """Blob storage for note bodies kept outside the note documents
+
+    Each note can have several versions of its body, each under its own
+    key, so a new body is stored before the document points at it.
+    """
+
+    async def put(self, note_id: str, key: str, data: bytes) -> None:
+        """Store one version of a note's compressed body"""
+        ...
+
+    async def get(self, note_id: str, key: str) -> Optional[bytes]:
+        """Return a stored version, or None if it does not exist"""
+        ...
+
+    async def delete(self, note_id: str, key: Optional[str] = None) -> None:
+        """Remove one version, or every version of the note without ``key``"""
+        ...
+
+
+class LocalContentStore:
+    """ContentStore on the local filesystem, one directory per note"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, note_id: str, key: Optional[str] = None) -> Path:
+        for part in (note_id, key):
+            if part is not None and (not part or os.sep in part or part[0] == "."):
+                raise ValueError(f"Invalid content path component: {part!r}")
+        path = self.root / note_id
+        return path / key if key is not None else path
+
+    async def put(self, note_id: str, key: str, data: bytes) -> None:
+        path = self._path(note_id, key)
+
+        def write():
+            with observe_storage("local_content", "put"):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_name(f".{key}.tmp")
+                temporary.write_bytes(data)
+                os.replace(temporary, path)
+
+        await run_blocking(write)
+
+    async def get(self, note_id: str, key: str) -> Optional[bytes]:
+        path = self._path(note_id, key)
+
+        def read() -> Optional[bytes]:
+            with observe_storage("local_content", "get"):
+                try:
+                    return path.read_bytes()
+                except FileNotFoundError:
+                    return None
+
+        return await run_blocking(read)
+
+    async def delete(self, note_id: str, key: Optional[str] = None) -> None:
+        path = self._path(note_id, key)
+
+        def remove():
+            with observe_storage("local_content", "delete"):
+                if key is None:
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
+
+        await run_blocking(remove)
+
+
+def _compress(content: str) -> bytes:
+    return zlib.compress(content.encode("utf-8", "surrogatepass"), COMPRESSION_LEVEL)
+
+
+def _decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8", "surrogatepass")
+
+
+def _preview(note: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark an offloaded note whose content is only the stored preview"""
+    if note.get("content_offloaded"):
+        return {**note, "content_truncated": True}
+    return note
+
+
+class OffloadingNotesRepository:
+    """Stores note bodies above ``inline_max_bytes`` in a ContentStore
+
+    The note document keeps the first SNIPPET_LENGTH characters as its
+    content, plus ``content_length``, ``content_key`` and
+    ``content_offloaded``, so listings stay small. get() and
+    iter_by_user() load full bodies. Other reads return the preview with
+    ``content_truncated`` set.
+    """
+
+    def __init__(
+        self, inner: NotesRepository, store: ContentStore, inline_max_bytes: int
+    ):
+        self.inner = inner
+        self.store = store
+        self.inline_max_bytes = inline_max_bytes
+
+    def __getattr__(self, name: str):
+        # Backend-specific extras
+        return getattr(self.inner, name)
+
+    async def _offload(
+        self, note_id: str, fields: Dict[str, Any], update: bool
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Move large content out of ``fields``, returning them and its new key"""
+        content = fields.get("content")
+        if content is None:
+            return fields, None
+        if not content_exceeds(content, self.inline_max_bytes):
+            # A previous body is left to be removed with the note, or
+            # replaced by the next large one, to avoid a read per update
+            return ({**fields, "content_offloaded": False} if update else fields), None
+
+        key = uuid.uuid4().hex
+        await self.store.put(note_id, key, await run_blocking(_compress, content))
+        return {
+            **fields,
+            "content": content[:SNIPPET_LENGTH],
+            "content_length": len(content),
+            "content_key": key,
+            "content_offloaded": True,
+        }, key
+
+    async def _load(self, note: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The note with its full body, fetched from the store if offloaded"""
+        if note is None or not note.get("content_offloaded"):
+            return note
+        data = await self.store.get(note["id"], note["content_key"])
+        if data is None:
+            logger.warning("Body of note %s is missing from content store", note["id"])
+            return _preview(note)
+        return self._with_content(note, await run_blocking(_decompress, data))
+
+    @staticmethod
+    def _with_content(note: Dict[str, Any], content: str) -> Dict[str, Any]:
+        loaded = {
+            key: value
+            for key, value in note.items()
+            if key not in ("content_key", "content_offloaded")
+        }
+        loaded["content"] = content
+        loaded["content_length"] = len(content)
+        return loaded
+
+    async def _discard(self, keys: List[Tuple[str, str]]):
+        for note_id, key in keys:
+            try:
+                await self.store.delete(note_id, key)
+            except Exception as e:
+                logger.warning(
+                    "Removing body %s of note %s failed: %s", key, note_id, e
+                )
+
+    async def _old_keys(self, note_ids: List[str]) -> List[Tuple[str, str]]:
+        """Current body keys of notes about to get a new large body"""
+        if not note_ids:
+            return []
+        notes = await self.inner.get_many(note_ids)
+        return [
+            (note["id"], note["content_key"])
+            for note in notes
+            if note.get("content_key")
+        ]
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        note, key = await self._offload(note["id"], note, update=False)
+        try:
+            await self.inner.create(note)
+        except BaseException:
+            if key is not None:
+                await self._discard([(note["id"], key)])
+            raise
+
+    async def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        return await self._load(await self.inner.get(note_id))
+
+    async def get_many(self, note_ids: List[str]) -> List[Dict[str, Any]]:
+        return [_preview(note) for note in await self.inner.get_many(note_ids)]
+
+    async def update(self, note_id: str, fields: Dict[str, Any]) -> None:
+        await self.apply_writes([("update", note_id, fields)])
+
+    async def delete(self, note_id: str, user_id: str, deleted_at: datetime) -> None:
+        await self.inner.delete(note_id, user_id, deleted_at)
+        await self.store.delete(note_id)
+
+    async def update_owned(
+        self,
+        note_id: str,
+        user_id: str,
+        fields: Dict[str, Any],
+        expected_updated_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        large = content_exceeds(fields.get("content"), self.inline_max_bytes)
+        old_keys = await self._old_keys([note_id]) if large else []
+        stored, key = await self._offload(note_id, fields, update=True)
+        try:
+            merged = await self.inner.update_owned(
+                note_id, user_id, stored, expected_updated_at
+            )
+        except BaseException:
+            if key is not None:
+                await self._discard([(note_id, key)])
+            raise
+        await self._discard(old_keys)
+
+        if "content" in fields:
+            return self._with_content(merged, fields["content"])
+        return await self._load(merged)
+
+    async def delete_owned(
+        self, note_id: str, user_id: str, deleted_at: datetime
+    ) -> Dict[str, Any]:
+        removed = await self.inner.delete_owned(note_id, user_id, deleted_at)
+        if removed.get("content_key"):
+            await self.store.delete(note_id)
+        return removed
+
+    async def apply_writes(self, writes: List[NoteWrite]) -> None:
+        old_keys = await self._old_keys(
+            list(
+                {
+                    note_id
+                    for kind, note_id, data in writes
+                    if kind == "update"
+                    and content_exceeds(data.get("content"), self.inline_max_bytes)
+                }
+            )
+        )
+
+        prepared: List[NoteWrite] = []
+        new_keys: Dict[str, List[str]] = defaultdict(list)
+        # Body key stored by each prepared write, if any
+        write_keys: List[Tuple[int, str, str]] = []
+        try:
+            for kind, note_id, data in writes:
+                if kind != "delete":
+                    data, key = await self._offload(note_id, data, kind == "update")
+                    if key is not None:
+                        new_keys[note_id].append(key)
+                        write_keys.append((len(prepared), note_id, key))
+                prepared.append((kind, note_id, data))
+            await self.inner.apply_writes(prepared)
+        except PartialWriteError as e:
+            # Stored notes may point at their new bodies. Bodies they
+            # replaced are left to be removed with the note.
+            await self._discard(
+                [(note_id, key) for i, note_id, key in write_keys if i >= e.applied]
+            )
+            raise
+        except BaseException:
+            await self._discard(
+                [(note_id, key) for note_id, keys in new_keys.items() for key in keys]
+            )
+            raise
+
+        # Bodies replaced within the batch or by it, and those of deleted notes
+        superseded = old_keys + [
+            (note_id, key) for note_id, keys in new_keys.items() for key in keys[:-1]
+        ]
+        await self._discard(superseded)
+        for kind, note_id, _ in writes:
+            if kind == "delete":
+                await self.store.delete(note_id)
+
+    async def list_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        notes, has_more = await self.inner.list_by_user(user_id, limit, cursor)
+        return [_preview(note) for note in notes], has_more
+
+    async def list_summaries_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        return await self.inner.list_summaries_by_user(user_id, limit, cursor)
+
+    async def iter_by_user(
+        self, user_id: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # Exports and the search index need whole bodies
+        async for note in self.inner.iter_by_user(user_id, batch_size):
+            yield await self._load(note)
+
+    async def list_changes(
+        self, user_id: str, limit: int, since: Optional[ChangeCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        changes, has_more = await self.inner.list_changes(user_id, limit, since)
+        return [_preview(change) for change in changes], has_more
+
+    def watch_user(
+        self, user_id: str, on_change: Callable[[str, Dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """The inner backend's listener, with offloaded notes marked as previews
+
+        Bodies are not loaded: the listener runs on the backend's thread,
+        and stream clients fetch the note when they need all of it.
+        """
+        watch_user = getattr(self.inner, "watch_user", None)
+        if watch_user is None:
+            raise ValueError("The storage backend cannot watch for changes")
+
+        def on_inner_change(kind: str, note: Dict[str, Any]):
+            on_change(kind, note if kind == "deleted" else _preview(note))
+
+        return watch_user(user_id, on_inner_change)
+
+    async def ping(self) -> None:
+        await self.inner.ping()
+
+    async def close(self) -> None:
+        await self.inner.close()
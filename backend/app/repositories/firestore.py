@@ -0,0 +1,419 @@
+from firebase_admin import firestore
+from google.api_core import exceptions as google_exceptions
+from google.cloud.firestore_v1.field_path import FieldPath
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from ..core.concurrency import run_blocking
+from ..core.metrics import observe_storage
+from .base import (
+    ChangeCursor,
+    NoteAccessDeniedError,
+    NoteConflictError,
+    NoteNotFoundError,
+    NoteWrite,
+    PageCursor,
+    PartialWriteError,
+    STREAM_BATCH_SIZE,
+    merge_changes,
+    summarize_note,
+)
+
+# Maximum number of writes Firestore accepts in a single batch commit
+MAX_BATCH_WRITES = 500
+
+# Fields read by list_summaries_by_user; content itself is never fetched
+SUMMARY_FIELDS = [
+    "id",
+    "user_id",
+    "title",
+    "snippet",
+    "content_length",
+    "created_at",
+    "updated_at",
+]
+
+# Attempts at a conditional write before giving up on a contended document
+MAX_CONDITIONAL_WRITE_ATTEMPTS = 3
+
+
+def _with_summary_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Denormalize the snippet and content length next to the content
+
+    Storing them on the document lets summary listings use a field mask
+    instead of downloading every note body.
+    """
+    if "content" not in data:
+        return data
+    summary = summarize_note(data)
+    return {
+        **data,
+        "snippet": summary["snippet"],
+        "content_length": summary["content_length"],
+    }
+
+
+def _summary_of(note: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize a full document down to the fields a masked query returns"""
+    summary = summarize_note(note)
+    return {field: summary[field] for field in SUMMARY_FIELDS if field in summary}
+
+
+class FirestoreContentStore:
+    """ContentStore keeping each body version in its own Firestore document
+
+    Versions live under ``<collection>/<note_id>/versions`` so that a
+    note's bodies can be listed and removed together.
+    """
+
+    def __init__(self, db, collection: str = "note_contents"):
+        self.db = db
+        self.collection = collection
+
+    def _versions(self, note_id: str):
+        return (
+            self.db.collection(self.collection).document(note_id).collection("versions")
+        )
+
+    async def _call(self, operation: str, func, *args):
+        def timed():
+            with observe_storage("firestore_content", operation):
+                return func(*args)
+
+        return await run_blocking(timed)
+
+    async def put(self, note_id: str, key: str, data: bytes) -> None:
+        await self._call(
+            "set", self._versions(note_id).document(key).set, {"data": data}
+        )
+
+    async def get(self, note_id: str, key: str) -> Optional[bytes]:
+        doc = await self._call("get", self._versions(note_id).document(key).get)
+        return doc.to_dict()["data"] if doc.exists else None
+
+    async def delete(self, note_id: str, key: Optional[str] = None) -> None:
+        if key is not None:
+            await self._call("delete", self._versions(note_id).document(key).delete)
+            return
+
+        def delete_all():
+            batch = self.db.batch()
+            for ref in self._versions(note_id).list_documents():
+                batch.delete(ref)
+            batch.commit()
+
+        await self._call("delete_all", delete_all)
+
+
+class FirestoreNotesRepository:
+    """Cloud Firestore storage, with blocking SDK calls run off the event loop"""
+
+    def __init__(
+        self,
+        db,
+        collection: str = "notes",
+        tombstone_collection: str = "note_tombstones",
+    ):
+        self.db = db
+        self.collection = collection
+        self.tombstone_collection = tombstone_collection
+
+    async def _call(self, operation: str, func, *args):
+        """Run a blocking SDK call in the storage pool, recording its latency"""
+
+        def timed():
+            with observe_storage("firestore", operation):
+                return func(*args)
+
+        return await run_blocking(timed)
+
+    def _document(self, note_id: str):
+        return self.db.collection(self.collection).document(note_id)
+
+    def _tombstone(self, note_id: str):
+        return self.db.collection(self.tombstone_collection).document(note_id)
+
+    def _add_delete(
+        self,
+        batch,
+        note_id: str,
+        user_id: str,
+        deleted_at: datetime,
+        option=None,
+    ):
+        """Queue a note deletion and its tombstone on a write batch"""
+        if option is None:
+            batch.delete(self._document(note_id))
+        else:
+            batch.delete(self._document(note_id), option=option)
+        batch.set(
+            self._tombstone(note_id),
+            {
+                "id": note_id,
+                "user_id": user_id,
+                "updated_at": deleted_at,
+                "deleted": True,
+            },
+        )
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        await self._call(
+            "set", self._document(note["id"]).set, _with_summary_fields(note)
+        )
+
+    async def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self._call("get", self._document(note_id).get)
+        return doc.to_dict() if doc.exists else None
+
+    async def get_many(self, note_ids: List[str]) -> List[Dict[str, Any]]:
+        if not note_ids:
+            return []
+
+        # Fetch every document in a single round trip
+        refs = [self._document(note_id) for note_id in note_ids]
+        docs = await self._call("get_all", lambda: list(self.db.get_all(refs)))
+        return [doc.to_dict() for doc in docs if doc.exists]
+
+    async def update(self, note_id: str, fields: Dict[str, Any]) -> None:
+        await self._call(
+            "update", self._document(note_id).update, _with_summary_fields(fields)
+        )
+
+    async def delete(self, note_id: str, user_id: str, deleted_at: datetime) -> None:
+        batch = self.db.batch()
+        self._add_delete(batch, note_id, user_id, deleted_at)
+        await self._call("commit", batch.commit)
+
+    def _write_owned(
+        self, note_id: str, user_id: str, operation: str, write
+    ) -> Dict[str, Any]:
+        """Read a note once, check ownership, then write it conditionally
+
+        The write carries a last-update-time precondition instead of being
+        followed by another read, so it costs two round trips and fails
+        safely if the note changed in between. Firestore preconditions
+        cover only existence and update time, not field values, so the
+        ownership check cannot be folded into the write itself.
+        """
+        doc_ref = self._document(note_id)
+        for attempt in range(MAX_CONDITIONAL_WRITE_ATTEMPTS):
+            with observe_storage("firestore", "get"):
+                doc = doc_ref.get()
+            if not doc.exists:
+                raise NoteNotFoundError(note_id)
+
+            note = doc.to_dict()
+            if note["user_id"] != user_id:
+                raise NoteAccessDeniedError(note_id)
+
+            option = self.db.write_option(last_update_time=doc.update_time)
+            try:
+                with observe_storage("firestore", operation):
+                    return write(doc_ref, note, option)
+            except google_exceptions.FailedPrecondition:
+                if attempt == MAX_CONDITIONAL_WRITE_ATTEMPTS - 1:
+                    raise
+
+    async def update_owned(
+        self,
+        note_id: str,
+        user_id: str,
+        fields: Dict[str, Any],
+        expected_updated_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        data = _with_summary_fields(fields)
+
+        def write(doc_ref, note, option):
+            if expected_updated_at is not None:
+                # Firestore returns timezone-aware timestamps
+                stored = note["updated_at"].astimezone(timezone.utc)
+                if stored.replace(tzinfo=None) != expected_updated_at:
+                    raise NoteConflictError(note_id)
+            doc_ref.update(data, option=option)
+            return {**note, **data}
+
+        return await run_blocking(self._write_owned, note_id, user_id, "update", write)
+
+    async def delete_owned(
+        self, note_id: str, user_id: str, deleted_at: datetime
+    ) -> Dict[str, Any]:
+        def write(doc_ref, note, option):
+            batch = self.db.batch()
+            self._add_delete(batch, note_id, user_id, deleted_at, option)
+            batch.commit()
+            return note
+
+        return await run_blocking(self._write_owned, note_id, user_id, "commit", write)
+
+    async def apply_writes(self, writes: List[NoteWrite]) -> None:
+        batch = self.db.batch()
+        pending = 0
+        # Writes in the batches committed so far
+        committed = 0
+        for index, (kind, note_id, data) in enumerate(writes):
+            # A delete also writes its tombstone, so it takes two slots
+            size = 2 if kind == "delete" else 1
+            if pending + size > MAX_BATCH_WRITES:
+                await self._commit(batch, committed)
+                committed = index
+                batch = self.db.batch()
+                pending = 0
+
+            if kind == "create":
+                batch.set(self._document(note_id), _with_summary_fields(data))
+            elif kind == "update":
+                batch.update(self._document(note_id), _with_summary_fields(data))
+            else:
+                self._add_delete(batch, note_id, data["user_id"], data["deleted_at"])
+            pending += size
+
+        if pending:
+            await self._commit(batch, committed)
+
+    async def _commit(self, batch, committed: int):
+        """Commit one chunk of apply_writes(), after ``committed`` writes"""
+        try:
+            await self._call("commit", batch.commit)
+        except Exception as e:
+            if committed:
+                raise PartialWriteError(committed, e) from e
+            raise
+
+    def _user_query(self, user_id: str):
+        query = self.db.collection(self.collection).where("user_id", "==", user_id)
+
+        # Order by creation date (newest first), ties broken by ID
+        return query.order_by(
+            "created_at", direction=firestore.Query.DESCENDING
+        ).order_by(FieldPath.document_id(), direction=firestore.Query.DESCENDING)
+
+    def _page_query(self, user_id: str, limit: int, cursor: Optional[PageCursor]):
+        query = self._user_query(user_id)
+
+        if cursor:
+            created_at, note_id = cursor
+            query = query.start_after({"created_at": created_at, "__name__": note_id})
+
+        # Fetch one extra document to know whether another page exists
+        return query.limit(limit + 1)
+
+    async def list_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        query = self._page_query(user_id, limit, cursor)
+        docs = await self._call("query", query.get)
+        notes = [doc.to_dict() for doc in docs]
+        return notes[:limit], len(notes) > limit
+
+    async def list_summaries_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        query = self._page_query(user_id, limit, cursor).select(SUMMARY_FIELDS)
+        docs = await self._call("query", query.get)
+
+        summaries = [doc.to_dict() for doc in docs]
+        page = summaries[:limit]
+
+        # Notes written before summaries existed lack the denormalized
+        # fields; compute them from the full documents, in one round trip
+        legacy_ids = [summary["id"] for summary in page if "snippet" not in summary]
+        if legacy_ids:
+            full = {note["id"]: note for note in await self.get_many(legacy_ids)}
+            page = [
+                _summary_of(full[summary["id"]]) if summary["id"] in full else summary
+                for summary in page
+            ]
+        return page, len(summaries) > limit
+
+    async def iter_by_user(
+        self, user_id: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # One streamed query, drained a batch at a time in the storage pool
+        stream = self._user_query(user_id).stream()
+
+        def next_batch() -> List[Dict[str, Any]]:
+            with observe_storage("firestore", "stream"):
+                return [doc.to_dict() for doc in islice(stream, batch_size)]
+
+        try:
+            while True:
+                notes = await run_blocking(next_batch)
+                for note in notes:
+                    yield note
+                if len(notes) < batch_size:
+                    return
+        finally:
+            await run_blocking(stream.close)
+
+    def _changes_query(
+        self, collection: str, user_id: str, limit: int, since: Optional[ChangeCursor]
+    ):
+        query = (
+            self.db.collection(collection)
+            .where("user_id", "==", user_id)
+            .order_by("updated_at")
+            .order_by(FieldPath.document_id())
+        )
+        if since:
+            updated_at, note_id = since
+            if note_id:
+                query = query.start_after(
+                    {"updated_at": updated_at, "__name__": note_id}
+                )
+            else:
+                # A plain timestamp cursor: everything updated strictly after it
+                query = query.start_after({"updated_at": updated_at})
+        return query.limit(limit + 1)
+
+    async def list_changes(
+        self, user_id: str, limit: int, since: Optional[ChangeCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        notes_query = self._changes_query(self.collection, user_id, limit, since)
+        notes = [doc.to_dict() for doc in await self._call("query", notes_query.get)]
+
+        tombstones = []
+        if since:
+            tombstones_query = self._changes_query(
+                self.tombstone_collection, user_id, limit, since
+            )
+            tombstones = [
+                doc.to_dict() for doc in await self._call("query", tombstones_query.get)
+            ]
+        return merge_changes(notes, tombstones, limit)
+
+    def watch_user(
+        self, user_id: str, on_change: Callable[[str, Dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """Report changes to a user's notes as they happen, from any writer
+
+        ``on_change(kind, note)`` is called from the listener's thread with
+        kind "created", "updated" or "deleted"; deletions pass the note's id
+        and ``deleted_at``. Returns a function that stops the listener.
+        """
+        initial = True
+
+        def on_snapshot(docs, changes, read_time):
+            nonlocal initial
+            if initial:
+                # The first snapshot lists every existing note
+                initial = False
+                return
+            for change in changes:
+                note = change.document.to_dict()
+                if change.type.name == "REMOVED":
+                    on_change("deleted", {"id": note["id"], "deleted_at": read_time})
+                elif change.type.name == "ADDED":
+                    on_change("created", note)
+                else:
+                    on_change("updated", note)
+
+        query = self.db.collection(self.collection).where("user_id", "==", user_id)
+        return query.on_snapshot(on_snapshot).unsubscribe
+
+    async def ping(self) -> None:
+        # Reading a missing document opens the gRPC channel for one read
+        await self._call("get", self._document("__ping__").get)
+
+    async def close(self) -> None:
+        pass
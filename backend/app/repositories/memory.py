@@ -0,0 +1,282 @@
+import sys
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .base import (
+    ChangeCursor,
+    NoteAccessDeniedError,
+    NoteConflictError,
+    NoteNotFoundError,
+    NoteWrite,
+    PageCursor,
+    PartialWriteError,
+    STREAM_BATCH_SIZE,
+    iter_pages,
+    merge_changes,
+    summarize_note,
+)
+
+# Keys are (microseconds since the epoch, note ID)
+Key = Tuple[int, str]
+Index = Dict[str, List[Key]]
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_micros(value: datetime) -> int:
+    """A UTC timestamp as integer microseconds since the epoch"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    """The naive UTC datetime the service stores, from _to_micros()"""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _cursor_key(cursor: Tuple[datetime, str]) -> Key:
+    return _to_micros(cursor[0]), cursor[1]
+
+
+class NoteRecord:
+    """Compact stored form of a note
+
+    A dict per note costs several times its text. Records keep only the
+    field values: the owner's ID interned so a user's notes share it, and
+    timestamps as integers. Fields added by wrappers such as the content
+    store go to ``extra``. Reads build a fresh dict, so callers never
+    share state with the store.
+    """
+
+    __slots__ = ("id", "user_id", "title", "content", "created", "updated", "extra")
+
+    def __init__(self, note: Dict[str, Any]):
+        self.id = note["id"]
+        self.user_id = sys.intern(note["user_id"])
+        self.title = note["title"]
+        self.content = note["content"]
+        self.created = _to_micros(note["created_at"])
+        self.updated = _to_micros(note["updated_at"])
+        self.extra: Optional[Dict[str, Any]] = {
+            key: value for key, value in note.items() if key not in _RECORD_FIELDS
+        } or None
+
+    def update(self, fields: Dict[str, Any]):
+        for key, value in fields.items():
+            if key == "title":
+                self.title = value
+            elif key == "content":
+                self.content = value
+            elif key == "updated_at":
+                self.updated = _to_micros(value)
+            elif key == "created_at":
+                self.created = _to_micros(value)
+            elif key not in _RECORD_FIELDS:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        note = {
+            "id": self.id,
+            "user_id": self.user_id,
+            "title": self.title,
+            "content": self.content,
+            "created_at": _from_micros(self.created),
+            "updated_at": _from_micros(self.updated),
+        }
+        if self.extra:
+            note.update(self.extra)
+        return note
+
+
+# Fields with their own slot; id and user_id never change
+_RECORD_FIELDS = frozenset(
+    ("id", "user_id", "title", "content", "created_at", "updated_at")
+)
+
+
+def _remove_key(indexes: Index, user_id: str, key: Key):
+    """Remove a key from a user's sorted index, dropping the index once empty"""
+    index = indexes.get(user_id)
+    if index is None:
+        return
+    position = bisect_left(index, key)
+    if position < len(index) and index[position] == key:
+        index.pop(position)
+    if not index:
+        del indexes[user_id]
+
+
+class InMemoryNotesRepository:
+    """Process-local storage used for development and tests
+
+    Notes are never scanned across users. Each user has sorted secondary
+    indexes, so a page costs a binary search plus the page itself,
+    O(log n + page size) in that user's note count, whatever the total.
+    Notes are kept as NoteRecords so load tests can hold millions.
+    """
+
+    def __init__(self):
+        self._notes: Dict[str, NoteRecord] = {}
+        # Deleted notes as (user_id, deleted_at in microseconds)
+        self._tombstones: Dict[str, Tuple[str, int]] = {}
+        # Per-user (created, note_id) keys kept sorted for pagination
+        self._user_index: Index = {}
+        # Per-user (updated, note_id) keys of live notes and of tombstones
+        self._change_index: Index = {}
+        self._tombstone_index: Index = {}
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        record = NoteRecord(note)
+        self._notes[record.id] = record
+        insort(
+            self._user_index.setdefault(record.user_id, []),
+            (record.created, record.id),
+        )
+        insort(
+            self._change_index.setdefault(record.user_id, []),
+            (record.updated, record.id),
+        )
+
+    async def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        record = self._notes.get(note_id)
+        return record.to_dict() if record is not None else None
+
+    async def get_many(self, note_ids: List[str]) -> List[Dict[str, Any]]:
+        return [self._notes[i].to_dict() for i in note_ids if i in self._notes]
+
+    async def update(self, note_id: str, fields: Dict[str, Any]) -> None:
+        record = self._notes[note_id]
+        _remove_key(self._change_index, record.user_id, (record.updated, note_id))
+        record.update(fields)
+        insort(
+            self._change_index.setdefault(record.user_id, []),
+            (record.updated, record.id),
+        )
+
+    async def delete(self, note_id: str, user_id: str, deleted_at: datetime) -> None:
+        record = self._notes.pop(note_id, None)
+        if record is None:
+            return
+
+        _remove_key(self._user_index, record.user_id, (record.created, note_id))
+        _remove_key(self._change_index, record.user_id, (record.updated, note_id))
+
+        deleted = _to_micros(deleted_at)
+        self._tombstones[record.id] = (record.user_id, deleted)
+        insort(
+            self._tombstone_index.setdefault(record.user_id, []),
+            (deleted, record.id),
+        )
+
+    def _owned(self, note_id: str, user_id: str) -> NoteRecord:
+        record = self._notes.get(note_id)
+        if record is None:
+            raise NoteNotFoundError(note_id)
+        if record.user_id != user_id:
+            raise NoteAccessDeniedError(note_id)
+        return record
+
+    async def update_owned(
+        self,
+        note_id: str,
+        user_id: str,
+        fields: Dict[str, Any],
+        expected_updated_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        record = self._owned(note_id, user_id)
+        if expected_updated_at is not None and record.updated != _to_micros(
+            expected_updated_at
+        ):
+            raise NoteConflictError(note_id)
+        await self.update(note_id, fields)
+        return record.to_dict()
+
+    async def delete_owned(
+        self, note_id: str, user_id: str, deleted_at: datetime
+    ) -> Dict[str, Any]:
+        note = self._owned(note_id, user_id).to_dict()
+        await self.delete(note_id, user_id, deleted_at)
+        return note
+
+    async def apply_writes(self, writes: List[NoteWrite]) -> None:
+        for index, (kind, note_id, data) in enumerate(writes):
+            try:
+                if kind == "create":
+                    await self.create(data)
+                elif kind == "update":
+                    await self.update(note_id, data)
+                else:
+                    await self.delete(note_id, data["user_id"], data["deleted_at"])
+            except Exception as e:
+                if index:
+                    raise PartialWriteError(index, e) from e
+                raise
+
+    async def list_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        # Walk the user's sorted index backwards from the cursor
+        index = self._user_index.get(user_id, [])
+        end = bisect_left(index, _cursor_key(cursor)) if cursor else len(index)
+        start = max(0, end - limit)
+
+        notes = [
+            self._notes[note_id].to_dict() for _, note_id in reversed(index[start:end])
+        ]
+        return notes, start > 0
+
+    async def list_summaries_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        notes, has_more = await self.list_by_user(user_id, limit, cursor)
+        return [summarize_note(note) for note in notes], has_more
+
+    def iter_by_user(
+        self, user_id: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return iter_pages(self, user_id, batch_size)
+
+    async def list_changes(
+        self, user_id: str, limit: int, since: Optional[ChangeCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        since_key = _cursor_key(since) if since else None
+        if since_key and not since_key[1]:
+            # A plain timestamp has no tie-breaker: skip every key at it
+            since_key = (since_key[0] + 1, "")
+
+        def after(index: List[Key]) -> List[str]:
+            if since_key is None:
+                start = 0
+            elif since_key[1]:
+                start = bisect_right(index, since_key)
+            else:
+                start = bisect_left(index, since_key)
+            return [note_id for _, note_id in index[start : start + limit + 1]]
+
+        notes = [
+            self._notes[i].to_dict() for i in after(self._change_index.get(user_id, []))
+        ]
+        tombstones = []
+        if since_key is not None:
+            for note_id in after(self._tombstone_index.get(user_id, [])):
+                owner, deleted = self._tombstones[note_id]
+                tombstones.append(
+                    {
+                        "id": note_id,
+                        "user_id": owner,
+                        "updated_at": _from_micros(deleted),
+                        "deleted": True,
+                    }
+                )
+        return merge_changes(notes, tombstones, limit)
+
+    async def ping(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
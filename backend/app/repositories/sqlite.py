@@ -0,0 +1,415 @@
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from ..core.concurrency import run_blocking
+from ..core.metrics import observe_storage
+from .base import (
+    ChangeCursor,
+    NoteAccessDeniedError,
+    NoteConflictError,
+    NoteNotFoundError,
+    NoteWrite,
+    PageCursor,
+    SNIPPET_LENGTH,
+    STREAM_BATCH_SIZE,
+    iter_pages,
+    merge_changes,
+)
+
+T = TypeVar("T")
+
+_EPOCH = datetime(1970, 1, 1)
+_COLUMNS = ("id", "user_id", "title", "content", "created_at", "updated_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_user_created
+    ON notes (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_notes_user_updated
+    ON notes (user_id, updated_at, id);
+CREATE TABLE IF NOT EXISTS note_tombstones (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_note_tombstones_user_updated
+    ON note_tombstones (user_id, updated_at, id);
+"""
+
+
+def _to_micros(value: datetime) -> int:
+    """Convert a UTC datetime to integer microseconds since the epoch"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def _row_to_tombstone(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "updated_at": _from_micros(row[2]),
+        "deleted": True,
+    }
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _row_to_note(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    note = dict(zip(_COLUMNS, row))
+    note["created_at"] = _from_micros(note["created_at"])
+    note["updated_at"] = _from_micros(note["updated_at"])
+    return note
+
+
+class SQLiteNotesRepository:
+    """Local SQLite storage in WAL mode with a small connection pool
+
+    Timestamps are stored as integer microseconds so that the composite
+    ``(user_id, created_at, id)`` index serves paginated listing directly.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._connections: List[sqlite3.Connection] = []
+
+        for _ in range(max(1, pool_size)):
+            connection = self._connect()
+            self._connections.append(connection)
+            self._pool.put(connection)
+
+        with self._connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    async def _run(self, operation: str, func: Callable[[sqlite3.Connection], T]) -> T:
+        def call() -> T:
+            with self._connection() as connection:
+                with observe_storage("sqlite", operation):
+                    return func(connection)
+
+        return await run_blocking(call)
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, note: Dict[str, Any]):
+        connection.execute(
+            "INSERT INTO notes (id, user_id, title, content, created_at,"
+            " updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                note["id"],
+                note["user_id"],
+                note["title"],
+                note["content"],
+                _to_micros(note["created_at"]),
+                _to_micros(note["updated_at"]),
+            ),
+        )
+
+    @staticmethod
+    def _update(connection: sqlite3.Connection, note_id: str, fields: Dict[str, Any]):
+        values = {
+            key: _to_micros(value) if isinstance(value, datetime) else value
+            for key, value in fields.items()
+            if key in ("title", "content", "updated_at")
+        }
+        if not values:
+            return
+
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        connection.execute(
+            f"UPDATE notes SET {assignments} WHERE id = ?",
+            (*values.values(), note_id),
+        )
+
+    @staticmethod
+    def _delete(
+        connection: sqlite3.Connection,
+        note_id: str,
+        user_id: str,
+        deleted_at: datetime,
+    ):
+        connection.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+        connection.execute(
+            "INSERT OR REPLACE INTO note_tombstones (id, user_id, updated_at)"
+            " VALUES (?, ?, ?)",
+            (note_id, user_id, _to_micros(deleted_at)),
+        )
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        await self._run("create", lambda c: self._insert(c, note))
+
+    async def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(
+            "get",
+            lambda c: c.execute(
+                "SELECT id, user_id, title, content, created_at, updated_at"
+                " FROM notes WHERE id = ?",
+                (note_id,),
+            ).fetchone(),
+        )
+        return _row_to_note(row) if row is not None else None
+
+    async def get_many(self, note_ids: List[str]) -> List[Dict[str, Any]]:
+        if not note_ids:
+            return []
+
+        placeholders = ", ".join("?" for _ in note_ids)
+        rows = await self._run(
+            "get_many",
+            lambda c: c.execute(
+                "SELECT id, user_id, title, content, created_at, updated_at"
+                f" FROM notes WHERE id IN ({placeholders})",
+                list(note_ids),
+            ).fetchall(),
+        )
+        return [_row_to_note(row) for row in rows]
+
+    async def update(self, note_id: str, fields: Dict[str, Any]) -> None:
+        await self._run("update", lambda c: self._update(c, note_id, fields))
+
+    async def delete(self, note_id: str, user_id: str, deleted_at: datetime) -> None:
+        def delete(connection: sqlite3.Connection):
+            with _transaction(connection):
+                self._delete(connection, note_id, user_id, deleted_at)
+
+        await self._run("delete", delete)
+
+    @staticmethod
+    def _missing_or_denied(
+        connection: sqlite3.Connection, note_id: str, user_id: Optional[str] = None
+    ):
+        """Raise the right error after an ownership-scoped statement matched nothing
+
+        Given ``user_id``, a note that exists and is owned by that user
+        means a version precondition failed instead.
+        """
+        row = connection.execute(
+            "SELECT user_id FROM notes WHERE id = ?", (note_id,)
+        ).fetchone()
+        if row is None:
+            raise NoteNotFoundError(note_id)
+        if row[0] == user_id:
+            raise NoteConflictError(note_id)
+        raise NoteAccessDeniedError(note_id)
+
+    async def update_owned(
+        self,
+        note_id: str,
+        user_id: str,
+        fields: Dict[str, Any],
+        expected_updated_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        values = {
+            key: _to_micros(value) if isinstance(value, datetime) else value
+            for key, value in fields.items()
+            if key in ("title", "content", "updated_at")
+        }
+        assignments = ", ".join(f"{key} = ?" for key in values) or "id = id"
+        condition = "id = ? AND user_id = ?"
+        params = [*values.values(), note_id, user_id]
+        if expected_updated_at is not None:
+            condition += " AND updated_at = ?"
+            params.append(_to_micros(expected_updated_at))
+
+        def update(connection: sqlite3.Connection) -> Dict[str, Any]:
+            row = connection.execute(
+                f"UPDATE notes SET {assignments} WHERE {condition}"
+                " RETURNING id, user_id, title, content, created_at, updated_at",
+                params,
+            ).fetchone()
+            if row is None:
+                self._missing_or_denied(connection, note_id, user_id)
+            return _row_to_note(row)
+
+        return await self._run("update_owned", update)
+
+    async def delete_owned(
+        self, note_id: str, user_id: str, deleted_at: datetime
+    ) -> Dict[str, Any]:
+        def delete(connection: sqlite3.Connection) -> Dict[str, Any]:
+            with _transaction(connection):
+                row = connection.execute(
+                    "DELETE FROM notes WHERE id = ? AND user_id = ?"
+                    " RETURNING id, user_id, title, content, created_at, updated_at",
+                    (note_id, user_id),
+                ).fetchone()
+                if row is None:
+                    self._missing_or_denied(connection, note_id)
+                self._delete(connection, note_id, user_id, deleted_at)
+            return _row_to_note(row)
+
+        return await self._run("delete_owned", delete)
+
+    async def apply_writes(self, writes: List[NoteWrite]) -> None:
+        def apply(connection: sqlite3.Connection):
+            # One transaction, so a batch costs a single WAL commit
+            with _transaction(connection):
+                for kind, note_id, data in writes:
+                    if kind == "create":
+                        self._insert(connection, data)
+                    elif kind == "update":
+                        self._update(connection, note_id, data)
+                    else:
+                        self._delete(
+                            connection, note_id, data["user_id"], data["deleted_at"]
+                        )
+
+        await self._run("apply_writes", apply)
+
+    async def _list_page(
+        self,
+        operation: str,
+        columns: str,
+        user_id: str,
+        limit: int,
+        cursor: Optional[PageCursor],
+    ) -> List[Tuple[Any, ...]]:
+        sql = f"SELECT {columns} FROM notes WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        if cursor:
+            sql += " AND (created_at, id) < (?, ?)"
+            params.extend([_to_micros(cursor[0]), cursor[1]])
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        return await self._run(operation, lambda c: c.execute(sql, params).fetchall())
+
+    async def list_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        rows = await self._list_page(
+            "list_by_user",
+            "id, user_id, title, content, created_at, updated_at",
+            user_id,
+            limit,
+            cursor,
+        )
+        notes = [_row_to_note(row) for row in rows]
+        return notes[:limit], len(notes) > limit
+
+    async def list_summaries_by_user(
+        self, user_id: str, limit: int, cursor: Optional[PageCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        # Snippet and length are computed by SQLite, so only the first
+        # characters of each body are copied into Python
+        rows = await self._list_page(
+            "list_summaries_by_user",
+            f"id, user_id, title, substr(content, 1, {SNIPPET_LENGTH}),"
+            " length(content), created_at, updated_at",
+            user_id,
+            limit,
+            cursor,
+        )
+        summaries = [
+            {
+                "id": row[0],
+                "user_id": row[1],
+                "title": row[2],
+                "snippet": row[3],
+                "content_length": row[4],
+                "created_at": _from_micros(row[5]),
+                "updated_at": _from_micros(row[6]),
+            }
+            for row in rows
+        ]
+        return summaries[:limit], len(summaries) > limit
+
+    def iter_by_user(
+        self, user_id: str, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return iter_pages(self, user_id, batch_size)
+
+    async def list_changes(
+        self, user_id: str, limit: int, since: Optional[ChangeCursor] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        condition = ""
+        params: List[Any] = [user_id]
+        if since and since[1]:
+            condition = " AND (updated_at, id) > (?, ?)"
+            params.extend([_to_micros(since[0]), since[1]])
+        elif since:
+            # A plain timestamp has no tie-breaker: strictly later only
+            condition = " AND updated_at > ?"
+            params.append(_to_micros(since[0]))
+        params.append(limit + 1)
+        order = " ORDER BY updated_at, id LIMIT ?"
+
+        def fetch(connection: sqlite3.Connection):
+            notes = connection.execute(
+                "SELECT id, user_id, title, content, created_at, updated_at"
+                " FROM notes WHERE user_id = ?" + condition + order,
+                params,
+            ).fetchall()
+            tombstones = []
+            if since:
+                tombstones = connection.execute(
+                    "SELECT id, user_id, updated_at FROM note_tombstones"
+                    " WHERE user_id = ?" + condition + order,
+                    params,
+                ).fetchall()
+            return notes, tombstones
+
+        notes, tombstones = await self._run("list_changes", fetch)
+        return merge_changes(
+            [_row_to_note(row) for row in notes],
+            [_row_to_tombstone(row) for row in tombstones],
+            limit,
+        )
+
+    async def ping(self) -> None:
+        await self._run("ping", lambda c: c.execute("SELECT 1").fetchone())
+
+    async def close(self) -> None:
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
@@ -0,0 +1,81 @@
+"""Production entry point: python -m app.server
+
+Runs several uvicorn worker processes with uvloop and httptools, without
+the reloader. Development keeps using run.py.
+"""
+
+import logging
+import os
+
+import uvicorn
+
+from .core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Containers limited with --cpus expose the quota in cgroup v2 cpu.max
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def uses_process_local_storage(settings) -> bool:
+    """Whether notes would live in each worker's memory rather than a shared store"""
+    backend = settings.storage_backend.lower()
+    if backend == "memory":
+        return True
+    # auto falls back to the in-memory store without a Firebase project
+    return backend == "auto" and settings.firebase_project_id in ("", "test-project")
+
+
+def main():
+    settings = get_settings()
+    workers = settings.workers or available_cpus()
+    if workers > 1 and uses_process_local_storage(settings):
+        # Each worker would hold its own notes, so users would see
+        # different data depending on the worker serving them
+        logging.basicConfig(level=logging.INFO)
+        logger.warning(
+            "The in-memory storage backend is per process; running 1 worker "
+            "instead of %d",
+            workers,
+        )
+        workers = 1
+    # Workers read their settings afresh; they need the resolved count,
+    # which decides whether a process-local note cache is safe
+    os.environ["WORKERS"] = str(workers)
+
+    # Workers are spawned fresh and import the app themselves; Firebase and
+    # storage clients are created in each worker's startup hook
+    uvicorn.run(
+        "app.main:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        reload=False,
+        timeout_keep_alive=settings.keep_alive_timeout,
+        backlog=settings.backlog,
+        timeout_graceful_shutdown=settings.graceful_shutdown_timeout,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from .firebase import initialize_firebase
-from .auth import verify_token
+from .auth import verify_token, token_cache
 from .notes import notes_service, NotesService
 
 __all__ = [
     "initialize_firebase",
     "verify_token",
+    "token_cache",
     "notes_service",
     "NotesService",
 ]
@@ -1,12 +1,57 @@
-from firebase_admin import auth
 from fastapi import HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+import hashlib
+import logging
+from functools import lru_cache
 from .firebase import initialize_firebase
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..core.metrics import TOKEN_VERIFICATION_DURATION, register_cache
+from ..core.profiling import timed_phase
 from ..models.common import ServiceResponse
+from .token_verifier import (
+    FirebaseTokenVerifier,
+    TokenExpiredError,
+    TokenVerificationError,
+)
+
+logger = logging.getLogger(__name__)
 
 # Security scheme - disable auto_error to handle 401 ourselves
 security = HTTPBearer(auto_error=False)
 
+# Decoded claims of verified tokens, keyed by token hash and expiring at "exp"
+token_cache = TTLCache(max_size=get_settings().token_cache_max_size)
+register_cache("token", token_cache.stats)
+
+
+@lru_cache()
+def get_token_verifier() -> FirebaseTokenVerifier:
+    """Local ID token verifier for the configured Firebase project"""
+    settings = get_settings()
+    return FirebaseTokenVerifier(
+        settings.firebase_project_id,
+        settings.auth_keys_url,
+        refresh_margin_seconds=settings.auth_keys_refresh_margin_seconds,
+    )
+
+
+async def _verify_id_token(token: str) -> dict:
+    if get_settings().auth_local_verification:
+        return await get_token_verifier().verify(token)
+
+    # Only needed when local verification is off
+    from firebase_admin import auth
+
+    try:
+        return await run_in_threadpool(auth.verify_id_token, token)
+    except auth.ExpiredIdTokenError as e:
+        raise TokenExpiredError(str(e)) from e
+    except auth.InvalidIdTokenError as e:
+        raise TokenVerificationError(str(e)) from e
+
 
 async def verify_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -14,6 +59,13 @@ async def verify_token(
     """
     Verify Firebase ID token and return user information
     """
+    with timed_phase("auth"):
+        return await _verify_credentials(credentials)
+
+
+async def _verify_credentials(
+    credentials: Optional[HTTPAuthorizationCredentials],
+) -> ServiceResponse[dict]:
     try:
         # Check if credentials are provided
         if credentials is None:
@@ -22,8 +74,6 @@ async def verify_token(
             )
 
         # Initialize Firebase if not already done
-        print("Verifying token:", credentials.credentials)
-
         firebase_app = initialize_firebase()
 
         # Check for development bypass token
@@ -58,27 +108,34 @@ async def verify_token(
                 data=user_data,
             )
 
-        # Verify the ID token
-        decoded_token = auth.verify_id_token(credentials.credentials)
+        # Reuse claims from an earlier verification of the same token
+        token_key = hashlib.sha256(credentials.credentials.encode()).hexdigest()
+        user_info = token_cache.get(token_key)
 
-        # Extract user information
-        user_info = {
-            "uid": decoded_token["uid"],
-            "email": decoded_token.get("email"),
-            "email_verified": decoded_token.get("email_verified", False),
-            "name": decoded_token.get("name"),
-            "picture": decoded_token.get("picture"),
-            "firebase": decoded_token,
-        }
+        if user_info is None:
+            # Verify the ID token off the event loop (RSA signature check)
+            with TOKEN_VERIFICATION_DURATION.time():
+                decoded_token = await _verify_id_token(credentials.credentials)
+
+            # Extract user information
+            user_info = {
+                "uid": decoded_token["uid"],
+                "email": decoded_token.get("email"),
+                "email_verified": decoded_token.get("email_verified", False),
+                "name": decoded_token.get("name"),
+                "picture": decoded_token.get("picture"),
+                "firebase": decoded_token,
+            }
+            token_cache.set(token_key, user_info, expires_at=decoded_token["exp"])
 
         return ServiceResponse(
             type=True, message="Token verified successfully", data=user_info
         )
 
-    except auth.InvalidIdTokenError:
-        return ServiceResponse(type=False, message="Invalid authentication token")
-    except auth.ExpiredIdTokenError:
+    except TokenExpiredError:
         return ServiceResponse(type=False, message="Authentication token has expired")
+    except TokenVerificationError:
+        return ServiceResponse(type=False, message="Invalid authentication token")
     except Exception as e:
-        print(f"Token verification failed: {str(e)}")
+        logger.warning("Token verification failed: %s", e)
         return ServiceResponse(type=False, message="Could not validate credentials")
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Protocol, Set
+
+from ..core.concurrency import run_blocking
+from ..repositories import NotesRepository
+
+logger = logging.getLogger(__name__)
+
+# Sent to a subscriber that fell too far behind, right before its stream ends
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+# Sent once the subscription is live; changes after it will be delivered
+READY_FRAME = b"event: ready\ndata: {}\n\n"
+
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+
+def sse_frame(event: str, data: str, event_id: Optional[str] = None) -> bytes:
+    """Render one server-sent event; ``data`` must be a single line"""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return (frame + f"data: {data}\n\n").encode()
+
+
+class ChangeSubscription:
+    """One open change stream: a bounded queue of pre-rendered events
+
+    Idle subscriptions hold no queue and no waiter, only these slots.
+    """
+
+    __slots__ = ("user_id", "max_queue", "overflowed", "_events", "_waiter")
+
+    def __init__(self, user_id: str, max_queue: int):
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.overflowed = False
+        self._events: Optional[Deque[bytes]] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, frame: bytes):
+        if self.overflowed:
+            return
+        if self._events is None:
+            self._events = deque()
+        if len(self._events) >= self.max_queue:
+            # A slow reader is cut off instead of buffering without bound;
+            # it catches up from the sync endpoint after the resync event
+            self.overflowed = True
+            self._events = None
+        else:
+            self._events.append(frame)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def next(self, timeout: float) -> Optional[bytes]:
+        """The next event, or None if there was none within ``timeout``"""
+        if not self._events and not self.overflowed:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiter = None
+
+        if self.overflowed:
+            return RESYNC_FRAME
+        frame = self._events.popleft()
+        if not self._events:
+            self._events = None
+        return frame
+
+
+class ChangeSource(Protocol):
+    """Feeds a hub with changes made outside this process"""
+
+    async def start(self, user_id: str) -> None:
+        """Begin publishing the user's changes"""
+        ...
+
+    async def stop(self, user_id: str) -> None:
+        """Stop publishing the user's changes"""
+        ...
+
+
+class RepositoryChangeSource:
+    """ChangeSource backed by a storage listener, such as Firestore on_snapshot
+
+    The repository calls back from its own thread with ``(kind, note)``;
+    changes are handed to ``publish`` on the event loop.
+    """
+
+    def __init__(
+        self,
+        get_repository: Callable[[], NotesRepository],
+        publish: Callable[[str, str, Dict[str, Any]], None],
+    ):
+        self._get_repository = get_repository
+        self._publish = publish
+        self._unwatch: Dict[str, Callable[[], None]] = {}
+
+    async def start(self, user_id: str) -> None:
+        repository = self._get_repository()
+        watch_user = getattr(repository, "watch_user", None)
+        if watch_user is None:
+            raise ValueError("The storage backend cannot watch for changes")
+
+        loop = asyncio.get_running_loop()
+
+        def on_change(kind: str, note: Dict[str, Any]):
+            loop.call_soon_threadsafe(self._publish, user_id, kind, note)
+
+        self._unwatch[user_id] = await run_blocking(watch_user, user_id, on_change)
+
+    async def stop(self, user_id: str) -> None:
+        unwatch = self._unwatch.pop(user_id, None)
+        if unwatch is not None:
+            await run_blocking(unwatch)
+
+
+class ChangeHub:
+    """Fans change events out to every open stream of a user in this worker
+
+    Events are rendered once and shared by all subscribers. With a
+    ``source``, each user with subscribers is watched from the first
+    subscription until the last one closes.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        max_per_user: int,
+        heartbeat_seconds: float,
+        source: Optional[ChangeSource] = None,
+    ):
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.heartbeat_seconds = heartbeat_seconds
+        self.source = source
+        self._subscribers: Dict[str, Set[ChangeSubscription]] = {}
+        self._watched: Set[str] = set()
+        self._source_lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def subscriber_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._subscribers.get(user_id, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    async def subscribe(self, user_id: str) -> Optional[ChangeSubscription]:
+        """Open a subscription, or return None if the user has too many"""
+        subscribers = self._subscribers.setdefault(user_id, set())
+        if len(subscribers) >= self.max_per_user:
+            return None
+        subscription = ChangeSubscription(user_id, self.max_queue)
+        subscribers.add(subscription)
+        try:
+            await self._sync_source(user_id)
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription):
+        """Close a subscription; safe to call from a cancelled stream"""
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+            if subscription.user_id in self._watched:
+                task = asyncio.create_task(self._sync_source(subscription.user_id))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _sync_source(self, user_id: str):
+        """Watch the user while they have subscribers, and only then"""
+        if self.source is None:
+            return
+        if self._source_lock is None:
+            self._source_lock = asyncio.Lock()
+        async with self._source_lock:
+            wanted = user_id in self._subscribers
+            if wanted and user_id not in self._watched:
+                await self.source.start(user_id)
+                self._watched.add(user_id)
+            elif not wanted and user_id in self._watched:
+                self._watched.discard(user_id)
+                try:
+                    await self.source.stop(user_id)
+                except Exception as e:
+                    logger.warning("Stopping change source failed: %s", e)
+
+    async def events(self, user_id: str) -> AsyncIterator[bytes]:
+        """Subscribe and yield server-sent event frames until the client leaves
+
+        The subscription is made on first iteration, so a stream that is
+        never started never leaks one. Ends after a resync event.
+        """
+        try:
+            subscription = await self.subscribe(user_id)
+        except Exception as e:
+            logger.warning("Opening change stream failed: %s", e)
+            return
+        if subscription is None:
+            return
+
+        try:
+            yield READY_FRAME
+            while True:
+                frame = await subscription.next(self.heartbeat_seconds)
+                if frame is None:
+                    yield HEARTBEAT_FRAME
+                    continue
+                yield frame
+                if frame is RESYNC_FRAME:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    def publish(self, user_id: str, frame: bytes):
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.push(frame)
+
+    async def close(self):
+        """Stop every source watch"""
+        for user_id in list(self._watched):
+            self._subscribers.pop(user_id, None)
+            await self._sync_source(user_id)
@@ -1,18 +1,15 @@
-import firebase_admin
-from firebase_admin import credentials
+import logging
 from functools import lru_cache
 from ..core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
 
 @lru_cache()
 def initialize_firebase():
     """Initialize Firebase Admin SDK with service account credentials"""
     try:
-        print("Initializing Firebase...")
-        # Check if already initialized
-        if firebase_admin._apps:
-            return firebase_admin.get_app()
-
+        logger.info("Initializing Firebase")
         settings = get_settings()
 
         # Skip Firebase initialization if no project ID is configured
@@ -20,11 +17,19 @@ def initialize_firebase():
             not settings.firebase_project_id
             or settings.firebase_project_id == "test-project"
         ):
-            print(
-                "⚠️  Firebase not configured - authentication will be disabled for development"
+            logger.warning(
+                "Firebase not configured - authentication will be disabled for development"
             )
             return None
 
+        # Imported here: the SDK is slow to import and unused without Firebase
+        import firebase_admin
+        from firebase_admin import credentials
+
+        # Check if already initialized
+        if firebase_admin._apps:
+            return firebase_admin.get_app()
+
         # Create credentials from environment variables
         cred_dict = {
             "type": "service_account",
@@ -42,6 +47,9 @@ def initialize_firebase():
         cred = credentials.Certificate(cred_dict)
         return firebase_admin.initialize_app(cred)
     except Exception as e:
-        print(f"Failed to initialize Firebase: {str(e)}")
-        print("Running in development mode without Firebase authentication")
+        logger.error(
+            "Failed to initialize Firebase, running in development mode "
+            "without Firebase authentication: %s",
+            e,
+        )
         return None
@@ -0,0 +1,80 @@
+import uuid
+from typing import Dict, Optional, Type, Union
+
+from ..core.cache import CacheBackend
+from ..models import NoteListResponse, NoteResponse, NoteSummaryListResponse
+
+ListPage = Union[NoteListResponse, NoteSummaryListResponse]
+
+
+class NoteCache:
+    """Read-through cache of serialized notes and per-user list pages
+
+    Entry keys embed a generation token, per note for single notes and per
+    user for list pages. Invalidation deletes the generation, orphaning
+    every entry built on it. Callers take the key before reading storage
+    and store under that same key, so a read that races with a write can
+    only populate an already-invalidated key.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    async def _generation(self, key: str) -> str:
+        generation = await self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex.encode()
+            await self.backend.set(key, generation, self.ttl_seconds)
+        return generation.decode()
+
+    async def note_key(self, note_id: str) -> str:
+        generation = await self._generation(f"gen:note:{note_id}")
+        return f"note:{note_id}:{generation}"
+
+    async def list_key(
+        self,
+        user_id: str,
+        limit: int,
+        page_token: Optional[str],
+        view: str = "full",
+    ) -> str:
+        generation = await self._generation(f"gen:user:{user_id}")
+        return f"notes:{user_id}:{generation}:{view}:{limit}:{page_token or ''}"
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        payload = await self.backend.get(key)
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    async def get_note(self, key: str) -> Optional[NoteResponse]:
+        payload = await self._get(key)
+        return NoteResponse.model_validate_json(payload) if payload else None
+
+    async def get_list(
+        self, key: str, model: Type[ListPage] = NoteListResponse
+    ) -> Optional[ListPage]:
+        payload = await self._get(key)
+        return model.model_validate_json(payload) if payload else None
+
+    async def set(self, key: str, value: Union[NoteResponse, ListPage]):
+        await self.backend.set(key, value.model_dump_json().encode(), self.ttl_seconds)
+
+    async def invalidate(self, user_id: str, note_id: Optional[str] = None):
+        """Drop a note and every cached list page of its owner"""
+        if note_id is not None:
+            await self.backend.delete(f"gen:note:{note_id}")
+        await self.backend.delete(f"gen:user:{user_id}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,31 +1,311 @@
-import firebase_admin
-from firebase_admin import firestore
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Union
+from datetime import datetime, timedelta, timezone
+import base64
+import json
 import uuid
-from ..models import NoteCreate, NoteUpdate, NoteResponse
+from pydantic import ValidationError
+from ..models import (
+    NoteCreate,
+    NoteUpdate,
+    NoteResponse,
+    NoteListResponse,
+    NoteSummary,
+    NoteSummaryListResponse,
+    NoteSearchResult,
+    NoteSearchResponse,
+    NoteBatchOperation,
+    NoteBatchResult,
+    NoteBatchResponse,
+    NoteTombstone,
+    NoteChangesResponse,
+    NoteImport,
+    NoteImportError,
+    NoteImportResponse,
+)
 from ..models.common import ServiceResponse
-from .firebase import initialize_firebase
+from ..core.cache import CacheBackend, create_cache_backend
+from ..core.config import get_settings
+from ..core.etag import parse_note_etag, split_etags
+from ..core.metrics import register_cache
+from ..core.profiling import timed_phase
+from ..core.singleflight import SingleFlight
+from ..repositories import (
+    NotesRepository,
+    NoteWrite,
+    NoteNotFoundError,
+    NoteAccessDeniedError,
+    NoteConflictError,
+    PartialWriteError,
+    content_exceeds,
+    create_notes_repository,
+    summarize_note,
+)
+from .change_feed import ChangeHub, RepositoryChangeSource, sse_frame
+from .note_cache import NoteCache
+from .search import SearchIndex
+from .write_behind import WriteBehindBuffer
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Imported notes written to storage per batch
+IMPORT_BATCH_SIZE = 500
+
+# Longest accepted import line; longer lines are skipped without buffering
+MAX_IMPORT_LINE_BYTES = 1024 * 1024
+
+# Skipped import lines reported individually
+MAX_IMPORT_ERRORS = 100
+
+# Extra lag of the change feed behind write-behind flushes, for slow writes
+WRITE_BEHIND_SETTLE_SECONDS = 5
+
+
+def _encode_token(payload: Dict[str, Any]) -> str:
+    """Encode a small JSON payload as an opaque URL-safe token"""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    padded = token + "=" * (-len(token) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid token payload")
+    return payload
+
+
+def _as_utc_naive(value: datetime) -> datetime:
+    """Normalise a timestamp to the naive UTC form used for stored notes"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _encode_page_token(created_at: datetime, note_id: str) -> str:
+    """Encode the position of the last returned note as an opaque page token"""
+    return _encode_token({"c": _as_utc_naive(created_at).isoformat(), "i": note_id})
+
+
+def _decode_page_token(page_token: str) -> Tuple[datetime, str]:
+    """Decode a page token produced by _encode_page_token"""
+    try:
+        payload = _decode_token(page_token)
+        return _as_utc_naive(datetime.fromisoformat(payload["c"])), str(payload["i"])
+    except Exception:
+        raise ValueError("Invalid page token")
+
+
+def _decode_sync_cursor(since: str) -> Tuple[datetime, str]:
+    """Decode a sync cursor, also accepting a plain ISO 8601 timestamp"""
+    try:
+        return _decode_page_token(since)
+    except ValueError:
+        pass
+
+    try:
+        return _as_utc_naive(datetime.fromisoformat(since)), ""
+    except ValueError:
+        raise ValueError("Invalid sync cursor")
+
+
+def _decode_offset_token(page_token: str) -> int:
+    """Decode a search page token holding a result offset"""
+    try:
+        offset = int(_decode_token(page_token)["o"])
+    except Exception:
+        raise ValueError("Invalid page token")
+    if offset < 0:
+        raise ValueError("Invalid page token")
+    return offset
+
+
+async def _ndjson_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into numbered non-empty lines
+
+    A line longer than MAX_IMPORT_LINE_BYTES is yielded as None once its
+    end is reached, without being kept in memory.
+    """
+    buffer = b""
+    line_number = 0
+    too_long = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if too_long or len(line) > MAX_IMPORT_LINE_BYTES:
+                too_long = False
+                yield line_number, None
+            elif line.strip():
+                yield line_number, line
+        if len(buffer) > MAX_IMPORT_LINE_BYTES:
+            buffer = b""
+            too_long = True
+
+    line_number += 1
+    if too_long:
+        yield line_number, None
+    elif buffer.strip():
+        yield line_number, buffer
 
 
 class NotesService:
-    def __init__(self):
-        # Initialize Firebase if not already done
-        firebase_app = initialize_firebase()
-        if firebase_app is None:
-            # Development mode - use mock database
-            self.db = None
-            self.collection = "notes"
-            self._mock_notes = {}  # Simple in-memory storage for development
-            print("Running in development mode with mock database")
+    def __init__(
+        self,
+        repository: Optional[NotesRepository] = None,
+        cache_backend: Optional[CacheBackend] = None,
+    ):
+        settings = get_settings()
+
+        self._repository = repository
+        self.max_content_bytes = settings.note_content_max_bytes
+
+        self.cache: Optional[NoteCache] = None
+        if settings.note_cache_enabled:
+            if cache_backend is None:
+                cache_backend = create_cache_backend(settings)
+            if cache_backend is not None:
+                self.cache = NoteCache(cache_backend, settings.note_cache_ttl_seconds)
+
+        self.reads = SingleFlight()
+
+        self.search_index = SearchIndex(
+            self._load_all_user_notes,
+            self._load_changes_since,
+            max_users=settings.search_index_max_users,
+            refresh_seconds=settings.search_index_refresh_seconds,
+        )
+
+        self.write_behind: Optional[WriteBehindBuffer] = None
+        if settings.write_behind_enabled:
+            self.write_behind = WriteBehindBuffer(
+                lambda: self.repository,
+                settings.write_behind_window_seconds,
+                settings.write_behind_max_pending,
+                on_flushed=self._on_flushed,
+            )
+
+        source = None
+        if settings.change_feed_source.lower() == "storage":
+            source = RepositoryChangeSource(lambda: self.repository, self._publish)
+        self.change_hub = ChangeHub(
+            settings.change_feed_max_queue,
+            settings.change_feed_max_streams_per_user,
+            settings.change_feed_heartbeat_seconds,
+            source=source,
+        )
+
+    @property
+    def repository(self) -> NotesRepository:
+        """Storage backend, built on first use rather than at import
+
+        Each server worker process then creates its own storage clients.
+        """
+        if self._repository is None:
+            self._repository = create_notes_repository(get_settings())
+        return self._repository
+
+    async def close(self):
+        """Store pending updates and release the storage backend"""
+        await self.change_hub.close()
+        if self.write_behind is not None:
+            await self.write_behind.close()
+        if self._repository is not None:
+            await self._repository.close()
+
+    async def _load_all_user_notes(self, user_id: str) -> List[Dict[str, Any]]:
+        """Read every note of a user from storage"""
+        return self._with_pending(
+            [note async for note in self.repository.iter_by_user(user_id)]
+        )
+
+    async def _load_changes_since(
+        self, user_id: str, cursor: Tuple[datetime, str]
+    ) -> Tuple[List[Dict[str, Any]], Tuple[datetime, str]]:
+        """Every stored change after ``cursor``, with full bodies, and the new cursor"""
+        changes = []
+        has_more = True
+        while has_more:
+            page, has_more = await self.repository.list_changes(
+                user_id, MAX_PAGE_SIZE, cursor
+            )
+            if not page:
+                break
+            cursor = (page[-1]["updated_at"], page[-1]["id"])
+            for change in page:
+                if change.get("content_truncated"):
+                    # Offloaded bodies come as previews in the change feed
+                    change = await self.repository.get(change["id"]) or change
+                changes.append(change)
+        return self._with_pending(changes), cursor
+
+    async def _invalidate(self, user_id: str, note_id: Optional[str] = None):
+        # Reads already in flight may predate the write; later ones start afresh
+        self.reads.forget(("user", user_id))
+        if note_id is not None:
+            self.reads.forget(("note", note_id))
+        if self.cache is not None:
+            await self.cache.invalidate(user_id, note_id)
+
+    def _content_too_large(self, content: Optional[str]) -> Optional[str]:
+        """The error message for content over the size limit, if it is"""
+        if content_exceeds(content, self.max_content_bytes):
+            return (
+                "Note content exceeds the maximum size of "
+                f"{self.max_content_bytes} bytes"
+            )
+        return None
+
+    async def _on_flushed(self, notes: List[Dict[str, Any]]):
+        # Cached reads taken while an update was pending hold the old version
+        for note in notes:
+            await self._invalidate(note["user_id"], note["id"])
+
+    def _publish(self, user_id: str, kind: str, note: Dict[str, Any]):
+        """Send a created, updated or deleted event to the user's streams
+
+        The event ID is the sync cursor of the change, so a client that
+        reconnects can catch up from GET /notes/changes.
+        """
+        if not self.change_hub.subscriber_count(user_id):
+            return
+        if kind == "deleted":
+            data = NoteTombstone(id=note["id"], deleted_at=note["deleted_at"])
+            changed_at = note["deleted_at"]
         else:
-            self.db = firestore.client()
-            self.collection = "notes"
+            data = NoteResponse(**note)
+            changed_at = note["updated_at"]
+        self.change_hub.publish(
+            user_id,
+            sse_frame(
+                kind,
+                data.model_dump_json(),
+                _encode_page_token(changed_at, note["id"]),
+            ),
+        )
+
+    def _notify(self, user_id: str, kind: str, note: Dict[str, Any]):
+        """Publish a change made here, unless storage listeners report it"""
+        if self.change_hub.source is None:
+            self._publish(user_id, kind, note)
+
+    def _with_pending(self, notes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Show this worker's unsaved updates in place of stored versions"""
+        if self.write_behind is None:
+            return notes
+        return self.write_behind.overlay(notes)
 
     async def create_note(
         self, note_data: NoteCreate, user_id: str
     ) -> ServiceResponse[NoteResponse]:
         """Create a new note for the authenticated user"""
+        too_large = self._content_too_large(note_data.content)
+        if too_large:
+            return ServiceResponse(type=False, message=too_large)
+
         try:
             # Generate unique ID for the note
             note_id = str(uuid.uuid4())
@@ -41,13 +321,10 @@ class NotesService:
                 "updated_at": now,
             }
 
-            if self.db is None:
-                # Development mode - store in memory
-                self._mock_notes[note_id] = note_doc
-            else:
-                # Save to Firestore
-                doc_ref = self.db.collection(self.collection).document(note_id)
-                doc_ref.set(note_doc)
+            await self.repository.create(note_doc)
+            self.search_index.add(user_id, note_doc)
+            await self._invalidate(user_id)
+            self._notify(user_id, "created", note_doc)
 
             note_response = NoteResponse(**note_doc)
             return ServiceResponse(
@@ -59,55 +336,205 @@ class NotesService:
                 type=False, message=f"Failed to create note: {str(e)}"
             )
 
-    async def get_user_notes(self, user_id: str) -> ServiceResponse[List[NoteResponse]]:
-        """Get all notes for the authenticated user"""
+    async def get_user_notes(
+        self,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+        view: str = "full",
+    ) -> ServiceResponse[Union[NoteListResponse, NoteSummaryListResponse]]:
+        """Get one page of notes for the authenticated user, newest first
+
+        The "summary" view returns a snippet and the content length in place
+        of each note's full content.
+        """
+        try:
+            cursor = _decode_page_token(page_token) if page_token else None
+        except ValueError as e:
+            return ServiceResponse(type=False, message=str(e))
+
+        page_model = NoteSummaryListResponse if view == "summary" else NoteListResponse
+        try:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = await self.cache.list_key(user_id, limit, page_token, view)
+                page = await self.cache.get_list(cache_key, page_model)
+                if page is not None:
+                    return ServiceResponse(
+                        type=True,
+                        message=f"Retrieved {len(page.notes)} notes successfully",
+                        data=page,
+                    )
+
+            # Identical concurrent requests share one storage read
+            page = await self.reads.do(
+                ("user", user_id),
+                ("list", view, limit, page_token),
+                lambda: self._load_page(user_id, limit, cursor, view, cache_key),
+            )
+
+            return ServiceResponse(
+                type=True,
+                message=f"Retrieved {len(page.notes)} notes successfully",
+                data=page,
+            )
+
+        except Exception as e:
+            return ServiceResponse(
+                type=False, message=f"Failed to fetch notes: {str(e)}"
+            )
+
+    async def _load_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[Tuple[datetime, str]],
+        view: str,
+        cache_key: Optional[str],
+    ) -> Union[NoteListResponse, NoteSummaryListResponse]:
+        """Read one page of notes from storage and cache it"""
+        if view == "summary":
+            note_docs, has_more = await self.repository.list_summaries_by_user(
+                user_id, limit, cursor
+            )
+            if self.write_behind is not None:
+                for index, note in enumerate(note_docs):
+                    pending = self.write_behind.get(note["id"])
+                    if pending is not None:
+                        note_docs[index] = summarize_note(pending)
+            with timed_phase("models"):
+                notes = [NoteSummary(**note) for note in note_docs]
+            page_model = NoteSummaryListResponse
+        else:
+            note_docs, has_more = await self.repository.list_by_user(
+                user_id, limit, cursor
+            )
+            with timed_phase("models"):
+                notes = [NoteResponse(**note) for note in self._with_pending(note_docs)]
+            page_model = NoteListResponse
+
+        next_page_token = None
+        if has_more and notes:
+            next_page_token = _encode_page_token(notes[-1].created_at, notes[-1].id)
+
+        with timed_phase("models"):
+            page = page_model(notes=notes, next_page_token=next_page_token)
+        if cache_key is not None:
+            await self.cache.set(cache_key, page)
+        return page
+
+    async def search_notes(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+    ) -> ServiceResponse[NoteSearchResponse]:
+        """Full-text search over the user's note titles and content"""
         try:
-            if self.db is None:
-                # Development mode - filter mock notes
-                user_notes = [
-                    note
-                    for note in self._mock_notes.values()
-                    if note["user_id"] == user_id
+            offset = _decode_offset_token(page_token) if page_token else 0
+        except ValueError as e:
+            return ServiceResponse(type=False, message=str(e))
+
+        try:
+            matches = await self.search_index.search(user_id, query)
+            page = matches[offset : offset + limit]
+
+            note_docs = self._with_pending(
+                await self.repository.get_many([i for i, _ in page])
+            )
+            notes_by_id = {
+                note["id"]: note for note in note_docs if note["user_id"] == user_id
+            }
+            with timed_phase("models"):
+                results = [
+                    NoteSearchResult(**notes_by_id[note_id], score=score)
+                    for note_id, score in page
+                    if note_id in notes_by_id
                 ]
 
-                # Sort by creation date (newest first)
-                user_notes.sort(key=lambda x: x["created_at"], reverse=True)
+            next_page_token = None
+            if offset + limit < len(matches):
+                next_page_token = _encode_token({"o": offset + limit})
 
-                notes = [NoteResponse(**note) for note in user_notes]
+            return ServiceResponse(
+                type=True,
+                message=f"Found {len(matches)} matching notes",
+                data=NoteSearchResponse(
+                    results=results, next_page_token=next_page_token
+                ),
+            )
 
-                return ServiceResponse(
-                    type=True,
-                    message=f"Retrieved {len(notes)} notes successfully",
-                    data=notes,
-                )
-            else:
-                # Firestore mode
-                query = self.db.collection(self.collection).where(
-                    "user_id", "==", user_id
-                )
+        except Exception as e:
+            return ServiceResponse(
+                type=False, message=f"Failed to search notes: {str(e)}"
+            )
 
-                # Order by creation date (newest first)
-                query = query.order_by(
-                    "created_at", direction=firestore.Query.DESCENDING
-                )
+    async def get_note_changes(
+        self,
+        user_id: str,
+        since: Optional[str] = None,
+        limit: int = MAX_PAGE_SIZE,
+    ) -> ServiceResponse[NoteChangesResponse]:
+        """Get notes changed and deleted after a sync cursor, oldest first"""
+        try:
+            cursor = _decode_sync_cursor(since) if since else None
+        except ValueError as e:
+            return ServiceResponse(type=False, message=str(e))
 
-                # Execute query
-                docs = query.stream()
-                notes = []
+        try:
+            changes, has_more = await self.repository.list_changes(
+                user_id, limit, cursor
+            )
+            if self.write_behind is not None:
+                # Updates still pending here or in another worker get stored
+                # with their earlier timestamps; hold back the newest changes
+                # so a client's cursor never moves past one of them
+                watermark = datetime.utcnow() - timedelta(
+                    seconds=2 * self.write_behind.window_seconds
+                    + WRITE_BEHIND_SETTLE_SECONDS
+                )
+                settled = [
+                    change
+                    for change in changes
+                    if _as_utc_naive(change["updated_at"]) <= watermark
+                ]
+                if len(settled) < len(changes):
+                    changes, has_more = settled, False
 
-                for doc in docs:
-                    note_data = doc.to_dict()
-                    notes.append(NoteResponse(**note_data))
+            notes = []
+            deleted = []
+            with timed_phase("models"):
+                for change in changes:
+                    if change.get("deleted"):
+                        deleted.append(
+                            NoteTombstone(
+                                id=change["id"], deleted_at=change["updated_at"]
+                            )
+                        )
+                    else:
+                        notes.append(NoteResponse(**change))
 
-                return ServiceResponse(
-                    type=True,
-                    message=f"Retrieved {len(notes)} notes successfully",
-                    data=notes,
+            next_cursor = _encode_page_token(*cursor) if cursor else None
+            if changes:
+                next_cursor = _encode_page_token(
+                    changes[-1]["updated_at"], changes[-1]["id"]
                 )
 
+            return ServiceResponse(
+                type=True,
+                message=f"Retrieved {len(changes)} changes successfully",
+                data=NoteChangesResponse(
+                    notes=notes,
+                    deleted=deleted,
+                    next_cursor=next_cursor,
+                    has_more=has_more,
+                ),
+            )
+
         except Exception as e:
             return ServiceResponse(
-                type=False, message=f"Failed to fetch notes: {str(e)}"
+                type=False, message=f"Failed to fetch changes: {str(e)}"
             )
 
     async def get_note_by_id(
@@ -115,170 +542,487 @@ class NotesService:
     ) -> ServiceResponse[Optional[NoteResponse]]:
         """Get a specific note by ID for the authenticated user"""
         try:
-            if self.db is None:
-                # Development mode - get from mock notes
-                note_data = self._mock_notes.get(note_id)
-                if not note_data or note_data["user_id"] != user_id:
-                    return ServiceResponse(
-                        type=False,
-                        message="Note not found or you don't have permission to access it",
-                    )
-                note_response = NoteResponse(**note_data)
-                return ServiceResponse(
-                    type=True,
-                    message="Note retrieved successfully",
-                    data=note_response,
-                )
-            else:
-                # Firestore mode
-                doc_ref = self.db.collection(self.collection).document(note_id)
-                doc = doc_ref.get()
+            cache_key = None
+            note_response = None
+            if self.cache is not None:
+                cache_key = await self.cache.note_key(note_id)
+                note_response = await self.cache.get_note(cache_key)
 
-                if not doc.exists:
+            pending = self.write_behind.get(note_id) if self.write_behind else None
+            if pending is not None:
+                note_response = NoteResponse(**pending)
+            elif note_response is None:
+                note_response = await self.reads.do(
+                    ("note", note_id),
+                    "get",
+                    lambda: self._load_note(note_id, cache_key),
+                )
+                if note_response is None:
                     return ServiceResponse(type=False, message="Note not found")
 
-                note_data = doc.to_dict()
-
-                # Verify ownership
-                if note_data["user_id"] != user_id:
-                    return ServiceResponse(
-                        type=False,
-                        message="You don't have permission to access this note",
-                    )
-
-                note_response = NoteResponse(**note_data)
+            # Verify ownership
+            if note_response.user_id != user_id:
                 return ServiceResponse(
-                    type=True,
-                    message="Note retrieved successfully",
-                    data=note_response,
+                    type=False,
+                    message="You don't have permission to access this note",
                 )
 
+            return ServiceResponse(
+                type=True,
+                message="Note retrieved successfully",
+                data=note_response,
+            )
+
         except Exception as e:
             return ServiceResponse(
                 type=False, message=f"Failed to fetch note: {str(e)}"
             )
 
+    async def _load_note(
+        self, note_id: str, cache_key: Optional[str]
+    ) -> Optional[NoteResponse]:
+        """Read one note from storage and cache it"""
+        note_data = await self.repository.get(note_id)
+        if note_data is None:
+            return None
+
+        with timed_phase("models"):
+            note_response = NoteResponse(**note_data)
+        if cache_key is not None:
+            await self.cache.set(cache_key, note_response)
+        return note_response
+
     async def update_note(
-        self, note_id: str, note_data: NoteUpdate, user_id: str
+        self,
+        note_id: str,
+        note_data: NoteUpdate,
+        user_id: str,
+        if_match: Optional[str] = None,
     ) -> ServiceResponse[Optional[NoteResponse]]:
-        """Update a note for the authenticated user"""
-        try:
-            if self.db is None:
-                # Development mode - update mock note
-                existing_data = self._mock_notes.get(note_id)
-                if not existing_data or existing_data["user_id"] != user_id:
-                    return ServiceResponse(
-                        type=False,
-                        message="Note not found or you don't have permission to update it",
-                    )
+        """Update a note for the authenticated user
 
-                # Update the note
-                if note_data.title is not None:
-                    existing_data["title"] = note_data.title
-                if note_data.content is not None:
-                    existing_data["content"] = note_data.content
+        With ``if_match`` (an If-Match header value) the write only happens
+        if the note is still at one of the listed versions.
+        """
+        expected_versions: List[Optional[datetime]] = [None]
+        if if_match and if_match.strip() != "*":
+            expected_versions = [
+                parse_note_etag(note_id, etag) for etag in split_etags(if_match)
+            ]
+            expected_versions = [v for v in expected_versions if v is not None]
 
-                existing_data["updated_at"] = datetime.utcnow()
-
-                note_response = NoteResponse(**existing_data)
-                return ServiceResponse(
-                    type=True,
-                    message="Note updated successfully",
-                    data=note_response,
-                )
-            else:
-                # Firestore mode
-                doc_ref = self.db.collection(self.collection).document(note_id)
-                doc = doc_ref.get()
+        too_large = self._content_too_large(note_data.content)
+        if too_large:
+            return ServiceResponse(type=False, message=too_large)
 
-                if not doc.exists:
-                    return ServiceResponse(type=False, message="Note not found")
+        try:
+            # Prepare update data
+            update_data = {}
+            if note_data.title is not None:
+                update_data["title"] = note_data.title
+            if note_data.content is not None:
+                update_data["content"] = note_data.content
 
-                existing_data = doc.to_dict()
+            # Always update the timestamp
+            update_data["updated_at"] = datetime.utcnow()
 
-                # Verify ownership
-                if existing_data["user_id"] != user_id:
+            if self.write_behind is not None:
+                updated_data = await self._update_behind(
+                    note_id, user_id, update_data, expected_versions
+                )
+                if updated_data is None:
                     return ServiceResponse(
                         type=False,
-                        message="You don't have permission to update this note",
+                        message="Note has changed since it was read (precondition failed)",
                     )
-
-                # Prepare update data
-                update_data = {}
-                if note_data.title is not None:
-                    update_data["title"] = note_data.title
-                if note_data.content is not None:
-                    update_data["content"] = note_data.content
-
-                # Always update the timestamp
-                update_data["updated_at"] = datetime.utcnow()
-
-                # Update the document
-                doc_ref.update(update_data)
-
-                # Return updated document
-                updated_doc = doc_ref.get()
-                note_response = NoteResponse(**updated_doc.to_dict())
+                self.search_index.add(user_id, updated_data)
+                await self._invalidate(user_id, note_id)
+                self._notify(user_id, "updated", updated_data)
                 return ServiceResponse(
                     type=True,
                     message="Note updated successfully",
-                    data=note_response,
+                    data=NoteResponse(**updated_data),
+                )
+
+            # Ownership is checked by the write itself, which also returns
+            # the merged note so no read-after-write is needed
+            updated_data = None
+            for expected_updated_at in expected_versions:
+                try:
+                    updated_data = await self.repository.update_owned(
+                        note_id, user_id, update_data, expected_updated_at
+                    )
+                    break
+                except NoteConflictError:
+                    continue
+            if updated_data is None:
+                return ServiceResponse(
+                    type=False,
+                    message="Note has changed since it was read (precondition failed)",
                 )
+            self.search_index.add(user_id, updated_data)
+            await self._invalidate(user_id, note_id)
+            self._notify(user_id, "updated", updated_data)
+            note_response = NoteResponse(**updated_data)
+            return ServiceResponse(
+                type=True,
+                message="Note updated successfully",
+                data=note_response,
+            )
 
+        except NoteNotFoundError:
+            return ServiceResponse(type=False, message="Note not found")
+        except NoteAccessDeniedError:
+            return ServiceResponse(
+                type=False,
+                message="You don't have permission to update this note",
+            )
         except Exception as e:
             return ServiceResponse(
                 type=False, message=f"Failed to update note: {str(e)}"
             )
 
+    async def _update_behind(
+        self,
+        note_id: str,
+        user_id: str,
+        update_data: Dict[str, Any],
+        expected_versions: List[Optional[datetime]],
+    ) -> Optional[Dict[str, Any]]:
+        """Queue an update in the write-behind buffer, returning the merged note
+
+        Returns None when the If-Match versions do not match the note. The
+        check runs against this worker's view of the note, so unlike a
+        direct write it does not see a concurrent update from another one.
+        """
+        note = self.write_behind.get(note_id) or await self.repository.get(note_id)
+        if note is None:
+            raise NoteNotFoundError(note_id)
+        if note["user_id"] != user_id:
+            raise NoteAccessDeniedError(note_id)
+
+        current_version = _as_utc_naive(note["updated_at"])
+        if not any(
+            expected is None or expected == current_version
+            for expected in expected_versions
+        ):
+            return None
+
+        await self.write_behind.put(note, update_data)
+        return self.write_behind.get(note_id)
+
     async def delete_note(self, note_id: str, user_id: str) -> ServiceResponse[bool]:
         """Delete a note for the authenticated user"""
         try:
-            if self.db is None:
-                # Development mode - delete from mock notes
-                note_data = self._mock_notes.get(note_id)
-                if not note_data or note_data["user_id"] != user_id:
-                    return ServiceResponse(
+            # Delete the note, checking ownership in the same call, and leave
+            # a tombstone for clients that sync changes
+            deleted_at = datetime.utcnow()
+            await self.repository.delete_owned(note_id, user_id, deleted_at)
+            if self.write_behind is not None:
+                self.write_behind.discard(note_id)
+            self.search_index.remove(user_id, note_id)
+            await self._invalidate(user_id, note_id)
+            self._notify(user_id, "deleted", {"id": note_id, "deleted_at": deleted_at})
+            return ServiceResponse(
+                type=True, message="Note deleted successfully", data=True
+            )
+
+        except NoteNotFoundError:
+            return ServiceResponse(type=False, message="Note not found")
+        except NoteAccessDeniedError:
+            return ServiceResponse(
+                type=False,
+                message="You don't have permission to delete this note",
+            )
+        except Exception as e:
+            return ServiceResponse(
+                type=False, message=f"Failed to delete note: {str(e)}"
+            )
+
+    async def batch_notes(
+        self, operations: List[NoteBatchOperation], user_id: str
+    ) -> ServiceResponse[NoteBatchResponse]:
+        """Apply a list of creates, updates and deletes in as few writes as possible
+
+        Operations are validated and applied in order against the notes as
+        they stand after the preceding operations. Each operation gets its
+        own result; invalid operations are reported and skipped. If storage
+        fails partway, the response fails too, with the operations that were
+        not stored marked as failed.
+        """
+        try:
+            # Read every referenced note in a single round trip
+            note_ids = list(
+                {op.note_id for op in operations if op.op != "create" and op.note_id}
+            )
+            if self.write_behind is not None:
+                # Pending updates land first, so the batch builds on them
+                await self.write_behind.flush(note_ids)
+            state: Dict[str, Optional[Dict[str, Any]]] = {
+                note["id"]: note for note in await self.repository.get_many(note_ids)
+            }
+            # Updates keeping the body need all of it, not an offloaded preview
+            for note_id in {
+                op.note_id
+                for op in operations
+                if op.op == "update" and op.content is None
+            }:
+                note = state.get(note_id)
+                if note is not None and note.get("content_truncated"):
+                    state[note_id] = await self.repository.get(note_id)
+
+            writes: List[NoteWrite] = []
+            results: List[NoteBatchResult] = []
+            # The change event and the position in results of each write
+            events: List[Tuple[str, Dict[str, Any]]] = []
+            write_results: List[int] = []
+            now = datetime.utcnow()
+
+            for index, op in enumerate(operations):
+
+                def fail(message: str) -> NoteBatchResult:
+                    return NoteBatchResult(
+                        index=index,
+                        op=op.op,
                         type=False,
-                        message="Note not found or you don't have permission to delete it",
+                        message=message,
+                        note_id=op.note_id,
                     )
 
-                del self._mock_notes[note_id]
-                return ServiceResponse(
-                    type=True, message="Note deleted successfully", data=True
-                )
-            else:
-                # Firestore mode
-                doc_ref = self.db.collection(self.collection).document(note_id)
-                doc = doc_ref.get()
+                too_large = self._content_too_large(op.content)
+                if too_large:
+                    results.append(fail(too_large))
+                    continue
 
-                if not doc.exists:
-                    return ServiceResponse(type=False, message="Note not found")
+                if op.op == "create":
+                    if op.title is None or op.content is None:
+                        results.append(fail("Title and content are required"))
+                        continue
 
-                note_data = doc.to_dict()
+                    note_doc = {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "title": op.title,
+                        "content": op.content,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    state[note_doc["id"]] = note_doc
+                    writes.append(("create", note_doc["id"], note_doc))
+                    events.append(("created", note_doc))
+                    write_results.append(len(results))
+                    results.append(
+                        NoteBatchResult(
+                            index=index,
+                            op=op.op,
+                            type=True,
+                            message="Note created successfully",
+                            note_id=note_doc["id"],
+                            data=NoteResponse(**note_doc),
+                        )
+                    )
+                    continue
 
-                # Verify ownership
-                if note_data["user_id"] != user_id:
-                    return ServiceResponse(
-                        type=False,
-                        message="You don't have permission to delete this note",
+                if not op.note_id:
+                    results.append(fail("note_id is required"))
+                    continue
+
+                existing = state.get(op.note_id)
+                if existing is None:
+                    results.append(fail("Note not found"))
+                    continue
+                if existing["user_id"] != user_id:
+                    results.append(
+                        fail(f"You don't have permission to {op.op} this note")
                     )
+                    continue
 
-                # Delete the document
-                doc_ref.delete()
-                return ServiceResponse(
-                    type=True, message="Note deleted successfully", data=True
+                if op.op == "update":
+                    update_data = {}
+                    if op.title is not None:
+                        update_data["title"] = op.title
+                    if op.content is not None:
+                        update_data["content"] = op.content
+                    if not update_data:
+                        results.append(
+                            fail("At least one field must be provided for update")
+                        )
+                        continue
+
+                    update_data["updated_at"] = now
+                    state[op.note_id] = {**existing, **update_data}
+                    writes.append(("update", op.note_id, update_data))
+                    events.append(("updated", state[op.note_id]))
+                    write_results.append(len(results))
+                    results.append(
+                        NoteBatchResult(
+                            index=index,
+                            op=op.op,
+                            type=True,
+                            message="Note updated successfully",
+                            note_id=op.note_id,
+                            data=NoteResponse(**state[op.note_id]),
+                        )
+                    )
+                else:
+                    state[op.note_id] = None
+                    writes.append(
+                        ("delete", op.note_id, {"user_id": user_id, "deleted_at": now})
+                    )
+                    events.append(("deleted", {"id": op.note_id, "deleted_at": now}))
+                    write_results.append(len(results))
+                    results.append(
+                        NoteBatchResult(
+                            index=index,
+                            op=op.op,
+                            type=True,
+                            message="Note deleted successfully",
+                            note_id=op.note_id,
+                        )
+                    )
+
+            applied = 0
+            failure: Optional[Exception] = None
+            try:
+                await self.repository.apply_writes(writes)
+                applied = len(writes)
+            except PartialWriteError as e:
+                applied, failure = e.applied, e.error
+            except Exception as e:
+                failure = e
+            finally:
+                # Even a failed batch may have stored some writes
+                for note_id in {note_id for _, note_id, _ in writes}:
+                    await self._invalidate(user_id, note_id)
+
+            for kind, note in events[:applied]:
+                if kind == "deleted":
+                    self.search_index.remove(user_id, note["id"])
+                else:
+                    self.search_index.add(user_id, note)
+                self._notify(user_id, kind, note)
+            for position in write_results[applied:]:
+                result = results[position]
+                results[position] = NoteBatchResult(
+                    index=result.index,
+                    op=result.op,
+                    type=False,
+                    message=f"Not applied: {failure}",
+                    note_id=result.note_id,
                 )
 
+            succeeded = sum(1 for result in results if result.type)
+            message = f"Applied {succeeded} of {len(results)} operations"
+            if failure is not None:
+                message = f"Failed to apply batch: {failure}. {message}"
+            return ServiceResponse(
+                type=failure is None,
+                message=message,
+                data=NoteBatchResponse(results=results),
+            )
+
         except Exception as e:
             return ServiceResponse(
-                type=False, message=f"Failed to delete note: {str(e)}"
+                type=False, message=f"Failed to apply batch: {str(e)}"
             )
 
+    def open_change_stream(self, user_id: str) -> Optional[AsyncIterator[bytes]]:
+        """Server-sent events for changes to the user's notes made from now on
+
+        Returns None when the user already has as many streams open as allowed.
+        """
+        if self.change_hub.subscriber_count(user_id) >= self.change_hub.max_per_user:
+            return None
+        return self.change_hub.events(user_id)
+
+    async def export_notes(self, user_id: str) -> AsyncIterator[NoteResponse]:
+        """Stream every note of the user, newest first, one batch in memory"""
+        async for note in self.repository.iter_by_user(user_id):
+            if self.write_behind is not None:
+                note = self.write_behind.get(note["id"]) or note
+            yield NoteResponse(**note)
+
+    async def import_notes(
+        self, chunks: AsyncIterator[bytes], user_id: str
+    ) -> ServiceResponse[NoteImportResponse]:
+        """Create notes from an NDJSON upload as it arrives
+
+        Each line holds a note with ``title``, ``content`` and optionally
+        ``created_at``, so an export can be imported as is. Notes get new
+        IDs and are written in batches; invalid lines are skipped.
+        """
+        imported = 0
+        failed = 0
+        errors: List[NoteImportError] = []
+        pending: List[Dict[str, Any]] = []
+
+        def skip(line_number: int, message: str):
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append(NoteImportError(line=line_number, message=message))
+
+        async def flush():
+            nonlocal imported
+            if not pending:
+                return
+            await self.repository.apply_writes(
+                [("create", note["id"], note) for note in pending]
+            )
+            for note in pending:
+                self.search_index.add(user_id, note)
+                self._notify(user_id, "created", note)
+            await self._invalidate(user_id)
+            imported += len(pending)
+            pending.clear()
+
+        try:
+            async for line_number, line in _ndjson_lines(chunks):
+                if line is None:
+                    skip(line_number, "Line is too long")
+                    continue
+                try:
+                    note = NoteImport.model_validate_json(line)
+                except ValidationError as e:
+                    reasons = "; ".join(error["msg"] for error in e.errors())
+                    skip(line_number, f"Invalid note: {reasons}")
+                    continue
+                too_large = self._content_too_large(note.content)
+                if too_large:
+                    skip(line_number, too_large)
+                    continue
+
+                now = datetime.utcnow()
+                pending.append(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "title": note.title,
+                        "content": note.content,
+                        "created_at": (
+                            _as_utc_naive(note.created_at) if note.created_at else now
+                        ),
+                        "updated_at": now,
+                    }
+                )
+                if len(pending) >= IMPORT_BATCH_SIZE:
+                    await flush()
+            await flush()
+
         except Exception as e:
             return ServiceResponse(
-                type="error", message=f"Failed to delete note: {str(e)}"
+                type=False,
+                message=f"Failed to import notes after {imported} were saved: {str(e)}",
             )
 
+        return ServiceResponse(
+            type=True,
+            message=f"Imported {imported} notes, skipped {failed} lines",
+            data=NoteImportResponse(imported=imported, failed=failed, errors=errors),
+        )
+
 
 # Create service instance
 notes_service = NotesService()
+if notes_service.cache is not None:
+    register_cache("note", notes_service.cache.stats)
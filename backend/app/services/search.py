@@ -0,0 +1,220 @@
+import asyncio
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# (updated_at, note_id) of the newest change an index has seen
+ChangeCursor = Tuple[datetime, str]
+
+# Loads a user's changes after a cursor: (notes and tombstones, new cursor)
+LoadChanges = Callable[
+    [str, ChangeCursor], Awaitable[Tuple[List[Dict[str, Any]], ChangeCursor]]
+]
+
+# Where an index of a user without notes starts following changes
+_START_CURSOR: ChangeCursor = (datetime(1970, 1, 1), "")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Title terms count this many times towards a note's term frequencies
+TITLE_WEIGHT = 2
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _note_terms(note: Dict[str, Any]) -> Counter:
+    terms = Counter(tokenize(note.get("content") or ""))
+    for term in tokenize(note.get("title") or ""):
+        terms[term] += TITLE_WEIGHT
+    return terms
+
+
+class _UserIndex:
+    """Inverted index over one user's notes"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.cursor: Optional[ChangeCursor] = None
+        self.refreshed_at = time.monotonic()
+
+    def apply_change(self, change: Dict[str, Any]):
+        if change.get("deleted"):
+            self.remove(change["id"])
+        else:
+            self.add(change)
+
+    def add(self, note: Dict[str, Any]):
+        note_id = note["id"]
+        self.remove(note_id)
+
+        terms = _note_terms(note)
+        self.doc_terms[note_id] = terms
+        self.doc_lengths[note_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[note_id]
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[note_id] = frequency
+
+    def remove(self, note_id: str):
+        terms = self.doc_terms.pop(note_id, None)
+        if terms is None:
+            return
+
+        self.total_length -= self.doc_lengths.pop(note_id)
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(note_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query_terms: List[str]) -> List[Tuple[str, float]]:
+        """Score every note containing a query term with BM25"""
+        doc_count = len(self.doc_terms)
+        if not doc_count:
+            return []
+
+        average_length = self.total_length / doc_count
+        scores: Dict[str, float] = {}
+
+        for term in set(query_terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for note_id, frequency in posting.items():
+                length = self.doc_lengths[note_id]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[note_id] = scores.get(note_id, 0.0) + idf * (
+                    frequency * (BM25_K1 + 1) / (frequency + norm)
+                )
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class SearchIndex:
+    """Per-user inverted indexes over note titles and content
+
+    A user's index is built from storage on their first search and then
+    kept current by the write paths of this process. Writes made by
+    other worker processes are pulled in from the change feed at most
+    every ``refresh_seconds``, at a cost proportional to the number of
+    changes. At most ``max_users`` indexes are kept.
+    """
+
+    def __init__(
+        self,
+        load_notes: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        load_changes: Optional[LoadChanges] = None,
+        max_users: int = 1000,
+        refresh_seconds: float = 30,
+    ):
+        self._load_notes = load_notes
+        self._load_changes = load_changes
+        self.max_users = max_users
+        self.refresh_seconds = refresh_seconds
+        self._indexes: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        self._loading: Dict[str, List[Tuple[str, Any]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _apply(self, user_id: str, action: str, payload: Any):
+        if user_id in self._loading:
+            # Replayed once the index being loaded from storage is updated
+            self._loading[user_id].append((action, payload))
+            return
+
+        index = self._indexes.get(user_id)
+        if index is None:
+            return
+        if action == "add":
+            index.add(payload)
+        else:
+            index.remove(payload)
+
+    def add(self, user_id: str, note: Dict[str, Any]):
+        """Index a created or updated note"""
+        self._apply(user_id, "add", note)
+
+    def remove(self, user_id: str, note_id: str):
+        """Drop a deleted note from the index"""
+        self._apply(user_id, "remove", note_id)
+
+    def _fresh(self, index: Optional[_UserIndex]) -> bool:
+        return index is not None and (
+            self._load_changes is None
+            or time.monotonic() - index.refreshed_at < self.refresh_seconds
+        )
+
+    async def _get_index(self, user_id: str) -> _UserIndex:
+        index = self._indexes.get(user_id)
+        if self._fresh(index):
+            self._indexes.move_to_end(user_id)
+            return index
+
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(user_id)
+            if self._fresh(index):
+                return index
+
+            self._loading[user_id] = []
+            try:
+                if index is None:
+                    index = await self._build(user_id)
+                else:
+                    await self._refresh(user_id, index)
+            finally:
+                pending = self._loading.pop(user_id)
+
+            for action, payload in pending:
+                if action == "add":
+                    index.add(payload)
+                else:
+                    index.remove(payload)
+
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                evicted, _ = self._indexes.popitem(last=False)
+                self._locks.pop(evicted, None)
+            return index
+
+    async def _build(self, user_id: str) -> _UserIndex:
+        """Index every note of the user"""
+        index = _UserIndex()
+        index.cursor = _START_CURSOR
+        for note in await self._load_notes(user_id):
+            index.add(note)
+            key = (note["updated_at"], note["id"])
+            if index.cursor is _START_CURSOR or key > index.cursor:
+                index.cursor = key
+        return index
+
+    async def _refresh(self, user_id: str, index: _UserIndex):
+        """Apply the changes made since the index last looked"""
+        changes, index.cursor = await self._load_changes(user_id, index.cursor)
+        for change in changes:
+            index.apply_change(change)
+        index.refreshed_at = time.monotonic()
+
+    async def search(self, user_id: str, query: str) -> List[Tuple[str, float]]:
+        """Return (note_id, score) pairs matching the query, best first"""
+        query_terms = tokenize(query)
+        if not query_terms:
+            return []
+
+        index = await self._get_index(user_id)
+        return index.search(query_terms)
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import re
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from jose import ExpiredSignatureError, JWTError, jwk, jwt
+
+logger = logging.getLogger(__name__)
+
+# Key lifetime assumed when the response carries no Cache-Control max-age
+DEFAULT_KEYS_MAX_AGE = 3600
+
+# Wait before retrying a failed background refresh
+REFRESH_RETRY_SECONDS = 30
+
+# Minimum time between refreshes triggered by tokens with an unknown key ID
+MIN_ON_DEMAND_REFRESH_SECONDS = 60
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class TokenVerificationError(Exception):
+    """The ID token is malformed, wrongly signed or has invalid claims"""
+
+
+class TokenExpiredError(TokenVerificationError):
+    """The ID token was valid but has expired"""
+
+
+def fetch_keys(url: str) -> Tuple[Dict[str, Any], float]:
+    """Download a JWK set and how many seconds it may be cached for"""
+    with urllib.request.urlopen(url, timeout=10) as response:
+        jwks = json.load(response)
+        match = _MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+    return jwks, float(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens locally against cached public keys
+
+    Keys are refreshed in the background ahead of their Cache-Control
+    expiry, so no request waits on the network except for the very first
+    one or after a key rotation the refresh has not picked up yet.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        keys_url: str,
+        refresh_margin_seconds: float = 300,
+        fetch: Callable[[str], Tuple[Dict[str, Any], float]] = fetch_keys,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.keys_url = keys_url
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._fetch = fetch
+        self._clock = clock
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, unless_fetched_after: Optional[float] = None):
+        """Fetch the current keys, replacing the cached set
+
+        Callers that raced for the same refresh pass the fetch time they
+        saw, and skip fetching again once another caller has done it.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if (
+                unless_fetched_after is not None
+                and self._fetched_at > unless_fetched_after
+            ):
+                return
+            jwks, max_age = await run_in_threadpool(self._fetch, self.keys_url)
+            keys = {
+                key["kid"]: jwk.construct(key, algorithm="RS256")
+                for key in jwks.get("keys", [])
+                if "kid" in key
+            }
+            now = self._clock()
+            self._keys = keys
+            self._fetched_at = now
+            self._expires_at = now + max_age
+
+    async def _refresh_loop(self):
+        while True:
+            delay = self._expires_at - self.refresh_margin_seconds - self._clock()
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Refreshing token signing keys failed: %s", e)
+                await asyncio.sleep(REFRESH_RETRY_SECONDS)
+
+    async def start(self):
+        """Load the keys and keep them fresh until stop() is called"""
+        if self._task is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Loading token signing keys failed: %s", e)
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _key_for(self, kid: Optional[str]):
+        key = self._keys.get(kid)
+        if key is not None and self._clock() < self._expires_at:
+            return key
+
+        # Expired keys, or a key ID we have not seen, possibly just rotated in
+        fetched_at = self._fetched_at
+        if (
+            not self._keys
+            or self._clock() >= self._expires_at
+            or self._clock() - fetched_at >= MIN_ON_DEMAND_REFRESH_SECONDS
+        ):
+            await self.refresh(unless_fetched_after=fetched_at)
+        key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError("Token is signed with an unknown key")
+        return key
+
+    def _decode(self, token: str, key) -> Dict[str, Any]:
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+            )
+        except ExpiredSignatureError as e:
+            raise TokenExpiredError(str(e)) from e
+        except JWTError as e:
+            raise TokenVerificationError(str(e)) from e
+
+        now = self._clock()
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise TokenVerificationError("Token has an invalid subject")
+        for claim in ("iat", "auth_time"):
+            if not isinstance(claims.get(claim), (int, float)) or claims[claim] > now:
+                raise TokenVerificationError(f"Token has an invalid {claim}")
+
+        claims["uid"] = subject
+        return claims
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Check a token's signature and claims and return its decoded claims"""
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(str(e)) from e
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError("Token is not signed with RS256")
+
+        key = await self._key_for(header.get("kid"))
+        # The RSA signature check is CPU-bound, keep it off the event loop
+        return await run_in_threadpool(self._decode, token, key)
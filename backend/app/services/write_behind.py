@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from ..repositories import (
+    NotesRepository,
+    NoteNotFoundError,
+    NoteAccessDeniedError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Wait before retrying updates whose flush failed
+FLUSH_RETRY_SECONDS = 1.0
+
+
+class PendingUpdate:
+    """A note's acknowledged but not yet stored changes"""
+
+    __slots__ = ("note", "fields", "queued_at")
+
+    def __init__(self, note: Dict[str, Any], fields: Dict[str, Any], queued_at: float):
+        # The note as clients have been told it is, and the fields to store
+        self.note = note
+        self.fields = fields
+        self.queued_at = queued_at
+
+
+class WriteBehindBuffer:
+    """Holds note updates for up to ``window_seconds`` and stores them in batches
+
+    Successive updates of a note within the window are merged, so a burst
+    of autosaves costs a single storage write. The buffer is per process:
+    reads served by this worker see pending updates, other workers see
+    them once flushed.
+    """
+
+    def __init__(
+        self,
+        get_repository: Callable[[], NotesRepository],
+        window_seconds: float,
+        max_pending: int,
+        on_flushed: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._get_repository = get_repository
+        self.window_seconds = window_seconds
+        self.max_pending = max_pending
+        self._on_flushed = on_flushed
+        self._clock = clock
+        self._pending: Dict[str, PendingUpdate] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def get(self, note_id: str) -> Optional[Dict[str, Any]]:
+        """The pending version of a note, if it has unsaved updates"""
+        pending = self._pending.get(note_id)
+        return dict(pending.note) if pending is not None else None
+
+    def overlay(self, notes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace stored note documents with their pending versions"""
+        if not self._pending:
+            return notes
+        return [
+            (
+                dict(self._pending[note["id"]].note)
+                if note["id"] in self._pending
+                else note
+            )
+            for note in notes
+        ]
+
+    async def put(self, note: Dict[str, Any], fields: Dict[str, Any]):
+        """Queue an update of ``note`` with ``fields``, merging it into any pending one"""
+        # At the bound, callers wait for storage instead of piling up more
+        if note["id"] not in self._pending and len(self._pending) >= self.max_pending:
+            await self.flush()
+
+        pending = self._pending.get(note["id"])
+        if pending is None:
+            self._pending[note["id"]] = PendingUpdate(
+                {**note, **fields}, dict(fields), self._clock()
+            )
+        else:
+            pending.note.update(fields)
+            pending.fields.update(fields)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def discard(self, note_id: str):
+        """Drop a note's pending updates, once the note itself is deleted"""
+        self._pending.pop(note_id, None)
+
+    async def flush(self, note_ids: Optional[Iterable[str]] = None):
+        """Store pending updates now: all of them, or those of ``note_ids``"""
+        if note_ids is None:
+            selected = list(self._pending)
+        else:
+            selected = [note_id for note_id in note_ids if note_id in self._pending]
+        await self._flush(selected)
+
+    async def _flush_due(self):
+        cutoff = self._clock() - self.window_seconds
+        await self._flush(
+            [
+                note_id
+                for note_id, pending in self._pending.items()
+                if pending.queued_at <= cutoff
+            ]
+        )
+
+    async def _flush(self, note_ids: List[str]):
+        if not note_ids:
+            return
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        # One flush at a time, so an older version never lands after a newer one
+        async with self._flush_lock:
+            batch = {
+                note_id: self._pending.pop(note_id)
+                for note_id in note_ids
+                if note_id in self._pending
+            }
+            if not batch:
+                return
+
+            failed = await self._store(batch)
+            # Keep failed updates, under any made while the flush was running
+            for note_id, pending in failed.items():
+                newer = self._pending.get(note_id)
+                if newer is not None:
+                    pending.note = newer.note
+                    pending.fields.update(newer.fields)
+                self._pending[note_id] = pending
+
+            stored = [p.note for i, p in batch.items() if i not in failed]
+            if stored and self._on_flushed is not None:
+                await self._on_flushed(stored)
+            if failed:
+                raise RuntimeError(
+                    f"{len(failed)} pending note updates were not stored"
+                )
+
+    async def _store(self, batch: Dict[str, PendingUpdate]) -> Dict[str, PendingUpdate]:
+        """Write a batch of updates, returning those that could not be stored"""
+        repository = self._get_repository()
+        try:
+            await repository.apply_writes(
+                [
+                    ("update", note_id, pending.fields)
+                    for note_id, pending in batch.items()
+                ]
+            )
+            return {}
+        except Exception as e:
+            logger.warning("Batched write-behind flush failed, retrying singly: %s", e)
+
+        # A note deleted in the meantime fails the whole batch on some
+        # backends; write one by one and drop updates of vanished notes
+        failed = {}
+        for note_id, pending in batch.items():
+            try:
+                await repository.update_owned(
+                    note_id, pending.note["user_id"], pending.fields
+                )
+            except (NoteNotFoundError, NoteAccessDeniedError):
+                pass
+            except Exception:
+                failed[note_id] = pending
+        return failed
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.window_seconds / 2)
+            try:
+                await self._flush_due()
+            except Exception as e:
+                logger.warning("Write-behind flush failed: %s", e)
+                await asyncio.sleep(FLUSH_RETRY_SECONDS)
+
+    async def close(self):
+        """Stop the background flush and store everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1 @@
+# Notes API benchmarks
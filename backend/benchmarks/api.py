@@ -0,0 +1,116 @@
+"""End-to-end benchmarks of app.main:app over an in-process ASGI transport"""
+
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from .common import AUTH_HEADERS, BENCH_USER_ID, summarize
+
+from app.api.v1 import notes as notes_api
+from app.main import app
+from app.models import NoteCreate
+from app.repositories import InMemoryNotesRepository
+from app.services.notes import NotesService
+
+
+@contextmanager
+def use_service(service: NotesService):
+    """Route API calls to a dedicated service instance for one scenario"""
+    previous = notes_api.notes_service
+    notes_api.notes_service = service
+    try:
+        yield service
+    finally:
+        notes_api.notes_service = previous
+
+
+async def seed(service: NotesService, count: int) -> List[str]:
+    note_ids = []
+    for i in range(count):
+        result = await service.create_note(
+            NoteCreate(title=f"Note {i}", content=f"Benchmark note body {i} " * 20),
+            BENCH_USER_ID,
+        )
+        note_ids.append(result.data.id)
+    return note_ids
+
+
+async def run_concurrently(
+    call: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    counter = iter(range(requests))
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await call(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - start)
+    result["errors"] = errors
+    return result
+
+
+async def bench_scenario(
+    size: int, concurrency: int, requests: int
+) -> List[Dict[str, Any]]:
+    """Benchmark every CRUD route against a collection of ``size`` notes"""
+    results = []
+    service = NotesService(InMemoryNotesRepository())
+
+    with use_service(service):
+        note_ids = await seed(service, size)
+        rng = random.Random(size)
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=AUTH_HEADERS
+        ) as client:
+            operations = {
+                "list": lambda i: client.get("/api/notes", params={"limit": 50}),
+                "get": lambda i: client.get(f"/api/notes/{rng.choice(note_ids)}"),
+                "create": lambda i: client.post(
+                    "/api/notes", json={"title": f"New {i}", "content": "body"}
+                ),
+                "update": lambda i: client.put(
+                    f"/api/notes/{rng.choice(note_ids)}", json={"content": f"v{i}"}
+                ),
+                "delete": lambda i: client.delete(f"/api/notes/{note_ids.pop()}"),
+            }
+
+            for name, call in operations.items():
+                count = min(requests, len(note_ids)) if name == "delete" else requests
+                stats = await run_concurrently(call, count, concurrency)
+                results.append(
+                    {
+                        "operation": name,
+                        "collection_size": size,
+                        "concurrency": concurrency,
+                        **stats,
+                    }
+                )
+
+    return results
+
+
+async def run(
+    sizes: List[int], concurrency_levels: List[int], requests: int
+) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        for concurrency in concurrency_levels:
+            results.extend(await bench_scenario(size, concurrency, requests))
+    return results
@@ -0,0 +1,58 @@
+import logging
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+# Benchmarks always run offline against the in-memory backend
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ["FIREBASE_PROJECT_ID"] = ""
+# Every benchmark request comes from the same development user
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+# Per-request client logging would dominate the measurements
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+AUTH_HEADERS = {"Authorization": "Bearer dev-token-123"}
+BENCH_USER_ID = "dev-user-123"
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Summarize per-call latencies (seconds) as milliseconds and throughput"""
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    return {
+        "calls": len(ordered),
+        "ops_per_sec": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure_sync(func: Callable[[], object], iterations: int) -> Dict[str, float]:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def measure_async(
+    func: Callable[[], Awaitable[object]], iterations: int
+) -> Dict[str, float]:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
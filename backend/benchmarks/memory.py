@@ -0,0 +1,91 @@
+"""Memory held per note by the in-memory backend
+
+Compares the current record layout with the dict-per-note layout it
+replaced, which is rebuilt here since it no longer exists in app/.
+"""
+
+import asyncio
+import gc
+import tracemalloc
+from bisect import insort
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.repositories import InMemoryNotesRepository
+
+
+class DictNotesStore:
+    """The previous layout: a dict per note and datetime index keys"""
+
+    def __init__(self):
+        self._notes: Dict[str, Dict[str, Any]] = {}
+        self._user_index: Dict[str, list] = {}
+        self._change_index: Dict[str, list] = {}
+
+    async def create(self, note: Dict[str, Any]) -> None:
+        self._notes[note["id"]] = dict(note)
+        insort(
+            self._user_index.setdefault(note["user_id"], []),
+            (note["created_at"], note["id"]),
+        )
+        insort(
+            self._change_index.setdefault(note["user_id"], []),
+            (note["updated_at"], note["id"]),
+        )
+
+
+def _note_doc(i: int, users: int, base: datetime) -> Dict[str, Any]:
+    # Fresh strings per note, as each request decodes its own
+    created_at = base + timedelta(microseconds=i)
+    return {
+        "id": f"note-{i:012d}",
+        "user_id": "".join(("bench-user-", str(i % users))),
+        "title": f"Note {i}",
+        "content": f"Benchmark note body {i} " * 20,
+        "created_at": created_at,
+        "updated_at": created_at + timedelta(seconds=1),
+    }
+
+
+async def _bytes_per_note(store, notes: int, users: int) -> float:
+    base = datetime.utcnow()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(notes):
+            await store.create(_note_doc(i, users, base))
+        gc.collect()
+        return (tracemalloc.get_traced_memory()[0] - before) / notes
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes: List[int], users: int = 100) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        layouts = {
+            "dict": asyncio.run(_bytes_per_note(DictNotesStore(), size, users)),
+            "record": asyncio.run(
+                _bytes_per_note(InMemoryNotesRepository(), size, users)
+            ),
+        }
+        for layout, per_note in layouts.items():
+            results.append(
+                {
+                    "name": f"memory_store_{layout}",
+                    "notes": size,
+                    "users": users,
+                    "bytes_per_note": round(per_note, 1),
+                }
+            )
+        results.append(
+            {
+                "name": "memory_store_saving",
+                "notes": size,
+                "users": users,
+                "bytes_per_note": round(layouts["dict"] - layouts["record"], 1),
+                "percent": round(100 * (1 - layouts["record"] / layouts["dict"]), 1),
+            }
+        )
+    return results
@@ -0,0 +1,197 @@
+"""Micro-benchmarks of model construction, serialization and token checks"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from unittest import mock
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from fastapi.security import HTTPAuthorizationCredentials
+
+from .common import measure_async, measure_sync
+
+from app.models import NoteListResponse, NoteResponse
+from app.models.common import ServiceResponse
+from app.repositories import InMemoryNotesRepository
+from app.repositories.memory import NoteRecord
+from app.core.responses import ModelJSONResponse
+from app.services import auth as auth_service
+
+
+def _note_doc(i: int) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "id": f"note-{i}",
+        "user_id": "bench-user",
+        "title": f"Note {i}",
+        "content": f"Benchmark note body {i} " * 20,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def bench_note_response(iterations: int) -> List[Dict[str, Any]]:
+    doc = _note_doc(0)
+    record = NoteRecord(doc)
+    # model_construct() skips validation but is slower on pydantic 2.5,
+    # which is why the memory backend still returns dicts
+    return [
+        {
+            "name": "note_response_construct",
+            **measure_sync(lambda: NoteResponse(**doc), iterations),
+        },
+        {
+            "name": "note_response_model_construct",
+            **measure_sync(lambda: NoteResponse.model_construct(**doc), iterations),
+        },
+        {
+            "name": "note_response_from_record",
+            **measure_sync(lambda: NoteResponse(**record.to_dict()), iterations),
+        },
+    ]
+
+
+def bench_service_response(iterations: int, page_size: int) -> List[Dict[str, Any]]:
+    page = NoteListResponse(
+        notes=[NoteResponse(**_note_doc(i)) for i in range(page_size)],
+        next_page_token=None,
+    )
+    response = ServiceResponse[NoteListResponse](
+        type=True, message="Retrieved notes", data=page
+    )
+
+    return [
+        {
+            "name": "service_response_jsonable_encoder",
+            "page_size": page_size,
+            **measure_sync(lambda: jsonable_encoder(response), iterations),
+        },
+        {
+            "name": "service_response_model_dump_json",
+            "page_size": page_size,
+            **measure_sync(lambda: response.model_dump_json(), iterations),
+        },
+    ]
+
+
+async def bench_response_paths(iterations: int, list_size: int) -> List[Dict[str, Any]]:
+    """Render a large list response the way routes do, with and without
+    the fast JSON path"""
+    page = NoteListResponse(
+        notes=[NoteResponse(**_note_doc(i)) for i in range(list_size)],
+        next_page_token=None,
+    )
+    model = ServiceResponse[NoteListResponse]
+    response = model(type=True, message="Retrieved notes", data=page)
+    field = create_response_field(name="Response_bench", type_=model)
+
+    async def default_path():
+        # What FastAPI does with a route's return value and response_model
+        content = await serialize_response(field=field, response_content=response)
+        return JSONResponse(content).body
+
+    async def fast_path():
+        return ModelJSONResponse(response).body
+
+    return [
+        {
+            "name": "list_response_default",
+            "list_size": list_size,
+            **await measure_async(default_path, iterations),
+        },
+        {
+            "name": "list_response_fast_json",
+            "list_size": list_size,
+            **await measure_async(fast_path, iterations),
+        },
+    ]
+
+
+async def bench_memory_listing(
+    iterations: int, sizes: List[int], page_size: int
+) -> List[Dict[str, Any]]:
+    """List one user's first and middle pages while other users' notes grow
+
+    The listed user always owns 1000 notes, so latency should stay flat as
+    the total store size increases.
+    """
+    results = []
+    for size in sizes:
+        repository = InMemoryNotesRepository()
+        base = datetime.utcnow()
+        for i in range(max(size, 1000)):
+            doc = _note_doc(i)
+            doc["user_id"] = "bench-user" if i < 1000 else f"other-{i % 100}"
+            doc["created_at"] = doc["updated_at"] = base + timedelta(microseconds=i)
+            await repository.create(doc)
+
+        middle = (base + timedelta(microseconds=500), "note-500")
+        for name, cursor in (("first_page", None), ("middle_page", middle)):
+            results.append(
+                {
+                    "name": f"memory_list_{name}",
+                    "total_notes": max(size, 1000),
+                    "page_size": page_size,
+                    **await measure_async(
+                        lambda: repository.list_by_user(
+                            "bench-user", page_size, cursor
+                        ),
+                        iterations,
+                    ),
+                }
+            )
+    return results
+
+
+async def bench_verify_token(iterations: int) -> List[Dict[str, Any]]:
+    results = []
+
+    bypass = HTTPAuthorizationCredentials(scheme="Bearer", credentials="dev-token-123")
+    results.append(
+        {
+            "name": "verify_token_dev_bypass",
+            **await measure_async(
+                lambda: auth_service.verify_token(bypass), iterations
+            ),
+        }
+    )
+
+    # Firebase-configured path with the token already in the verified cache
+    token = "bench.cached.token"
+    cached = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    auth_service.token_cache.set(
+        hashlib.sha256(token.encode()).hexdigest(),
+        {"uid": "bench-user", "firebase": {}},
+        expires_at=time.time() + 3600,
+    )
+    with mock.patch.object(auth_service, "initialize_firebase", return_value=object()):
+        results.append(
+            {
+                "name": "verify_token_cache_hit",
+                **await measure_async(
+                    lambda: auth_service.verify_token(cached), iterations
+                ),
+            }
+        )
+
+    return results
+
+
+def run(
+    iterations: int, page_size: int, list_size: int, sizes: List[int]
+) -> List[Dict[str, Any]]:
+    results = bench_note_response(iterations)
+    results.extend(bench_service_response(max(1, iterations // 100), page_size))
+    results.extend(
+        asyncio.run(bench_response_paths(max(1, iterations // 1000), list_size))
+    )
+    results.extend(
+        asyncio.run(bench_memory_listing(max(1, iterations // 10), sizes, page_size))
+    )
+    results.extend(asyncio.run(bench_verify_token(iterations)))
+    return results
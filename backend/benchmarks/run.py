@@ -0,0 +1,94 @@
+"""Run the Notes API benchmark suite and write the results as JSON
+
+Usage, from the backend directory:
+
+    python -m benchmarks.run --output benchmarks/results/latest.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import api, memory, micro
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _int_list(value: str):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=_int_list, default=[100, 1000, 10000])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--list-size", type=int, default=10000)
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--memory-sizes", type=_int_list, default=[10000, 100000])
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                "sizes": args.sizes,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "iterations": args.iterations,
+                "page_size": args.page_size,
+                "list_size": args.list_size,
+                "memory_sizes": args.memory_sizes,
+            },
+        },
+        "api": [],
+        "micro": [],
+        "memory": [],
+    }
+
+    if not args.skip_micro:
+        report["micro"] = micro.run(
+            args.iterations, args.page_size, args.list_size, args.sizes
+        )
+    if not args.skip_memory:
+        report["memory"] = memory.run(args.memory_sizes)
+    if not args.skip_api:
+        report["api"] = asyncio.run(
+            api.run(args.sizes, args.concurrency, args.requests)
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(output + "\n")
+        print(f"Wrote benchmark results to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+import os
+
+# Tests run offline against the in-memory backend as the development user
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("FIREBASE_PROJECT_ID", "")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
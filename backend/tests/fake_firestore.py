@@ -0,0 +1,222 @@
+"""A small in-memory stand-in for the Firestore client, counting round trips
+
+Only the calls FirestoreNotesRepository makes are supported. Each get,
+write, batch commit and query counts as one round trip.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], update_time=None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+def _stored(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Firestore hands timestamps back timezone-aware, in UTC
+    return {
+        key: (
+            value.replace(tzinfo=timezone.utc)
+            if isinstance(value, datetime) and value.tzinfo is None
+            else value
+        )
+        for key, value in data.items()
+    }
+
+
+class FakeDocument:
+    def __init__(self, db: "FakeFirestore", collection: str, doc_id: str):
+        self.db = db
+        self.collection = collection
+        self.id = doc_id
+
+    @property
+    def _docs(self) -> Dict[str, Dict[str, Any]]:
+        return self.db.data.setdefault(self.collection, {})
+
+    def get(self):
+        self.db.count("get")
+        data = self._docs.get(self.id)
+        return FakeSnapshot(self.id, data, self.db.versions.get(self._key))
+
+    @property
+    def _key(self):
+        return (self.collection, self.id)
+
+    def _check(self, option):
+        if option is not None and option != self.db.versions.get(self._key):
+            raise self.db.precondition_failed("Document changed")
+
+    def _set(self, data, option=None):
+        self._check(option)
+        self._docs[self.id] = _stored(data)
+        self.db.bump(self._key)
+
+    def _update(self, data, option=None):
+        self._check(option)
+        if self.id not in self._docs:
+            raise self.db.not_found("No document to update")
+        self._docs[self.id].update(_stored(data))
+        self.db.bump(self._key)
+
+    def _delete(self, option=None):
+        self._check(option)
+        self._docs.pop(self.id, None)
+        self.db.versions.pop(self._key, None)
+
+    def set(self, data, option=None):
+        self.db.count("set")
+        self._set(data, option)
+
+    def update(self, data, option=None):
+        self.db.count("update")
+        self._update(data, option)
+
+    def delete(self, option=None):
+        self.db.count("delete")
+        self._delete(option)
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data, option=None):
+        self.writes.append(lambda: ref._set(data, option))
+
+    def update(self, ref, data, option=None):
+        self.writes.append(lambda: ref._update(data, option))
+
+    def delete(self, ref, option=None):
+        self.writes.append(lambda: ref._delete(option))
+
+    def commit(self):
+        self.db.count("commit")
+        for write in self.writes:
+            write()
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeFirestore", collection: str):
+        self.db = db
+        self.collection = collection
+        self.filters = []
+        self.orders = []
+        self.start_after_values = None
+        self.limit_value = None
+        self.field_paths = None
+
+    def _copy(self, **changes) -> "FakeQuery":
+        query = FakeQuery(self.db, self.collection)
+        query.__dict__.update({**self.__dict__, **changes})
+        return query
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return self._copy(filters=self.filters + [(field, value)])
+
+    def order_by(self, field, direction="ASCENDING"):
+        field = field if isinstance(field, str) else "__name__"
+        return self._copy(orders=self.orders + [(field, direction)])
+
+    def start_after(self, values: Dict[str, Any]):
+        if "__name__" in values and not values["__name__"]:
+            # Firestore rejects a reference to the collection itself
+            raise ValueError("start_after __name__ must be a document ID")
+        self.db.start_after_calls.append(dict(values))
+        return self._copy(start_after_values=dict(values))
+
+    def limit(self, count: int):
+        return self._copy(limit_value=count)
+
+    def select(self, field_paths: List[str]):
+        return self._copy(field_paths=list(field_paths))
+
+    def _key(self, doc_id: str, data: Dict[str, Any]):
+        key = []
+        for field, _ in self.orders:
+            value = doc_id if field == "__name__" else data[field]
+            key.append(_stored({"value": value})["value"])
+        return tuple(key)
+
+    def get(self) -> List[FakeSnapshot]:
+        self.db.count("query")
+        docs = [
+            (doc_id, data)
+            for doc_id, data in self.db.data.get(self.collection, {}).items()
+            if all(data.get(field) == value for field, value in self.filters)
+        ]
+        directions = {direction for _, direction in self.orders}
+        if len(directions) > 1:
+            raise NotImplementedError("Mixed fake query directions are unsupported")
+        descending = directions == {"DESCENDING"}
+        docs.sort(key=lambda item: self._key(*item), reverse=descending)
+        if self.start_after_values is not None:
+            fields = [field for field, _ in self.orders][: len(self.start_after_values)]
+            bound = self._key(
+                self.start_after_values.get("__name__", ""),
+                self.start_after_values,
+            )[: len(fields)]
+
+            def after(item) -> bool:
+                key = self._key(*item)[: len(fields)]
+                return key < bound if descending else key > bound
+
+            docs = [item for item in docs if after(item)]
+        if self.limit_value is not None:
+            docs = docs[: self.limit_value]
+        if self.field_paths is not None:
+            docs = [
+                (doc_id, {k: v for k, v in data.items() if k in self.field_paths})
+                for doc_id, data in docs
+            ]
+        return [FakeSnapshot(doc_id, data) for doc_id, data in docs]
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self.db, self.collection, doc_id)
+
+
+class FakeFirestore:
+    """Records every round trip in ``calls``"""
+
+    def __init__(self):
+        from google.api_core import exceptions
+
+        self.precondition_failed = exceptions.FailedPrecondition
+        self.not_found = exceptions.NotFound
+        self.data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.versions: Dict[Any, int] = {}
+        self.calls: List[str] = []
+        self.start_after_calls: List[Dict[str, Any]] = []
+        self._clock = 0
+
+    def count(self, operation: str):
+        self.calls.append(operation)
+
+    def bump(self, key):
+        self._clock += 1
+        self.versions[key] = self._clock
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def write_option(self, last_update_time=None):
+        return last_update_time
+
+    def get_all(self, refs):
+        self.count("get_all")
+        for ref in refs:
+            yield FakeSnapshot(ref.id, ref._docs.get(ref.id))
@@ -0,0 +1,195 @@
+import asyncio
+
+from app.core.cache import LocalCacheBackend
+from app.models import NoteBatchOperation, NoteCreate
+from app.repositories import (
+    InMemoryNotesRepository,
+    LocalContentStore,
+    OffloadingNotesRepository,
+)
+from app.services.notes import NotesService
+
+
+class FailingRepository(InMemoryNotesRepository):
+    """In-memory backend whose storage fails when updating one note"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_note_id = None
+
+    async def update(self, note_id, fields):
+        if note_id == self.fail_note_id:
+            raise RuntimeError("storage unavailable")
+        await super().update(note_id, fields)
+
+
+def _service(repository=None) -> NotesService:
+    service = NotesService(
+        repository=repository or InMemoryNotesRepository(),
+        cache_backend=LocalCacheBackend(100),
+    )
+    service.published = []
+    service._notify = lambda user_id, kind, note: service.published.append(
+        (kind, note["id"], note.get("content"))
+    )
+    return service
+
+
+async def _create(service, title, content="body", user_id="user-1"):
+    result = await service.create_note(
+        NoteCreate(title=title, content=content), user_id
+    )
+    return result.data.id
+
+
+def _op(op, note_id=None, **fields):
+    return NoteBatchOperation(op=op, note_id=note_id, **fields)
+
+
+async def _search_ids(service, query, user_id="user-1"):
+    result = await service.search_notes(user_id, query)
+    return sorted(match.id for match in result.data.results)
+
+
+async def _page_titles(service, user_id="user-1"):
+    page = (await service.get_user_notes(user_id)).data
+    return sorted(note.title for note in page.notes)
+
+
+def test_mixed_operations_apply_in_order():
+    async def scenario():
+        service = _service()
+        kept = await _create(service, "kept apple")
+        removed = await _create(service, "removed banana")
+        # Warm the cache and the search index
+        assert await _page_titles(service) == ["kept apple", "removed banana"]
+        assert await _search_ids(service, "banana") == [removed]
+        service.published.clear()
+
+        result = await service.batch_notes(
+            [
+                _op("create", title="new cherry", content="fresh"),
+                _op("update", kept, title="kept damson"),
+                _op("delete", removed),
+                _op("update", removed, title="too late"),
+            ],
+            "user-1",
+        )
+        return service, kept, removed, result
+
+    service, kept, removed, result = asyncio.run(scenario())
+
+    assert result.type, result.message
+    results = result.data.results
+    assert [r.type for r in results] == [True, True, True, False]
+    assert results[3].message == "Note not found"
+    created = results[0].note_id
+    assert results[1].data.content == "body"
+    assert [(kind, note_id) for kind, note_id, _ in service.published] == [
+        ("created", created),
+        ("updated", kept),
+        ("deleted", removed),
+    ]
+
+    async def after():
+        return (
+            await _page_titles(service),
+            await _search_ids(service, "banana"),
+            await _search_ids(service, "damson"),
+            await _search_ids(service, "cherry"),
+        )
+
+    titles, banana, damson, cherry = asyncio.run(after())
+    assert titles == ["kept damson", "new cherry"]
+    assert banana == []
+    assert damson == [kept]
+    assert cherry == [created]
+
+
+def test_ownership_failure_skips_only_that_operation():
+    async def scenario():
+        service = _service()
+        mine = await _create(service, "mine")
+        theirs = await _create(service, "theirs", user_id="user-2")
+
+        result = await service.batch_notes(
+            [
+                _op("update", mine, title="mine edited"),
+                _op("delete", theirs),
+                _op("create", title="another", content="body"),
+            ],
+            "user-1",
+        )
+        other = await service.get_note_by_id(theirs, "user-2")
+        return service, result, other
+
+    service, result, other = asyncio.run(scenario())
+
+    assert result.type
+    assert [r.type for r in result.data.results] == [True, False, True]
+    assert "permission" in result.data.results[1].message
+    assert other.data.title == "theirs"
+    assert asyncio.run(_page_titles(service)) == ["another", "mine edited"]
+
+
+def test_storage_failure_reports_stored_operations_and_invalidates():
+    async def scenario():
+        repository = FailingRepository()
+        service = _service(repository)
+        first = await _create(service, "first")
+        second = await _create(service, "second")
+        assert await _page_titles(service) == ["first", "second"]
+        assert (await service.get_note_by_id(first, "user-1")).data.title == "first"
+        service.published.clear()
+
+        repository.fail_note_id = second
+        result = await service.batch_notes(
+            [
+                _op("update", first, title="first stored"),
+                _op("update", second, title="second lost"),
+                _op("create", title="third lost", content="body"),
+            ],
+            "user-1",
+        )
+        note = await service.get_note_by_id(first, "user-1")
+        return service, first, result, note
+
+    service, first, result, note = asyncio.run(scenario())
+
+    assert not result.type
+    assert "storage unavailable" in result.message
+    assert [r.type for r in result.data.results] == [True, False, False]
+    assert result.data.results[1].message.startswith("Not applied")
+    # The stored update is visible despite the cached copies
+    assert note.data.title == "first stored"
+    assert asyncio.run(_page_titles(service)) == ["first stored", "second"]
+    assert [(kind, note_id) for kind, note_id, _ in service.published] == [
+        ("updated", first)
+    ]
+    assert asyncio.run(_search_ids(service, "stored")) == [first]
+    assert asyncio.run(_search_ids(service, "lost")) == []
+
+
+def test_title_update_keeps_offloaded_body(tmp_path):
+    body = "opening words " + "filler " * 100 + "closing zeppelin"
+
+    async def scenario():
+        repository = OffloadingNotesRepository(
+            InMemoryNotesRepository(), LocalContentStore(str(tmp_path)), 256
+        )
+        service = _service(repository)
+        note_id = await _create(service, "large", body)
+        service.published.clear()
+
+        result = await service.batch_notes(
+            [_op("update", note_id, title="renamed")], "user-1"
+        )
+        return service, note_id, result
+
+    service, note_id, result = asyncio.run(scenario())
+
+    updated = result.data.results[0].data
+    assert updated.content == body
+    assert not updated.content_truncated
+    assert service.published == [("updated", note_id, body)]
+    assert asyncio.run(_search_ids(service, "zeppelin")) == [note_id]
@@ -0,0 +1,173 @@
+import asyncio
+import json
+from datetime import datetime
+
+from app.core.config import Settings
+from app.repositories import (
+    InMemoryNotesRepository,
+    LocalContentStore,
+    OffloadingNotesRepository,
+    SNIPPET_LENGTH,
+)
+from app.services import notes
+from app.services.change_feed import (
+    HEARTBEAT_FRAME,
+    READY_FRAME,
+    RESYNC_FRAME,
+    ChangeHub,
+    sse_frame,
+)
+from app.services.notes import NotesService
+
+
+class RecordingSource:
+    """ChangeSource recording which users are watched"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def start(self, user_id):
+        self.calls.append(("start", user_id))
+
+    async def stop(self, user_id):
+        self.calls.append(("stop", user_id))
+
+
+class WatchingRepository(InMemoryNotesRepository):
+    """In-memory backend reporting its writes like a storage listener"""
+
+    def __init__(self):
+        super().__init__()
+        self.watchers = {}
+
+    def watch_user(self, user_id, on_change):
+        self.watchers[user_id] = on_change
+        return lambda: self.watchers.pop(user_id, None)
+
+    async def update(self, note_id, fields):
+        await super().update(note_id, fields)
+        note = await self.get(note_id)
+        watcher = self.watchers.get(note["user_id"])
+        if watcher is not None:
+            watcher("updated", note)
+
+
+def _frame(n: int) -> bytes:
+    return sse_frame("updated", json.dumps({"n": n}))
+
+
+def test_events_fan_out_to_every_stream_of_the_user():
+    async def scenario():
+        hub = ChangeHub(max_queue=10, max_per_user=5, heartbeat_seconds=5)
+        streams = [hub.events("user-1"), hub.events("user-1"), hub.events("user-2")]
+        ready = [await stream.__anext__() for stream in streams]
+
+        hub.publish("user-1", _frame(1))
+        received = [await stream.__anext__() for stream in streams[:2]]
+        # The other user's stream only hears its heartbeat
+        hub.heartbeat_seconds = 0.01
+        other = await streams[2].__anext__()
+
+        for stream in streams:
+            await stream.aclose()
+        return ready, received, other, hub.subscriber_count()
+
+    ready, received, other, remaining = asyncio.run(scenario())
+
+    assert ready == [READY_FRAME] * 3
+    assert received == [_frame(1)] * 2
+    assert other == HEARTBEAT_FRAME
+    assert remaining == 0
+
+
+def test_slow_stream_gets_a_resync_and_ends():
+    async def scenario():
+        hub = ChangeHub(max_queue=2, max_per_user=5, heartbeat_seconds=5)
+        stream = hub.events("user-1")
+        await stream.__anext__()
+        for n in range(3):
+            hub.publish("user-1", _frame(n))
+        frames = [frame async for frame in stream]
+        return frames, hub.subscriber_count("user-1")
+
+    frames, remaining = asyncio.run(scenario())
+
+    assert frames == [RESYNC_FRAME]
+    assert remaining == 0
+
+
+def test_streams_per_user_are_limited():
+    async def scenario():
+        hub = ChangeHub(max_queue=10, max_per_user=2, heartbeat_seconds=5)
+        first = await hub.subscribe("user-1")
+        second = await hub.subscribe("user-1")
+        third = await hub.subscribe("user-1")
+        other = await hub.subscribe("user-2")
+        return first, second, third, other
+
+    first, second, third, other = asyncio.run(scenario())
+
+    assert first is not None and second is not None
+    assert third is None
+    assert other is not None
+
+
+def test_source_watches_users_only_while_they_have_streams():
+    async def scenario():
+        source = RecordingSource()
+        hub = ChangeHub(
+            max_queue=10, max_per_user=5, heartbeat_seconds=5, source=source
+        )
+        first = await hub.subscribe("user-1")
+        second = await hub.subscribe("user-1")
+        hub.unsubscribe(first)
+        await asyncio.sleep(0)
+        watched_with_one = list(source.calls)
+        hub.unsubscribe(second)
+        await asyncio.sleep(0)
+        return watched_with_one, source.calls
+
+    watched_with_one, calls = asyncio.run(scenario())
+
+    assert watched_with_one == [("start", "user-1")]
+    assert calls == [("start", "user-1"), ("stop", "user-1")]
+
+
+def test_storage_events_mark_offloaded_content(monkeypatch, tmp_path):
+    settings = Settings(_env_file=None, change_feed_source="storage")
+    monkeypatch.setattr(notes, "get_settings", lambda: settings)
+    body = "offloaded body " * 50
+
+    async def scenario():
+        inner = WatchingRepository()
+        repository = OffloadingNotesRepository(
+            inner, LocalContentStore(str(tmp_path)), 256
+        )
+        service = NotesService(repository=repository)
+        service.cache = None
+        await repository.create(
+            {
+                "id": "n1",
+                "user_id": "user-1",
+                "title": "large",
+                "content": body,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        stream = service.open_change_stream("user-1")
+        await stream.__anext__()
+        await repository.update("n1", {"title": "renamed"})
+        frame = await asyncio.wait_for(stream.__anext__(), 1)
+        await stream.aclose()
+        await service.close()
+        return frame
+
+    frame = asyncio.run(scenario())
+
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    note = json.loads(fields["data"])
+    assert fields["event"] == "updated"
+    assert note["title"] == "renamed"
+    assert note["content"] == body[:SNIPPET_LENGTH]
+    assert note["content_truncated"] is True
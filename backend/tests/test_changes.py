@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.repositories import InMemoryNotesRepository
+from app.repositories.sqlite import SQLiteNotesRepository
+from app.services.notes import NotesService
+
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _note(note_id: str, minutes: int, user_id: str = "user-1"):
+    at = BASE + timedelta(minutes=minutes)
+    return {
+        "id": note_id,
+        "user_id": user_id,
+        "title": note_id,
+        "content": "c",
+        "created_at": at,
+        "updated_at": at,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_repository(request, tmp_path):
+    def make():
+        if request.param == "sqlite":
+            return SQLiteNotesRepository(str(tmp_path / "notes.db"))
+        return InMemoryNotesRepository()
+
+    return make
+
+
+async def _seed(repository):
+    for note_id, minutes in (("a", 0), ("b", 5), ("c", 10), ("d", 10)):
+        await repository.create(_note(note_id, minutes))
+    await repository.create(_note("other", 20, user_id="user-2"))
+    await repository.delete("d", "user-1", BASE + timedelta(minutes=15))
+    return repository
+
+
+def _sync(make_repository, since, limit=100):
+    async def scenario():
+        repository = await _seed(make_repository())
+        try:
+            service = NotesService(repository=repository)
+            return await service.get_note_changes("user-1", since=since, limit=limit)
+        finally:
+            await repository.close()
+
+    result = asyncio.run(scenario())
+    assert result.type, result.message
+    return result.data
+
+
+def test_plain_timestamp_cursor_is_strictly_later(make_repository):
+    changes = _sync(make_repository, (BASE + timedelta(minutes=5)).isoformat())
+
+    # "b" was updated exactly at the timestamp, so the client has it
+    assert [note.id for note in changes.notes] == ["c"]
+    assert [tombstone.id for tombstone in changes.deleted] == ["d"]
+
+
+def test_plain_timestamp_skips_every_note_at_it(make_repository):
+    changes = _sync(make_repository, (BASE + timedelta(minutes=10)).isoformat())
+
+    assert changes.notes == []
+    assert [tombstone.id for tombstone in changes.deleted] == ["d"]
+
+
+def test_cursor_from_a_previous_sync_keeps_the_tie_breaker(make_repository):
+    async def scenario():
+        repository = await _seed(make_repository())
+        try:
+            service = NotesService(repository=repository)
+            since = (BASE + timedelta(minutes=5)).isoformat()
+            first = await service.get_note_changes("user-1", since=since, limit=1)
+            second = await service.get_note_changes(
+                "user-1", since=first.data.next_cursor
+            )
+            return first.data, second.data
+        finally:
+            await repository.close()
+
+    first, second = asyncio.run(scenario())
+
+    # "c" and "d" share a timestamp; the page boundary falls between them
+    assert [note.id for note in first.notes] == ["c"]
+    assert first.has_more
+    assert second.notes == []
+    assert [tombstone.id for tombstone in second.deleted] == ["d"]
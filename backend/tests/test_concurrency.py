@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from app.core.concurrency import run_blocking
+from app.models import NoteCreate
+from app.repositories import InMemoryNotesRepository
+from app.services.notes import NotesService
+
+LATENCY = 0.2
+REQUESTS = 8
+
+
+class BlockingRepository(InMemoryNotesRepository):
+    """In-memory backend whose reads block like a synchronous client call"""
+
+    async def get(self, note_id):
+        await run_blocking(time.sleep, LATENCY)
+        return await super().get(note_id)
+
+
+def test_blocking_storage_calls_overlap():
+    async def scenario():
+        service = NotesService(repository=BlockingRepository())
+        service.cache = None
+        note_ids = []
+        for i in range(REQUESTS):
+            result = await service.create_note(
+                NoteCreate(title=f"Note {i}", content="body"), "user-1"
+            )
+            note_ids.append(result.data.id)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[service.get_note_by_id(note_id, "user-1") for note_id in note_ids]
+        )
+        elapsed = time.perf_counter() - start
+        ticking.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+
+    assert all(result.type for result in results)
+    # One after another would take REQUESTS * LATENCY
+    assert elapsed < LATENCY * REQUESTS / 2
+    # The event loop kept running other tasks while the calls blocked
+    assert ticks >= LATENCY / 0.01 / 2
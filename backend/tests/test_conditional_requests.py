@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.etag import list_etag, none_match, note_etag, parse_note_etag
+from app.main import app
+
+# Without a Firebase project any bearer token is the development user
+AUTH = {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _create(client, title="etag note", content="body"):
+    response = client.post(
+        "/api/notes", json={"title": title, "content": content}, headers=AUTH
+    )
+    assert response.status_code in (200, 201), response.text
+    return response.json()["data"]
+
+
+def test_note_etag_round_trips_its_version():
+    updated_at = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    etag = note_etag("n1", updated_at)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert parse_note_etag("n1", etag) == updated_at
+    # The same instant given with a timezone has the same ETag
+    aware = updated_at.replace(tzinfo=timezone.utc).astimezone(
+        timezone(timedelta(hours=3))
+    )
+    assert note_etag("n1", aware) == etag
+    assert note_etag("n1", updated_at + timedelta(microseconds=1)) != etag
+    # Another note's ETag, weak ETags and garbage stand for no version
+    assert parse_note_etag("n2", etag) is None
+    assert parse_note_etag("n1", "W/" + etag) is None
+    assert parse_note_etag("n1", '"zz-00"') is None
+
+
+def test_list_etag_changes_with_any_version():
+    at = datetime(2024, 5, 1)
+    page = [("a", at), ("b", at)]
+
+    assert list_etag(page) == list_etag(list(page))
+    assert list_etag(page) != list_etag([("a", at), ("b", at + timedelta(1))])
+    assert list_etag(page) != list_etag(page[:1])
+    assert list_etag(page, "summary") != list_etag(page, "full")
+
+
+def test_none_match_compares_weakly():
+    etag = '"abc"'
+
+    assert none_match(None, etag)
+    assert not none_match(etag, etag)
+    assert not none_match(f'"other", W/{etag}', etag)
+    assert not none_match("*", etag)
+    assert none_match('"other"', etag)
+
+
+def test_get_note_answers_if_none_match_with_304(client):
+    note = _create(client)
+    first = client.get(f"/api/notes/{note['id']}", headers=AUTH)
+    etag = first.headers["ETag"]
+
+    cached = client.get(
+        f"/api/notes/{note['id']}", headers={**AUTH, "If-None-Match": etag}
+    )
+    stale = client.get(
+        f"/api/notes/{note['id']}", headers={**AUTH, "If-None-Match": '"old"'}
+    )
+
+    assert first.status_code == 200
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+    assert stale.status_code == 200
+
+
+def test_list_etag_changes_when_a_note_changes(client):
+    _create(client)
+    first = client.get("/api/notes", headers=AUTH)
+    etag = first.headers["ETag"]
+
+    cached = client.get("/api/notes", headers={**AUTH, "If-None-Match": etag})
+    _create(client, title="another")
+    changed = client.get("/api/notes", headers={**AUTH, "If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_update_with_if_match_rejects_stale_versions(client):
+    note = _create(client)
+    etag = client.get(f"/api/notes/{note['id']}", headers=AUTH).headers["ETag"]
+
+    updated = client.put(
+        f"/api/notes/{note['id']}",
+        json={"title": "first edit"},
+        headers={**AUTH, "If-Match": etag},
+    )
+    stale = client.put(
+        f"/api/notes/{note['id']}",
+        json={"title": "lost edit"},
+        headers={**AUTH, "If-Match": etag},
+    )
+    current = client.get(f"/api/notes/{note['id']}", headers=AUTH)
+
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    assert updated.headers["ETag"] == current.headers["ETag"]
+    assert stale.status_code == 412
+    assert current.json()["data"]["title"] == "first edit"
+
+
+def test_large_responses_are_gzipped_for_clients_that_accept_it(client):
+    note = _create(client, content="compressible " * 500)
+    path = f"/api/notes/{note['id']}"
+
+    compressed = client.get(path, headers={**AUTH, "Accept-Encoding": "gzip"})
+    plain = client.get(path, headers={**AUTH, "Accept-Encoding": "identity"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    # The client decompresses transparently
+    assert compressed.json() == plain.json()
+
+
+def test_small_responses_are_not_gzipped(client):
+    note = _create(client, content="short")
+
+    response = client.get(
+        f"/api/notes/{note['id']}", headers={**AUTH, "Accept-Encoding": "gzip"}
+    )
+
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,235 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.repositories import (
+    InMemoryNotesRepository,
+    LocalContentStore,
+    OffloadingNotesRepository,
+    PartialWriteError,
+    SNIPPET_LENGTH,
+)
+
+INLINE_MAX_BYTES = 300
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+LARGE = "large body " * 50
+
+
+class FailingInner(InMemoryNotesRepository):
+    """In-memory backend whose storage fails when updating one note"""
+
+    fail_note_id = None
+
+    async def update(self, note_id, fields):
+        if note_id == self.fail_note_id:
+            raise RuntimeError("storage unavailable")
+        await super().update(note_id, fields)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return OffloadingNotesRepository(
+        FailingInner(), LocalContentStore(str(tmp_path)), INLINE_MAX_BYTES
+    )
+
+
+def _note(note_id: str, content: str, user_id: str = "user-1", minutes: int = 0):
+    at = BASE + timedelta(minutes=minutes)
+    return {
+        "id": note_id,
+        "user_id": user_id,
+        "title": note_id,
+        "content": content,
+        "created_at": at,
+        "updated_at": at,
+    }
+
+
+def _bodies(tmp_path, note_id: str):
+    """Body versions on disk for a note"""
+    directory = tmp_path / note_id
+    return (
+        sorted(path.name for path in directory.iterdir()) if directory.exists() else []
+    )
+
+
+def test_only_content_over_the_limit_is_offloaded(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("at-limit", "a" * INLINE_MAX_BYTES))
+        # 150 characters, but 300 bytes plus one as UTF-8
+        await repository.create(_note("multibyte", "é" * 150 + "a"))
+        return (
+            await repository.inner.get("at-limit"),
+            await repository.inner.get("multibyte"),
+        )
+
+    at_limit, multibyte = asyncio.run(scenario())
+
+    assert "content_offloaded" not in at_limit
+    assert _bodies(tmp_path, "at-limit") == []
+    assert multibyte["content_offloaded"] is True
+    assert len(_bodies(tmp_path, "multibyte")) == 1
+
+
+def test_large_bodies_are_stored_outside_the_document(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        return await repository.inner.get("n1"), await repository.get("n1")
+
+    stored, loaded = asyncio.run(scenario())
+
+    assert stored["content"] == LARGE[:SNIPPET_LENGTH]
+    assert stored["content_length"] == len(LARGE)
+    assert _bodies(tmp_path, "n1") == [stored["content_key"]]
+    assert loaded["content"] == LARGE
+    assert "content_key" not in loaded and "content_offloaded" not in loaded
+    assert not loaded.get("content_truncated")
+
+
+def test_listings_return_previews_and_iteration_loads_bodies(repository):
+    async def scenario():
+        await repository.create(_note("large", LARGE, minutes=1))
+        await repository.create(_note("small", "small body", minutes=0))
+        page, _ = await repository.list_by_user("user-1", 10)
+        many = await repository.get_many(["large", "small"])
+        iterated = [note async for note in repository.iter_by_user("user-1", 1)]
+        return page, many, iterated
+
+    page, many, iterated = asyncio.run(scenario())
+
+    assert [(n["id"], n.get("content_truncated", False)) for n in page] == [
+        ("large", True),
+        ("small", False),
+    ]
+    assert page[0]["content"] == LARGE[:SNIPPET_LENGTH]
+    assert {n["id"]: n.get("content_truncated", False) for n in many} == {
+        "large": True,
+        "small": False,
+    }
+    assert [(n["id"], n["content"]) for n in iterated] == [
+        ("large", LARGE),
+        ("small", "small body"),
+    ]
+
+
+def test_missing_body_falls_back_to_the_preview(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        for path in (tmp_path / "n1").iterdir():
+            path.unlink()
+        return await repository.get("n1")
+
+    loaded = asyncio.run(scenario())
+
+    assert loaded["content"] == LARGE[:SNIPPET_LENGTH]
+    assert loaded["content_truncated"] is True
+
+
+def test_update_owned_replaces_the_previous_body(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        first = (await repository.inner.get("n1"))["content_key"]
+        merged = await repository.update_owned("n1", "user-1", {"content": LARGE * 2})
+        second = (await repository.inner.get("n1"))["content_key"]
+        renamed = await repository.update_owned("n1", "user-1", {"title": "renamed"})
+        return first, second, merged, renamed, await repository.get("n1")
+
+    first, second, merged, renamed, loaded = asyncio.run(scenario())
+
+    assert first != second
+    assert _bodies(tmp_path, "n1") == [second]
+    assert merged["content"] == LARGE * 2
+    # A title change loads the body it kept
+    assert renamed["content"] == LARGE * 2
+    assert loaded["content"] == LARGE * 2
+
+
+def test_small_update_keeps_the_note_inline(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        await repository.update_owned("n1", "user-1", {"content": "short now"})
+        await repository.update_owned("n1", "user-1", {"content": LARGE})
+        return await repository.get("n1"), (await repository.inner.get("n1"))
+
+    loaded, stored = asyncio.run(scenario())
+
+    assert loaded["content"] == LARGE
+    # The body left behind by the small update went with the next large one
+    assert _bodies(tmp_path, "n1") == [stored["content_key"]]
+
+
+def test_failed_update_discards_the_new_body(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        key = (await repository.inner.get("n1"))["content_key"]
+        repository.inner.fail_note_id = "n1"
+        with pytest.raises(RuntimeError):
+            await repository.apply_writes([("update", "n1", {"content": LARGE * 2})])
+        return key, await repository.get("n1")
+
+    key, loaded = asyncio.run(scenario())
+
+    assert _bodies(tmp_path, "n1") == [key]
+    assert loaded["content"] == LARGE
+
+
+def test_apply_writes_keeps_only_the_last_body_of_each_note(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("kept", LARGE))
+        await repository.create(_note("gone", LARGE))
+        await repository.apply_writes(
+            [
+                ("create", "new", _note("new", LARGE)),
+                ("update", "new", {"content": LARGE + "second"}),
+                ("update", "kept", {"content": LARGE + "first"}),
+                ("update", "kept", {"content": LARGE + "second"}),
+                ("delete", "gone", {"user_id": "user-1", "deleted_at": BASE}),
+            ]
+        )
+        return {
+            note_id: await repository.inner.get(note_id) for note_id in ("new", "kept")
+        }, await repository.get("kept")
+
+    stored, kept = asyncio.run(scenario())
+
+    assert _bodies(tmp_path, "new") == [stored["new"]["content_key"]]
+    assert _bodies(tmp_path, "kept") == [stored["kept"]["content_key"]]
+    assert _bodies(tmp_path, "gone") == []
+    assert kept["content"] == LARGE + "second"
+
+
+def test_partly_stored_batch_keeps_bodies_of_stored_writes(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("stored", "small"))
+        await repository.create(_note("failed", "small"))
+        repository.inner.fail_note_id = "failed"
+        with pytest.raises(PartialWriteError):
+            await repository.apply_writes(
+                [
+                    ("update", "stored", {"content": LARGE}),
+                    ("update", "failed", {"content": LARGE}),
+                ]
+            )
+        return await repository.get("stored"), await repository.get("failed")
+
+    stored, failed = asyncio.run(scenario())
+
+    assert stored["content"] == LARGE
+    assert len(_bodies(tmp_path, "stored")) == 1
+    assert failed["content"] == "small"
+    assert _bodies(tmp_path, "failed") == []
+
+
+def test_delete_removes_every_body_version(repository, tmp_path):
+    async def scenario():
+        await repository.create(_note("n1", LARGE))
+        await repository.update_owned("n1", "user-1", {"content": "short"})
+        await repository.create(_note("n2", LARGE))
+        await repository.delete("n1", "user-1", BASE)
+        await repository.delete_owned("n2", "user-1", BASE)
+        return await repository.get("n1"), await repository.get("n2")
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert _bodies(tmp_path, "n1") == []
+    assert _bodies(tmp_path, "n2") == []
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.repositories.firestore import FirestoreNotesRepository
+from app.services.notes import NotesService
+
+from .fake_firestore import FakeFirestore
+
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _note(note_id: str, minutes: int, user_id: str = "user-1"):
+    at = BASE + timedelta(minutes=minutes)
+    return {
+        "id": note_id,
+        "user_id": user_id,
+        "title": note_id,
+        "content": "c",
+        "created_at": at,
+        "updated_at": at,
+    }
+
+
+async def _seed(db: FakeFirestore) -> FirestoreNotesRepository:
+    repository = FirestoreNotesRepository(db)
+    for note_id, minutes in (("a", 0), ("b", 5), ("c", 10)):
+        await repository.create(_note(note_id, minutes))
+    await repository.create(_note("other", 20, user_id="user-2"))
+    await repository.delete("c", "user-1", BASE + timedelta(minutes=15))
+    return repository
+
+
+def test_plain_timestamp_cursor_omits_the_document_name():
+    async def scenario():
+        db = FakeFirestore()
+        service = NotesService(repository=await _seed(db))
+        since = (BASE + timedelta(minutes=5)).isoformat()
+        return db, await service.get_note_changes("user-1", since=since)
+
+    db, result = asyncio.run(scenario())
+
+    assert result.type, result.message
+    # Strictly after the timestamp: "b" was updated exactly at it
+    assert [note.id for note in result.data.notes] == []
+    assert [tombstone.id for tombstone in result.data.deleted] == ["c"]
+    assert all("__name__" not in values for values in db.start_after_calls)
+
+
+def test_cursor_from_a_previous_sync_keeps_the_tie_breaker():
+    async def scenario():
+        db = FakeFirestore()
+        service = NotesService(repository=await _seed(db))
+        first = await service.get_note_changes(
+            "user-1", since=(BASE - timedelta(minutes=1)).isoformat(), limit=1
+        )
+        second = await service.get_note_changes("user-1", since=first.data.next_cursor)
+        return db, first, second
+
+    db, first, second = asyncio.run(scenario())
+
+    assert [note.id for note in first.data.notes] == ["a"]
+    assert first.data.has_more
+    assert [note.id for note in second.data.notes] == ["b"]
+    assert [tombstone.id for tombstone in second.data.deleted] == ["c"]
+    assert db.start_after_calls[-1]["__name__"] == "a"
@@ -0,0 +1,220 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.etag import note_etag
+from app.models import NoteCreate, NoteUpdate
+from app.repositories import PartialWriteError
+from app.repositories import firestore as firestore_module
+from app.repositories.firestore import FirestoreNotesRepository
+from app.services.notes import NotesService
+
+from .fake_firestore import FakeBatch, FakeFirestore
+
+
+def _service(db: FakeFirestore) -> NotesService:
+    service = NotesService(repository=FirestoreNotesRepository(db))
+    service.cache = None
+    return service
+
+
+async def _create(service: NotesService, user_id: str = "user-1") -> str:
+    result = await service.create_note(NoteCreate(title="t", content="c"), user_id)
+    return result.data.id
+
+
+def test_update_costs_a_read_and_a_conditional_write():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        note_id = await _create(service)
+        db.calls.clear()
+        result = await service.update_note(note_id, NoteUpdate(title="new"), "user-1")
+        return db, result
+
+    db, result = asyncio.run(scenario())
+
+    assert result.type
+    assert result.data.title == "new"
+    assert result.data.content == "c"
+    # No read after the write: the response is built from the merged data
+    assert db.calls == ["get", "update"]
+
+
+def test_update_with_if_match_adds_no_round_trip():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        note_id = await _create(service)
+        stored = (await service.get_note_by_id(note_id, "user-1")).data
+        db.calls.clear()
+        result = await service.update_note(
+            note_id,
+            NoteUpdate(title="new"),
+            "user-1",
+            if_match=note_etag(note_id, stored.updated_at),
+        )
+        return db, result
+
+    db, result = asyncio.run(scenario())
+
+    assert result.type, result.message
+    assert db.calls == ["get", "update"]
+
+
+def test_stale_if_match_is_refused_after_one_read():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        note_id = await _create(service)
+        db.calls.clear()
+        result = await service.update_note(
+            note_id,
+            NoteUpdate(title="new"),
+            "user-1",
+            if_match=note_etag(note_id, datetime(2000, 1, 1)),
+        )
+        return db, result
+
+    db, result = asyncio.run(scenario())
+
+    assert not result.type and "precondition" in result.message
+    assert db.calls == ["get"]
+
+
+def test_delete_costs_a_read_and_one_batch():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        note_id = await _create(service)
+        db.calls.clear()
+        return db, await service.delete_note(note_id, "user-1")
+
+    db, result = asyncio.run(scenario())
+
+    assert result.type
+    # The note removal and its tombstone go in one commit
+    assert db.calls == ["get", "commit"]
+
+
+def test_other_users_writes_are_refused_after_one_read():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        note_id = await _create(service)
+        db.calls.clear()
+        update = await service.update_note(note_id, NoteUpdate(title="x"), "user-2")
+        delete = await service.delete_note(note_id, "user-2")
+        return db, update, delete
+
+    db, update, delete = asyncio.run(scenario())
+
+    assert not update.type and "permission" in update.message
+    assert not delete.type and "permission" in delete.message
+    assert db.calls == ["get", "get"]
+
+
+def test_concurrent_change_retries_the_conditional_write():
+    async def scenario():
+        db = FakeFirestore()
+        repository = FirestoreNotesRepository(db)
+        now = datetime.utcnow()
+        await repository.create(
+            {
+                "id": "n1",
+                "user_id": "user-1",
+                "title": "t",
+                "content": "c",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        ref = db.collection("notes").document("n1")
+        original_update = ref.__class__._update
+        raced = []
+
+        def racing_update(self, data, option=None):
+            if not raced:
+                # Another writer lands between the read and the write
+                raced.append(True)
+                db.bump((self.collection, self.id))
+            return original_update(self, data, option)
+
+        ref.__class__._update = racing_update
+        try:
+            db.calls.clear()
+            merged = await repository.update_owned("n1", "user-1", {"title": "new"})
+        finally:
+            ref.__class__._update = original_update
+        return db, merged
+
+    db, merged = asyncio.run(scenario())
+
+    assert merged["title"] == "new"
+    assert db.calls == ["get", "update", "get", "update"]
+
+
+def test_failed_chunk_reports_the_writes_already_committed(monkeypatch):
+    class FailingBatch(FakeBatch):
+        def commit(self):
+            if self.db.calls.count("commit") == 1:
+                raise RuntimeError("commit failed")
+            super().commit()
+
+    monkeypatch.setattr(firestore_module, "MAX_BATCH_WRITES", 2)
+    db = FakeFirestore()
+    db.batch = lambda: FailingBatch(db)
+    repository = FirestoreNotesRepository(db)
+    now = datetime.utcnow()
+    writes = [
+        (
+            "create",
+            f"n{i}",
+            {
+                "id": f"n{i}",
+                "user_id": "user-1",
+                "title": "t",
+                "content": "c",
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        for i in range(5)
+    ]
+
+    with pytest.raises(PartialWriteError) as raised:
+        asyncio.run(repository.apply_writes(writes))
+
+    assert raised.value.applied == 2
+    assert sorted(db.data["notes"]) == ["n0", "n1"]
+
+
+def test_summaries_of_older_notes_are_computed_in_one_round_trip():
+    async def scenario():
+        db = FakeFirestore()
+        service = _service(db)
+        new_id = await _create(service)
+        # Written before snippets and lengths were stored on the document
+        db.data["notes"]["old"] = {
+            "id": "old",
+            "user_id": "user-1",
+            "title": "old",
+            "content": "older body",
+            "created_at": datetime(2020, 1, 1),
+            "updated_at": datetime(2020, 1, 1),
+        }
+        db.calls.clear()
+        result = await service.get_user_notes("user-1", view="summary")
+        return db, new_id, result
+
+    db, new_id, result = asyncio.run(scenario())
+
+    assert result.type, result.message
+    assert [(n.id, n.snippet, n.content_length) for n in result.data.notes] == [
+        (new_id, "c", 1),
+        ("old", "older body", 10),
+    ]
+    # Only the older note is fetched in full
+    assert db.calls == ["query", "get_all"]
+    assert "snippet" not in db.data["notes"]["old"]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import NoteCreate
+from app.repositories import InMemoryNotesRepository
+from app.services import notes
+from app.services.notes import NotesService
+
+AUTH = {"Authorization": "Bearer test-token"}
+
+
+def _service() -> NotesService:
+    service = NotesService(repository=InMemoryNotesRepository())
+    service.cache = None
+    return service
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _export(service, user_id):
+    return [note async for note in service.export_notes(user_id)]
+
+
+async def _import(service, user_id, *parts: bytes):
+    return await service.import_notes(_chunks(*parts), user_id)
+
+
+def test_export_then_import_round_trips_notes():
+    async def scenario():
+        service = _service()
+        for i in range(3):
+            await service.create_note(
+                NoteCreate(title=f"Note {i}", content=f"Body {i} ✓"), "user-1"
+            )
+        exported = await _export(service, "user-1")
+        ndjson = b"".join(note.model_dump_json().encode() + b"\n" for note in exported)
+        # Split mid-line, as a network upload would arrive
+        result = await _import(service, "user-2", ndjson[:25], ndjson[25:])
+        return exported, result, await _export(service, "user-2")
+
+    exported, result, imported = asyncio.run(scenario())
+
+    assert result.type, result.message
+    assert (result.data.imported, result.data.failed) == (3, 0)
+    assert [(n.title, n.content, n.created_at) for n in imported] == [
+        (n.title, n.content, n.created_at) for n in exported
+    ]
+    assert {n.user_id for n in imported} == {"user-2"}
+    assert not {n.id for n in imported} & {n.id for n in exported}
+
+
+def test_malformed_lines_are_reported_and_skipped():
+    lines = [
+        b'{"title": "good", "content": "kept"}',
+        b"not json",
+        b'{"title": "no content"}',
+        b"",
+        b'{"title": "", "content": "empty title"}',
+        b'{"title": "dated", "content": "c", "created_at": "2020-01-02T03:04:05Z"}',
+    ]
+
+    async def scenario():
+        service = _service()
+        result = await _import(service, "user-1", b"\n".join(lines))
+        return result, await _export(service, "user-1")
+
+    result, imported = asyncio.run(scenario())
+
+    assert result.type
+    assert (result.data.imported, result.data.failed) == (2, 3)
+    assert [error.line for error in result.data.errors] == [2, 3, 5]
+    assert all(error.message.startswith("Invalid note") for error in result.data.errors)
+    assert sorted(n.title for n in imported) == ["dated", "good"]
+    dated = next(n for n in imported if n.title == "dated")
+    assert dated.created_at == datetime(2020, 1, 2, 3, 4, 5)
+
+
+def test_import_limits(monkeypatch):
+    monkeypatch.setattr(notes, "MAX_IMPORT_LINE_BYTES", 100)
+    monkeypatch.setattr(notes, "MAX_IMPORT_ERRORS", 2)
+    monkeypatch.setattr(notes, "IMPORT_BATCH_SIZE", 2)
+    long_line = json.dumps({"title": "long", "content": "x" * 200}).encode()
+
+    async def scenario():
+        service = _service()
+        service.max_content_bytes = 30
+        writes = []
+        apply_writes = service.repository.apply_writes
+
+        async def counting(batch):
+            writes.append(len(batch))
+            await apply_writes(batch)
+
+        service.repository.apply_writes = counting
+        result = await _import(
+            service,
+            "user-1",
+            # The long line arrives over several chunks
+            long_line[:60],
+            long_line[60:] + b"\n",
+            b'{"title": "big", "content": "' + b"y" * 40 + b'"}\n',
+            b"".join(b'{"title": "n%d", "content": "ok"}\n' % i for i in range(5)),
+            b"garbage\n",
+        )
+        return result, writes
+
+    result, writes = asyncio.run(scenario())
+
+    assert result.type
+    assert (result.data.imported, result.data.failed) == (5, 3)
+    # Only the first errors are listed
+    assert [(e.line, e.message) for e in result.data.errors] == [
+        (1, "Line is too long"),
+        (2, "Note content exceeds the maximum size of 30 bytes"),
+    ]
+    assert writes == [2, 2, 1]
+
+
+def test_http_export_and_import():
+    with TestClient(app) as client:
+        client.post(
+            "/api/notes", json={"title": "exported", "content": "body"}, headers=AUTH
+        )
+        exported = client.get("/api/notes/export", headers=AUTH)
+        lines = exported.content.splitlines()
+        imported = client.post(
+            "/api/notes/import", content=exported.content, headers=AUTH
+        )
+
+    assert exported.headers["content-type"].startswith("application/x-ndjson")
+    assert "exported" in {json.loads(line)["title"] for line in lines}
+    assert imported.status_code == 200
+    assert imported.json()["data"]["imported"] == len(lines)
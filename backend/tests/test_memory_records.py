@@ -0,0 +1,137 @@
+import asyncio
+import gc
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from app.models import NoteCreate, NoteUpdate
+from app.repositories import InMemoryNotesRepository
+from app.repositories.memory import NoteRecord
+from app.services.notes import NotesService
+
+BASE = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+
+def _doc(i: int, **fields):
+    # Fresh user_id strings, as each request decodes its own
+    return {
+        "id": f"note-{i}",
+        "user_id": "".join(("user-", str(i % 3))),
+        "title": f"Note {i}",
+        "content": f"Body {i} " * 20,
+        "created_at": BASE + timedelta(microseconds=i),
+        "updated_at": BASE + timedelta(seconds=1, microseconds=i),
+        **fields,
+    }
+
+
+def _traced_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        del kept
+        return used
+    finally:
+        tracemalloc.stop()
+
+
+def test_records_take_less_memory_than_dicts():
+    # Short text, so the comparison is of what each layout adds to it
+    dict_bytes = _traced_bytes(lambda: [_doc(i, content="") for i in range(2000)])
+    record_bytes = _traced_bytes(
+        lambda: [NoteRecord(_doc(i, content="")) for i in range(2000)]
+    )
+
+    assert record_bytes < dict_bytes * 0.6
+
+
+def test_user_ids_are_interned():
+    first = NoteRecord(_doc(0))
+    second = NoteRecord(_doc(3))
+
+    assert first.user_id == second.user_id == "user-0"
+    assert first.user_id is second.user_id
+
+
+def test_round_trips_fields_and_timestamps():
+    aware = datetime(
+        2024, 5, 1, 14, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2))
+    )
+    record = NoteRecord(_doc(1, created_at=aware, updated_at=aware))
+
+    note = record.to_dict()
+
+    assert note == {
+        **_doc(1),
+        "created_at": BASE,
+        "updated_at": BASE,
+    }
+    assert note["created_at"].tzinfo is None
+    assert record.extra is None
+
+
+def test_keeps_extra_fields():
+    record = NoteRecord(_doc(1, content_key="note-1/v1", content_offloaded=True))
+    assert record.extra == {"content_key": "note-1/v1", "content_offloaded": True}
+
+    later = BASE + timedelta(minutes=5)
+    record.update({"title": "Renamed", "updated_at": later, "content_key": "note-1/v2"})
+    note = record.to_dict()
+
+    assert note["title"] == "Renamed"
+    assert note["updated_at"] == later
+    assert note["content_key"] == "note-1/v2"
+    assert note["content_offloaded"] is True
+    assert note["created_at"] == _doc(1)["created_at"]
+
+    # Extra fields reach records created without any
+    plain = NoteRecord(_doc(2))
+    plain.update({"content_offloaded": False})
+    assert plain.to_dict()["content_offloaded"] is False
+
+
+def test_reads_return_fresh_dicts():
+    async def scenario():
+        repository = InMemoryNotesRepository()
+        await repository.create(_doc(1, content_key="k"))
+
+        note = await repository.get("note-1")
+        note["title"] = "Changed"
+        note["content_key"] = "other"
+
+        assert await repository.get("note-1") == _doc(1, content_key="k")
+
+    asyncio.run(scenario())
+
+
+def test_service_reads_match_created_notes():
+    async def scenario():
+        service = NotesService(repository=InMemoryNotesRepository())
+        service.cache = None
+        created = []
+        for i in range(3):
+            result = await service.create_note(
+                NoteCreate(title=f"Note {i}", content=f"Body {i}"), "user-1"
+            )
+            created.append(result.data)
+        await service.update_note(created[0].id, NoteUpdate(title="Renamed"), "user-1")
+
+        fetched = (await service.get_note_by_id(created[0].id, "user-1")).data
+        assert fetched.title == "Renamed"
+        assert fetched.content == "Body 0"
+        assert fetched.created_at == created[0].created_at
+        assert fetched.updated_at >= created[0].updated_at
+
+        page = (await service.get_user_notes("user-1")).data
+        assert [note.id for note in page.notes] == [
+            note.id for note in reversed(created)
+        ]
+        assert page.notes[1] == created[1]
+
+        denied = await service.get_note_by_id(created[1].id, "user-2")
+        assert denied.type is False
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.cache import LocalCacheBackend, create_cache_backend
+from app.core.config import Settings
+from app.repositories import InMemoryNotesRepository
+from app.services.notes import NotesService
+
+
+class SharedBackend(LocalCacheBackend):
+    """Stands in for a backend shared by every worker"""
+
+
+def shared_backend(settings):
+    return SharedBackend(settings.note_cache_max_entries)
+
+
+def _settings(**values) -> Settings:
+    return Settings(_env_file=None, **values)
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_auto_caches_locally_with_one_worker(workers):
+    backend = create_cache_backend(_settings(workers=workers))
+    assert isinstance(backend, LocalCacheBackend)
+
+
+def test_auto_disables_the_local_cache_with_several_workers():
+    assert create_cache_backend(_settings(workers=4)) is None
+
+
+def test_shared_backend_is_built_from_its_factory_path():
+    backend = create_cache_backend(
+        _settings(workers=4, note_cache_backend=f"{__name__}:shared_backend")
+    )
+    assert isinstance(backend, SharedBackend)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_cache_backend(_settings(note_cache_backend="memcached"))
+
+
+def test_service_runs_uncached_with_several_workers(monkeypatch):
+    from app.services import notes
+
+    monkeypatch.setattr(notes, "get_settings", lambda: _settings(workers=4))
+    service = NotesService(repository=InMemoryNotesRepository())
+    assert service.cache is None
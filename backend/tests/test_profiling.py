@@ -0,0 +1,107 @@
+from typing import Optional
+
+import pytest
+from fastapi import Depends, FastAPI, Header
+from fastapi.testclient import TestClient
+
+from app.api.dependencies.auth import get_current_user
+from app.core import profiling
+from app.models.common import ServiceResponse
+from app.services.auth import verify_token
+
+USERS = {
+    "admin-token": {"uid": "admin-1", "firebase": {"admin": True}},
+    "user-token": {"uid": "user-1", "firebase": {}},
+}
+
+
+class CountingProfile:
+    """cProfile.Profile stand-in recording how often profiling started"""
+
+    started = 0
+
+    def enable(self):
+        CountingProfile.started += 1
+
+    def disable(self):
+        pass
+
+    def dump_stats(self, path: str):
+        with open(path, "w") as output:
+            output.write("profile")
+
+
+async def _verify(authorization: Optional[str] = Header(None)):
+    user = USERS.get((authorization or "").removeprefix("Bearer "))
+    if user is None:
+        return ServiceResponse(type=False, message="Invalid token")
+    return ServiceResponse(type=True, message="ok", data=user)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.cProfile, "Profile", CountingProfile)
+    CountingProfile.started = 0
+
+    app = FastAPI()
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        slow_request_seconds=0,
+        profiling_enabled=True,
+        output_dir=str(tmp_path),
+    )
+    app.dependency_overrides[verify_token] = _verify
+
+    @app.get("/me")
+    async def me(user: dict = Depends(get_current_user)):
+        return {"uid": user["uid"]}
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _get(client, token: Optional[str] = None, profile: bool = True):
+    headers = {"X-Debug-Profile": "1"} if profile else {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return client.get("/me", headers=headers)
+
+
+def test_unauthenticated_requests_are_not_profiled(client, tmp_path):
+    response = _get(client)
+
+    assert response.status_code == 401
+    assert "x-profile-report" not in response.headers
+    assert CountingProfile.started == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_non_admin_requests_are_not_profiled(client, tmp_path):
+    response = _get(client, "user-token")
+
+    assert response.status_code == 200
+    assert "x-profile-report" not in response.headers
+    assert CountingProfile.started == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_admin_requests_are_profiled(client, tmp_path):
+    response = _get(client, "admin-token")
+
+    assert response.status_code == 200
+    report = response.headers["x-profile-report"]
+    assert (tmp_path / report).read_text() == "profile"
+    assert CountingProfile.started == 1
+    assert not profiling._profiler_active
+
+    # The next profile can start once this one is written
+    assert "x-profile-report" in _get(client, "admin-token").headers
+    assert CountingProfile.started == 2
+
+
+def test_admin_requests_without_the_header_are_not_profiled(client):
+    response = _get(client, "admin-token", profile=False)
+
+    assert response.status_code == 200
+    assert "x-profile-report" not in response.headers
+    assert CountingProfile.started == 0
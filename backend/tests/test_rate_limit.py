@@ -0,0 +1,160 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import rate_limit
+from app.api.dependencies.auth import get_current_user
+from app.core.rate_limit import AdmissionMiddleware, LocalRateLimitStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_a_burst_then_refills():
+    async def scenario():
+        clock = FakeClock()
+        store = LocalRateLimitStore(max_keys=10, clock=clock)
+        waits = [await store.acquire("user-1", rate=2, burst=3) for _ in range(4)]
+        other = await store.acquire("user-2", rate=2, burst=3)
+        clock.now += 0.25
+        half_refilled = await store.acquire("user-1", rate=2, burst=3)
+        clock.now += 0.5
+        refilled = await store.acquire("user-1", rate=2, burst=3)
+        return waits, other, half_refilled, refilled
+
+    waits, other, half_refilled, refilled = asyncio.run(scenario())
+
+    assert waits == [0, 0, 0, 0.5]
+    assert other == 0
+    assert half_refilled == pytest.approx(0.25)
+    assert refilled == 0
+
+
+def test_forgotten_users_start_from_a_full_bucket():
+    async def scenario():
+        store = LocalRateLimitStore(max_keys=1, clock=FakeClock())
+        first = await store.acquire("user-1", rate=1, burst=1)
+        limited = await store.acquire("user-1", rate=1, burst=1)
+        await store.acquire("user-2", rate=1, burst=1)
+        return first, limited, await store.acquire("user-1", rate=1, burst=1)
+
+    assert asyncio.run(scenario()) == (0, 1, 0)
+
+
+def test_empty_bucket_answers_429_with_retry_after(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(
+        rate_limit, "rate_limit_store", LocalRateLimitStore(10, clock=clock)
+    )
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_per_second", 0.4)
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_burst", 2)
+
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {"uid": "user-1"}
+
+    @app.get("/limited", dependencies=[Depends(rate_limit.enforce_rate_limit)])
+    async def limited():
+        return {}
+
+    with TestClient(app) as client:
+        statuses = [client.get("/limited").status_code for _ in range(2)]
+        rejected = client.get("/limited")
+        clock.now += 2.5
+        refilled = client.get("/limited")
+
+    assert statuses == [200, 200]
+    assert rejected.status_code == 429
+    # 2.5 seconds until the next token, rounded up
+    assert rejected.headers["Retry-After"] == "3"
+    assert refilled.status_code == 200
+
+
+def _admission_app(**limits):
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    app.add_middleware(AdmissionMiddleware, retry_after=7, **limits)
+    return app, release
+
+
+def test_admission_sheds_load_with_503():
+    async def scenario():
+        app, release = _admission_app(max_concurrent=1, max_queue=0, queue_timeout=1)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            held = asyncio.create_task(client.get("/api/slow"))
+            await asyncio.sleep(0.05)
+            rejected = await client.get("/api/slow")
+            health = await client.get("/health")
+            release.set()
+            return (await held), rejected, health
+
+    held, rejected, health = asyncio.run(scenario())
+
+    assert held.status_code == 200
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "7"
+    assert rejected.json()["type"] is False
+    # Paths outside the API prefix are never limited
+    assert health.status_code == 200
+
+
+def test_admission_queues_bursts_briefly():
+    async def scenario():
+        app, release = _admission_app(max_concurrent=1, max_queue=1, queue_timeout=1)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            held = asyncio.create_task(client.get("/api/slow"))
+            await asyncio.sleep(0.05)
+            queued = asyncio.create_task(client.get("/api/slow"))
+            await asyncio.sleep(0.05)
+            # The queue is full, so the next request is turned away
+            overflow = await client.get("/api/slow")
+            release.set()
+            return (await held), (await queued), overflow
+
+    held, queued, overflow = asyncio.run(scenario())
+
+    assert (held.status_code, queued.status_code) == (200, 200)
+    assert overflow.status_code == 503
+
+
+def test_queued_requests_time_out_with_503():
+    async def scenario():
+        app, release = _admission_app(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            held = asyncio.create_task(client.get("/api/slow"))
+            await asyncio.sleep(0.05)
+            timed_out = await client.get("/api/slow")
+            release.set()
+            return (await held), timed_out
+
+    held, timed_out = asyncio.run(scenario())
+
+    assert held.status_code == 200
+    assert timed_out.status_code == 503
@@ -0,0 +1,141 @@
+import asyncio
+
+from app.models import NoteCreate, NoteUpdate
+from app.repositories import InMemoryNotesRepository
+from app.services.notes import NotesService
+from app.services.search import SearchIndex
+
+
+class CountingRepository(InMemoryNotesRepository):
+    """In-memory backend counting full collection scans"""
+
+    def __init__(self):
+        super().__init__()
+        self.scans = 0
+
+    def iter_by_user(self, user_id, batch_size=100):
+        self.scans += 1
+        return super().iter_by_user(user_id, batch_size)
+
+
+def _service(repository=None) -> NotesService:
+    service = NotesService(repository=repository or CountingRepository())
+    service.cache = None
+    return service
+
+
+async def _create(service, title, content, user_id="user-1"):
+    result = await service.create_note(
+        NoteCreate(title=title, content=content), user_id
+    )
+    return result.data.id
+
+
+def _ids(result):
+    return [match.id for match in result.data.results]
+
+
+def test_ranks_title_and_frequent_matches_first():
+    async def scenario():
+        service = _service()
+        once = await _create(service, "Groceries", "buy milk and bread")
+        often = await _create(service, "Notes", "milk milk milk and more milk")
+        title = await _create(service, "Milk", "a dairy product")
+        await _create(service, "Unrelated", "nothing to see")
+        await _create(service, "Milk", "someone else's", user_id="user-2")
+        return await service.search_notes("user-1", "milk"), (once, often, title)
+
+    result, (once, often, title) = asyncio.run(scenario())
+
+    assert result.type
+    ids = _ids(result)
+    assert set(ids) == {once, often, title}
+    assert ids[-1] == once
+    scores = [match.score for match in result.data.results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_paginates_results():
+    async def scenario():
+        service = _service()
+        for i in range(5):
+            await _create(service, f"Note {i}", "shared term")
+        first = await service.search_notes("user-1", "shared", limit=2)
+        second = await service.search_notes(
+            "user-1", "shared", limit=2, page_token=first.data.next_page_token
+        )
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert len(first.data.results) == 2
+    assert len(second.data.results) == 2
+    assert not set(_ids(first)) & set(_ids(second))
+
+
+def test_writes_update_the_index_without_rescanning():
+    async def scenario():
+        repository = CountingRepository()
+        service = _service(repository)
+        kept = await _create(service, "Plan", "alpha")
+        changed = await _create(service, "Draft", "alpha")
+        deleted = await _create(service, "Old", "alpha")
+        assert _ids(await service.search_notes("user-1", "alpha"))
+
+        created = await _create(service, "New", "alpha beta")
+        await service.update_note(changed, NoteUpdate(content="gamma"), "user-1")
+        await service.delete_note(deleted, "user-1")
+
+        alpha = _ids(await service.search_notes("user-1", "alpha"))
+        gamma = _ids(await service.search_notes("user-1", "gamma"))
+        return repository.scans, alpha, gamma, (kept, changed, created)
+
+    scans, alpha, gamma, (kept, changed, created) = asyncio.run(scenario())
+
+    assert scans == 1
+    assert set(alpha) == {kept, created}
+    assert gamma == [changed]
+
+
+def test_refresh_applies_other_workers_changes():
+    async def scenario():
+        repository = CountingRepository()
+        worker = _service(repository)
+        other_worker = _service(repository)
+        worker.search_index.refresh_seconds = 0
+
+        first = await _create(worker, "First", "alpha")
+        assert _ids(await worker.search_notes("user-1", "alpha")) == [first]
+
+        second = await _create(other_worker, "Second", "alpha")
+        await other_worker.delete_note(first, "user-1")
+        return (
+            repository.scans,
+            _ids(await worker.search_notes("user-1", "alpha")),
+            second,
+        )
+
+    scans, alpha, second = asyncio.run(scenario())
+
+    assert alpha == [second]
+    # Only the first search read the whole collection
+    assert scans == 1
+
+
+def test_index_of_user_without_notes_still_refreshes():
+    async def scenario():
+        calls = []
+
+        async def load_notes(user_id):
+            return []
+
+        async def load_changes(user_id, cursor):
+            calls.append(cursor)
+            return [], cursor
+
+        index = SearchIndex(load_notes, load_changes, refresh_seconds=0)
+        await index.search("user-1", "anything")
+        await index.search("user-1", "anything")
+        return calls
+
+    assert len(asyncio.run(scenario())) == 1
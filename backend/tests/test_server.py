@@ -0,0 +1,34 @@
+import pytest
+
+from app import server
+from app.core.config import Settings
+
+
+def _run(monkeypatch, **values):
+    calls = {}
+    monkeypatch.setattr(
+        server, "get_settings", lambda: Settings(_env_file=None, **values)
+    )
+    monkeypatch.setattr(
+        server.uvicorn, "run", lambda app, **kwargs: calls.update(kwargs)
+    )
+    # main() exports the resolved count; restored after the test
+    monkeypatch.setenv("WORKERS", "0")
+    server.main()
+    return calls
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"storage_backend": "memory"},
+        {"storage_backend": "auto", "firebase_project_id": ""},
+    ],
+)
+def test_in_memory_storage_runs_a_single_worker(monkeypatch, values):
+    assert _run(monkeypatch, workers=4, **values)["workers"] == 1
+
+
+def test_shared_storage_runs_the_configured_workers(monkeypatch):
+    calls = _run(monkeypatch, workers=4, storage_backend="sqlite")
+    assert calls["workers"] == 4
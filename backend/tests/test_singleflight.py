@@ -0,0 +1,128 @@
+import asyncio
+
+from app.core.singleflight import SingleFlight
+from app.models import NoteCreate, NoteUpdate
+from app.repositories import InMemoryNotesRepository
+from app.services.notes import NotesService
+
+CALLERS = 50
+
+
+class SlowRepository(InMemoryNotesRepository):
+    """In-memory backend whose reads take a while and are counted"""
+
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+        self.lists = 0
+
+    async def get(self, note_id):
+        self.gets += 1
+        await asyncio.sleep(0.05)
+        return await super().get(note_id)
+
+    async def list_by_user(self, user_id, limit, cursor=None):
+        self.lists += 1
+        await asyncio.sleep(0.05)
+        return await super().list_by_user(user_id, limit, cursor)
+
+
+async def _setup():
+    repository = SlowRepository()
+    service = NotesService(repository=repository)
+    # Without the cache every read would reach the repository
+    service.cache = None
+    result = await service.create_note(NoteCreate(title="t", content="c"), "user-1")
+    return repository, service, result.data.id
+
+
+def test_concurrent_note_reads_share_one_backend_call():
+    async def scenario():
+        repository, service, note_id = await _setup()
+        results = await asyncio.gather(
+            *[service.get_note_by_id(note_id, "user-1") for _ in range(CALLERS)]
+        )
+        return repository, service, results
+
+    repository, service, results = asyncio.run(scenario())
+
+    assert repository.gets == 1
+    assert all(result.type and result.data.title == "t" for result in results)
+    assert service.reads.stats() == {"calls": 1, "shared": CALLERS - 1}
+
+
+def test_concurrent_list_reads_share_one_backend_call():
+    async def scenario():
+        repository, service, _ = await _setup()
+        results = await asyncio.gather(
+            *[service.get_user_notes("user-1") for _ in range(CALLERS)]
+        )
+        return repository, results
+
+    repository, results = asyncio.run(scenario())
+
+    assert repository.lists == 1
+    assert all(len(result.data.notes) == 1 for result in results)
+
+
+def test_different_pages_are_not_coalesced():
+    async def scenario():
+        repository, service, _ = await _setup()
+        await asyncio.gather(
+            service.get_user_notes("user-1", limit=10),
+            service.get_user_notes("user-1", limit=20),
+        )
+        return repository
+
+    assert asyncio.run(scenario()).lists == 2
+
+
+def test_shared_read_still_checks_ownership():
+    async def scenario():
+        repository, service, note_id = await _setup()
+        return repository, await asyncio.gather(
+            service.get_note_by_id(note_id, "user-1"),
+            service.get_note_by_id(note_id, "user-2"),
+        )
+
+    repository, (owner, other) = asyncio.run(scenario())
+
+    assert repository.gets == 1
+    assert owner.type
+    assert not other.type
+    assert "permission" in other.message
+
+
+def test_write_makes_later_readers_start_a_new_call():
+    async def scenario():
+        repository, service, note_id = await _setup()
+        before = asyncio.ensure_future(service.get_note_by_id(note_id, "user-1"))
+        await asyncio.sleep(0.01)
+        await service.update_note(note_id, NoteUpdate(title="new"), "user-1")
+        after = await service.get_note_by_id(note_id, "user-1")
+        return repository, await before, after
+
+    repository, before, after = asyncio.run(scenario())
+
+    assert repository.gets == 2
+    assert after.data.title == "new"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "value"
+
+        first = asyncio.ensure_future(flight.do("group", "key", load))
+        second = asyncio.ensure_future(flight.do("group", "key", load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return calls, await second
+
+    assert asyncio.run(scenario()) == (1, "value")
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Run in a fresh interpreter: other tests import the Firestore backend
+STARTUP_SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    timings = app.state.startup_timings
+    status = client.get("/health").status_code
+
+print(json.dumps({
+    "timings": timings,
+    "status": status,
+    "heavy_modules": sorted(
+        name for name in ("firebase_admin", "google.cloud.firestore")
+        if name in sys.modules
+    ),
+}))
+"""
+
+
+def _start_app(**env):
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=BACKEND,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_records_phase_timings():
+    started = _start_app(STORAGE_BACKEND="memory", FIREBASE_PROJECT_ID="")
+
+    assert started["status"] == 200
+    timings = started["timings"]
+    assert set(timings) == {"import", "firebase", "storage", "auth_keys", "total"}
+    assert all(seconds >= 0 for seconds in timings.values())
+    assert timings["total"] >= max(timings["storage"], timings["auth_keys"])
+
+
+def test_memory_backend_skips_heavy_imports():
+    started = _start_app(STORAGE_BACKEND="memory", FIREBASE_PROJECT_ID="")
+
+    assert started["heavy_modules"] == []
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.services.token_verifier import (
+    FirebaseTokenVerifier,
+    TokenExpiredError,
+    TokenVerificationError,
+)
+
+PROJECT_ID = "test-project-123"
+
+
+class SigningKey:
+    """A self-signed RSA key pair, published under ``kid``"""
+
+    def __init__(self, kid: str):
+        self.kid = kid
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        self.jwk = {
+            **jwk.construct(public_pem, algorithm="RS256").to_dict(),
+            "kid": kid,
+            "use": "sig",
+        }
+
+    def token(self, now: float, **claims) -> str:
+        payload = {
+            "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+            "aud": PROJECT_ID,
+            "sub": "user-1",
+            "iat": int(now) - 10,
+            "auth_time": int(now) - 10,
+            "exp": int(now) + 3600,
+            **claims,
+        }
+        return jwt.encode(
+            payload, self.pem, algorithm="RS256", headers={"kid": self.kid}
+        )
+
+
+class KeyServer:
+    """Local stand-in for Google's JWKS endpoint, counting fetches"""
+
+    def __init__(self, keys, max_age: int = 3600):
+        self.keys = keys
+        self.max_age = max_age
+        self.fetches = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                body = json.dumps({"keys": [key.jwk for key in server.keys]})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}")
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/keys"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def key():
+    return SigningKey("key-1")
+
+
+@pytest.fixture
+def server(key):
+    server = KeyServer([key])
+    yield server
+    server.close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _verifier(server: KeyServer, clock=time.time) -> FirebaseTokenVerifier:
+    return FirebaseTokenVerifier(
+        PROJECT_ID, server.url, refresh_margin_seconds=300, clock=clock
+    )
+
+
+def test_keys_are_fetched_once_and_cached(server, key):
+    verifier = _verifier(server)
+
+    async def scenario():
+        return [await verifier.verify(key.token(time.time())) for _ in range(3)]
+
+    claims = asyncio.run(scenario())
+
+    assert [c["uid"] for c in claims] == ["user-1"] * 3
+    assert server.fetches == 1
+
+
+def test_expired_keys_are_fetched_again(server, key):
+    clock = Clock()
+    verifier = _verifier(server, clock)
+
+    async def scenario():
+        await verifier.verify(key.token(time.time()))
+        clock.now += 3601
+        await verifier.verify(key.token(time.time(), exp=int(clock.now) + 60))
+
+    asyncio.run(scenario())
+
+    assert server.fetches == 2
+
+
+def test_rotated_key_is_picked_up_on_demand(server, key):
+    clock = Clock()
+    verifier = _verifier(server, clock)
+    rotated = SigningKey("key-2")
+
+    async def scenario():
+        await verifier.verify(key.token(time.time()))
+        server.keys = [key, rotated]
+        # Unknown key IDs refetch at most once a minute
+        with pytest.raises(TokenVerificationError):
+            await verifier.verify(rotated.token(time.time()))
+        clock.now += 61
+        return await verifier.verify(rotated.token(time.time()))
+
+    claims = asyncio.run(scenario())
+
+    assert claims["uid"] == "user-1"
+    assert server.fetches == 2
+
+
+def test_background_refresh_renews_keys_before_expiry(key):
+    server = KeyServer([key], max_age=1)
+    rotated = SigningKey("key-2")
+    verifier = FirebaseTokenVerifier(PROJECT_ID, server.url, refresh_margin_seconds=0.8)
+
+    async def scenario():
+        await verifier.start()
+        try:
+            server.keys = [rotated]
+            await asyncio.sleep(0.6)
+            fetches = server.fetches
+            claims = await verifier.verify(rotated.token(time.time()))
+            return fetches, claims
+        finally:
+            await verifier.stop()
+
+    try:
+        fetches, claims = asyncio.run(scenario())
+    finally:
+        server.close()
+
+    assert fetches >= 2
+    assert claims["uid"] == "user-1"
+    # The request itself did not have to fetch
+    assert server.fetches == fetches
+
+
+def test_expired_token_is_rejected(server, key):
+    verifier = _verifier(server)
+    now = time.time()
+    token = key.token(now - 7200, exp=int(now) - 60)
+
+    with pytest.raises(TokenExpiredError):
+        asyncio.run(verifier.verify(token))
+
+
+def test_wrong_audience_is_rejected(server, key):
+    verifier = _verifier(server)
+    token = key.token(time.time(), aud="another-project")
+
+    with pytest.raises(TokenVerificationError) as error:
+        asyncio.run(verifier.verify(token))
+    assert not isinstance(error.value, TokenExpiredError)
+
+
+def test_token_signed_by_an_unpublished_key_is_rejected(server):
+    verifier = _verifier(server)
+    token = SigningKey("key-1").token(time.time())
+
+    with pytest.raises(TokenVerificationError):
+        asyncio.run(verifier.verify(token))
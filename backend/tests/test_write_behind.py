@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.config import Settings
+from app.models import NoteCreate, NoteUpdate
+from app.repositories import InMemoryNotesRepository
+from app.services import notes
+from app.services.notes import NotesService
+from app.services.write_behind import WriteBehindBuffer
+
+
+class RecordingRepository(InMemoryNotesRepository):
+    """In-memory backend recording every batch of writes"""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.fail = False
+
+    async def apply_writes(self, writes):
+        if self.fail:
+            raise RuntimeError("storage unavailable")
+        self.batches.append(writes)
+        await super().apply_writes(writes)
+
+    async def update_owned(self, note_id, user_id, fields, expected_updated_at=None):
+        if self.fail:
+            raise RuntimeError("storage unavailable")
+        return await super().update_owned(note_id, user_id, fields, expected_updated_at)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    # A window long enough that only explicit flushes store anything
+    settings = Settings(
+        _env_file=None, write_behind_enabled=True, write_behind_window_seconds=60
+    )
+    monkeypatch.setattr(notes, "get_settings", lambda: settings)
+    service = NotesService(repository=RecordingRepository())
+    service.cache = None
+    return service
+
+
+async def _create(service, title="draft", content="body"):
+    result = await service.create_note(
+        NoteCreate(title=title, content=content), "user-1"
+    )
+    return result.data.id
+
+
+def test_reads_see_buffered_updates_before_the_flush(service):
+    async def scenario():
+        note_id = await _create(service)
+        updated = await service.update_note(
+            note_id, NoteUpdate(title="edited"), "user-1"
+        )
+        stored = await service.repository.get(note_id)
+        fetched = await service.get_note_by_id(note_id, "user-1")
+        page = await service.get_user_notes("user-1")
+        summaries = await service.get_user_notes("user-1", view="summary")
+        await service.close()
+        return updated, stored, fetched, page, summaries
+
+    updated, stored, fetched, page, summaries = asyncio.run(scenario())
+
+    assert updated.data.title == "edited"
+    assert stored["title"] == "draft"
+    assert fetched.data.title == "edited"
+    assert [note.title for note in page.data.notes] == ["edited"]
+    assert [note.title for note in summaries.data.notes] == ["edited"]
+
+
+def test_updates_of_a_note_coalesce_into_one_write(service):
+    async def scenario():
+        note_id = await _create(service)
+        await service.update_note(note_id, NoteUpdate(title="one"), "user-1")
+        await service.update_note(note_id, NoteUpdate(content="two"), "user-1")
+        await service.update_note(note_id, NoteUpdate(title="three"), "user-1")
+        await service.write_behind.flush()
+        stored = await service.repository.get(note_id)
+        await service.close()
+        return note_id, stored
+
+    note_id, stored = asyncio.run(scenario())
+
+    batches = service.repository.batches
+    assert len(batches) == 1
+    [(kind, written_id, fields)] = batches[0]
+    assert (kind, written_id) == ("update", note_id)
+    assert fields["title"] == "three"
+    assert fields["content"] == "two"
+    assert (stored["title"], stored["content"]) == ("three", "two")
+
+
+def test_close_flushes_pending_updates(service):
+    async def scenario():
+        first = await _create(service, "first")
+        second = await _create(service, "second")
+        await service.update_note(first, NoteUpdate(title="first edited"), "user-1")
+        await service.update_note(second, NoteUpdate(title="second edited"), "user-1")
+        repository = service.repository
+        await service.close()
+        return (
+            await repository.get(first),
+            await repository.get(second),
+            len(service.write_behind),
+        )
+
+    first, second, pending = asyncio.run(scenario())
+
+    assert first["title"] == "first edited"
+    assert second["title"] == "second edited"
+    assert pending == 0
+    assert len(service.repository.batches) == 1
+
+
+def test_failed_flush_keeps_updates_for_the_next_one():
+    async def scenario():
+        repository = RecordingRepository()
+        await repository.create(
+            {
+                "id": "n1",
+                "user_id": "user-1",
+                "title": "draft",
+                "content": "body",
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+        buffer = WriteBehindBuffer(lambda: repository, 60, 100)
+        note = await repository.get("n1")
+        await buffer.put(note, {"title": "one"})
+
+        repository.fail = True
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        await buffer.put(note, {"content": "two"})
+
+        repository.fail = False
+        await buffer.close()
+        return await repository.get("n1"), len(buffer)
+
+    stored, pending = asyncio.run(scenario())
+
+    assert (stored["title"], stored["content"]) == ("one", "two")
+    assert pending == 0